@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Ollama and the Gemini REST API, for benchmarks and load tests.
+
+Speaks the subset of both APIs the clients use and answers with canned,
+deterministic content: a JUnit test class for generation prompts, the submitted
+test unchanged for fix prompts, a dependency-analysis JSON for analysis prompts
+and plain text for chat.
+
+Usage:
+    python fake_llm_server.py --port 11434 --ttft 0.5 --token-latency 0.02
+    python fake_llm_server.py --error-rate 0.1 --seed 7 --tests-dir canned_tests/
+
+Point the backend at it with:
+    OLLAMA_URLS=http://localhost:11434
+    GEMINI_API_BASE=http://localhost:11434 GEMINI_API_KEY=fake USE_GEMINI=true
+"""
+
+import os
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+TEST_TEMPLATE = """package {package};
+
+import org.junit.jupiter.api.BeforeEach;
+import org.junit.jupiter.api.Test;
+import org.junit.jupiter.api.extension.ExtendWith;
+import org.mockito.InjectMocks;
+import org.mockito.junit.jupiter.MockitoExtension;
+
+import static org.junit.jupiter.api.Assertions.*;
+
+@ExtendWith(MockitoExtension.class)
+class {name}Test {{
+
+    @InjectMocks
+    private {name} {field};
+
+    @BeforeEach
+    void setUp() {{
+        assertNotNull({field});
+    }}
+
+    @Test
+    void should_CreateInstance_When_DependenciesAreMocked() {{
+        assertNotNull({field});
+    }}
+}}
+"""
+
+ANALYSIS_RESPONSE = {
+    "essential_dependencies": [],
+    "useful_dependencies": [],
+    "optional_dependencies": [],
+    "test_strategy": {
+        "primary_focus": "Test the public API with mocked collaborators",
+        "mock_recommendations": [],
+        "key_test_scenarios": ["Happy path", "Null validation", "Exception handling"]
+    }
+}
+
+CHAT_RESPONSE = ("Coverage looks reasonable overall. Focus next on the classes below 60% and add tests "
+                 "for their exception paths and boundary values.")
+
+
+# google.rpc status names the Gemini API puts next to the HTTP code
+GEMINI_ERROR_STATUS = {
+    400: 'INVALID_ARGUMENT',
+    403: 'PERMISSION_DENIED',
+    404: 'NOT_FOUND',
+    429: 'RESOURCE_EXHAUSTED',
+    500: 'INTERNAL',
+    503: 'UNAVAILABLE',
+    504: 'DEADLINE_EXCEEDED',
+}
+
+
+class FakeLLM:
+    """Shared configuration, canned responses and counters for all request threads"""
+
+    def __init__(self, args):
+        self.models = [m.strip() for m in args.models.split(',') if m.strip()]
+        self.gemini_models = [m.strip() for m in args.gemini_models.split(',') if m.strip()]
+        self.ttft = args.ttft
+        self.token_latency = args.token_latency
+        self.error_rate = args.error_rate
+        self.error_status = args.error_status
+        self.rng = random.Random(args.seed)
+        self.canned_tests = self._load_canned_tests(args.tests_dir)
+        self.stats = {'requests': 0, 'errors': 0, 'tokens': 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load_canned_tests(tests_dir):
+        canned = []
+        if tests_dir:
+            for file_name in sorted(os.listdir(tests_dir)):
+                if file_name.endswith('.java'):
+                    with open(os.path.join(tests_dir, file_name), 'r', encoding='utf-8') as f:
+                        canned.append(f.read())
+        return canned
+
+    def should_fail(self):
+        """Decide (reproducibly for a given --seed and request order) whether to inject an error"""
+        with self._lock:
+            self.stats['requests'] += 1
+            failed = self.rng.random() < self.error_rate
+            if failed:
+                self.stats['errors'] += 1
+            return failed
+
+    def count_tokens(self, n):
+        with self._lock:
+            self.stats['tokens'] += n
+
+    def respond_to(self, prompt):
+        """Canned answer matching the kind of prompt"""
+        if not prompt.strip():
+            return ""
+        if "Smart Dependency Analysis" in prompt:
+            return "```json\n" + json.dumps(ANALYSIS_RESPONSE, indent=2) + "\n```"
+        if "respond with just 'Hi'" in prompt or prompt.strip() == "Hello":
+            return "Hi"
+
+        source = next(iter(re.findall(r"```java\n(.*?)```", prompt, re.DOTALL)), "")
+        if "does **not compile" in prompt:
+            # Fixer prompt: hand the test back unchanged so the pipeline completes
+            return "```java\n" + source.strip() + "\n```"
+        class_match = re.search(r"\b(?:class|interface|enum|record)\s+(\w+)", source)
+        if not class_match:
+            return CHAT_RESPONSE
+
+        name = class_match.group(1)
+        if self.canned_tests:
+            body = self.canned_tests[sum(map(ord, name)) % len(self.canned_tests)]
+            return "```java\n" + body.replace("{name}", name) + "\n```"
+        package_match = re.search(r"^\s*package\s+([\w.]+)\s*;", source, re.MULTILINE)
+        test = TEST_TEMPLATE.format(
+            package=package_match.group(1) if package_match else "com.example",
+            name=name,
+            field=name[0].lower() + name[1:],
+        )
+        return "```java\n" + test + "```"
+
+    @staticmethod
+    def tokens(text):
+        """Split text into roughly four-character tokens, keeping whitespace"""
+        return re.findall(r"\s*\S{1,4}|\s+", text)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    llm: FakeLLM = None
+
+    def log_message(self, format, *args):
+        pass
+
+    # ---- plumbing -------------------------------------------------------
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}') if length else {}
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_chunked(self, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+    def _chunk(self, data):
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b'0\r\n\r\n')
+        self.wfile.flush()
+
+    def _timed_tokens(self, text):
+        """Yield tokens paced by --ttft and --token-latency"""
+        tokens = self.llm.tokens(text)
+        self.llm.count_tokens(len(tokens))
+        time.sleep(self.llm.ttft)
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.llm.token_latency)
+            yield token
+
+    def _full_text(self, text):
+        """Whole response after the latency streaming it would have taken"""
+        tokens = self.llm.tokens(text)
+        self.llm.count_tokens(len(tokens))
+        time.sleep(self.llm.ttft + self.llm.token_latency * max(0, len(tokens) - 1))
+        return text
+
+    # ---- routing ----------------------------------------------------------
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/api/tags':
+            self._send_json({'models': [{'name': m, 'size': 0, 'digest': m, 'modified_at': _now()} for m in self.llm.models]})
+        elif path == '/api/ps':
+            self._send_json({'models': [{'name': m} for m in self.llm.models]})
+        elif path.startswith('/v1beta/models/'):
+            model = path.rsplit('/', 1)[-1]
+            if model not in self.llm.gemini_models:
+                return self._gemini_error(404, f"models/{model} is not found")
+            self._send_json({'name': f'models/{model}'})
+        elif path == '/_stats':
+            self._send_json(self.llm.stats)
+        else:
+            self._send_json({'error': 'not found'}, 404)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self._body()
+        if path == '/api/pull':
+            return self._ollama_pull(body)
+        if path in ('/api/generate', '/api/chat'):
+            if self.llm.should_fail():
+                # Ollama reports errors as a plain string
+                return self._send_json({'error': 'injected failure'}, self.llm.error_status)
+            if path == '/api/generate':
+                return self._ollama_generate(body)
+            return self._ollama_chat(body)
+
+        if path.startswith('/v1beta/models/') and ':' in path:
+            model, _, method = path[len('/v1beta/models/'):].partition(':')
+            if model not in self.llm.gemini_models:
+                return self._gemini_error(404, f"models/{model} is not found for API version v1beta")
+            if self.llm.should_fail():
+                return self._gemini_error(self.llm.error_status, 'injected failure')
+            if method == 'generateContent':
+                return self._gemini_generate(body)
+            if method == 'streamGenerateContent':
+                return self._gemini_stream(body)
+        self._send_json({'error': 'not found'}, 404)
+
+    # ---- Ollama -----------------------------------------------------------
+
+    def _ollama_generate(self, body):
+        model = body.get('model')
+        if model not in self.llm.models:
+            return self._send_json({'error': f"model '{model}' not found"}, 404)
+        text = self.llm.respond_to(body.get('prompt', ''))
+        if not body.get('stream', True):
+            return self._send_json({'model': model, 'created_at': _now(), 'response': self._full_text(text), 'done': True})
+
+        self._start_chunked('application/x-ndjson')
+        for token in self._timed_tokens(text):
+            self._chunk((json.dumps({'model': model, 'response': token, 'done': False}) + '\n').encode('utf-8'))
+        self._chunk((json.dumps({'model': model, 'response': '', 'done': True}) + '\n').encode('utf-8'))
+        self._end_chunked()
+
+    def _ollama_chat(self, body):
+        model = body.get('model')
+        if model not in self.llm.models:
+            return self._send_json({'error': f"model '{model}' not found"}, 404)
+        prompt = '\n'.join(m.get('content', '') for m in body.get('messages', []) if m.get('role') == 'user')
+        text = self.llm.respond_to(prompt)
+        if not body.get('stream', True):
+            message = {'role': 'assistant', 'content': self._full_text(text)}
+            return self._send_json({'model': model, 'created_at': _now(), 'message': message, 'done': True})
+
+        self._start_chunked('application/x-ndjson')
+        for token in self._timed_tokens(text):
+            chunk = {'model': model, 'message': {'role': 'assistant', 'content': token}, 'done': False}
+            self._chunk((json.dumps(chunk) + '\n').encode('utf-8'))
+        self._chunk((json.dumps({'model': model, 'message': {'role': 'assistant', 'content': ''}, 'done': True}) + '\n').encode('utf-8'))
+        self._end_chunked()
+
+    def _ollama_pull(self, body):
+        model = body.get('name') or body.get('model')
+        self._start_chunked('application/x-ndjson')
+        self._chunk(b'{"status": "pulling manifest"}\n')
+        for completed in range(0, 101, 20):
+            time.sleep(self.llm.token_latency)
+            self._chunk((json.dumps({'status': 'pulling fake', 'total': 100, 'completed': completed}) + '\n').encode('utf-8'))
+        if model not in self.llm.models:
+            self.llm.models.append(model)
+        self._chunk(b'{"status": "success"}\n')
+        self._end_chunked()
+
+    # ---- Gemini -----------------------------------------------------------
+
+    @staticmethod
+    def _gemini_prompt(body):
+        return '\n'.join(part.get('text', '') for content in body.get('contents', []) for part in content.get('parts', []))
+
+    @staticmethod
+    def _gemini_payload(text):
+        return {'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'}, 'finishReason': 'STOP'}]}
+
+    def _gemini_error(self, code, message):
+        status = GEMINI_ERROR_STATUS.get(code, 'UNKNOWN')
+        self._send_json({'error': {'code': code, 'message': message, 'status': status}}, code)
+
+    def _gemini_generate(self, body):
+        text = self.llm.respond_to(self._gemini_prompt(body))
+        self._send_json(self._gemini_payload(self._full_text(text)))
+
+    def _gemini_stream(self, body):
+        text = self.llm.respond_to(self._gemini_prompt(body))
+        self._start_chunked('text/event-stream')
+        for token in self._timed_tokens(text):
+            self._chunk(f"data: {json.dumps(self._gemini_payload(token))}\r\n\r\n".encode('utf-8'))
+        self._end_chunked()
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Deterministic fake Ollama/Gemini server for benchmarks')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--models', default='starchat2:15b,codellama,llama2,mixtral',
+                        help='comma-separated Ollama models reported as installed')
+    parser.add_argument('--gemini-models', default='gemini-1.5-flash,gemini-1.5-pro,gemini-pro',
+                        help='comma-separated Gemini models served; others get a 404')
+    parser.add_argument('--ttft', type=float, default=0.2, help='seconds before the first token')
+    parser.add_argument('--token-latency', type=float, default=0.01, help='seconds between tokens')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of generations that fail')
+    parser.add_argument('--error-status', type=int, default=503, help='HTTP status of injected failures')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the injected failures')
+    parser.add_argument('--tests-dir', help='directory of canned .java test bodies ({name} is the class under test)')
+    args = parser.parse_args()
+
+    Handler.llm = FakeLLM(args)
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
+    print(f"🤖 [FAKE-LLM] Serving Ollama and Gemini APIs on http://{args.host}:{args.port}")
+    print(f"🤖 [FAKE-LLM] ttft={args.ttft}s token_latency={args.token_latency}s error_rate={args.error_rate} seed={args.seed}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 [FAKE-LLM] Stopped")
+
+
+if __name__ == '__main__':
+    main()
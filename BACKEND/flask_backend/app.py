@@ -1,13 +1,31 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dotenv import load_dotenv
+
+# Load environment variables from .env file before the test_generator modules read their settings
+env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env')
+load_dotenv(env_path)
 
-from flask import Flask, request, jsonify, render_template, Response, abort
+from flask import Flask, request, jsonify, render_template, Response, abort, stream_with_context
 from db import log_test_run, init_db, get_dashboard_stats, get_test_trends, get_coverage_data, get_recent_tests
 # from db import init_db, get_dashboard_stats, get_test_trends, get_coverage_data
 from test_generator.fixer import TestFixer
 from test_generator.generator import TestGenerator
 from test_generator.smart_suggester import SmartContextSuggester
+from test_generator.project_index import ProjectIndex
+from test_generator.incremental_indexer import files_changed, queue_project_parse
+from test_generator.http_transport import get_transport
+from test_generator.ai_client_factory import AIClientFactory
+from test_generator.resilience import breaker_states, latency_tracker
+from test_generator.single_flight import generation_flight, analysis_flight
+from test_generator.model_registry import get_model_registry
+from test_generator.response_cache import get_response_cache
+from test_generator.ollama_warmer import start_warmer, get_warmer
+from test_generator.ollama_pool import pool_states
+from test_generator.composite_client import hedge_stats
+from test_generator.rate_limiter import limiter_stats
+from test_generator.analysis_cache import get_analysis_cache
 from chat_assistant import ChatAssistant
 import os
 import uuid
@@ -20,14 +38,16 @@ from pathlib import Path
 from flask_cors import CORS
 import json
 import logging
+import threading
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 import requests
+# Keep-alive connection pools shared by all outbound Jenkins/Ollama calls
+http_client = get_transport()
 import base64
 from urllib.parse import urljoin
-from dotenv import load_dotenv
 
 # Try to import rarfile for RAR support
 try:
@@ -50,9 +70,6 @@ try:
 except ImportError:
     PATOOL_SUPPORT = False
 
-# Load environment variables from .env file
-env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env')
-load_dotenv(env_path)
 
 # Debug: Check if environment variables are loaded
 print(f"🔧 [ENV] GEMINI_API_KEY loaded: {'Yes' if os.getenv('GEMINI_API_KEY') else 'No'}")
@@ -69,6 +86,21 @@ os.makedirs(GENERATED_DIR, exist_ok=True)
 init_db()
 chat_assistant = ChatAssistant()
 
+# Build and verify shared LLM clients in the background so the first request skips setup
+# Comma-separated Ollama servers; requests are balanced across them
+OLLAMA_URLS = os.getenv('OLLAMA_URLS', 'http://localhost:11434')
+
+PREWARM_MODELS = [m.strip() for m in os.getenv('PREWARM_MODELS', '').split(',') if m.strip()]
+if PREWARM_MODELS:
+    print(f"🔥 [PREWARM] Warming clients for: {', '.join(PREWARM_MODELS)}")
+    threading.Thread(target=AIClientFactory.prewarm, args=(PREWARM_MODELS, OLLAMA_URLS), daemon=True).start()
+
+# Keep these Ollama models loaded in memory so the first request of the day skips the model load
+OLLAMA_PRELOAD_MODELS = [m.strip() for m in os.getenv('OLLAMA_PRELOAD_MODELS', '').split(',') if m.strip()]
+if OLLAMA_PRELOAD_MODELS:
+    print(f"🔥 [PRELOAD] Keeping Ollama models loaded: {', '.join(OLLAMA_PRELOAD_MODELS)}")
+    start_warmer(OLLAMA_URLS, OLLAMA_PRELOAD_MODELS)
+
 # Initialize Jenkins settings database
 def init_settings_db():
     """Initialize settings database for Jenkins configuration"""
@@ -140,48 +172,59 @@ def home():
     return render_template("index.html")
 
 
-@app.route("/generate-tests", methods=["POST"])
-def generate():
-    try:
-        data = request.get_json()
-        # print("📥 Incoming JSON:", data)
+def _prepare_generation(data):
+    """Write the target and context files from a generation request and build generator args"""
+    code = data.get("code")
+    path = data.get("fileName")
+    file_name = os.path.basename(path) if path else None
+    context = data.get("context")
 
-        code = data.get("code")
-        path = data.get("fileName")
-        file_name = os.path.basename(path)
-        context = data.get("context")
+    if not code or not file_name:
+        return None, None
 
-        if not code or not file_name:
-            return jsonify({"error": "Missing code or fileName"}), 400
+    safe_file_name = Path(file_name).as_posix()  
+    if safe_file_name.startswith("uploads/"):
+        safe_file_name = safe_file_name[len("uploads/"):]
 
-        safe_file_name = Path(file_name).as_posix()  
-        if safe_file_name.startswith("uploads/"):
-            safe_file_name = safe_file_name[len("uploads/"):]
+    java_file_path = os.path.join(UPLOAD_DIR, safe_file_name)
 
-        java_file_path = os.path.join(UPLOAD_DIR, safe_file_name)
+    os.makedirs(os.path.dirname(java_file_path), exist_ok=True)
 
-        os.makedirs(os.path.dirname(java_file_path), exist_ok=True)
+    with open(java_file_path, "w", encoding="utf-8") as f:
+        f.write(code)
 
-        with open(java_file_path, "w", encoding="utf-8") as f:
-            f.write(code)
+    context_paths = []
+    if context and isinstance(context, dict):
+        for ctx_name, ctx_code in context.items():
+            ctx_path = os.path.join(UPLOAD_DIR, ctx_name)
+            os.makedirs(os.path.dirname(ctx_path), exist_ok=True)
+            with open(ctx_path, "w", encoding="utf-8") as f:
+                f.write(ctx_code)
+            context_paths.append(ctx_path)
 
-        context_paths = []
-        if context and isinstance(context, dict):
-            for ctx_name, ctx_code in context.items():
-                ctx_path = os.path.join(UPLOAD_DIR, ctx_name)
-                os.makedirs(os.path.dirname(ctx_path), exist_ok=True)
-                with open(ctx_path, "w", encoding="utf-8") as f:
-                    f.write(ctx_code)
-                context_paths.append(ctx_path)
+    files_changed([java_file_path] + context_paths)
+
+    class Args:
+        file = java_file_path
+        model = data.get("llm")
+        framework = data.get("framework")
+        api_url = OLLAMA_URLS
+        junit_jar = "test_jars/junit-platform-console-standalone-1.13.0-RC1.jar"
+        context_files = context_paths 
+        use_cache = not data.get("noCache", False)
+
+    return Args, file_name
 
-        # Create Args and run generator as before
-        class Args:
-            file = java_file_path
-            model = data.get("llm")
-            framework = data.get("framework")
-            api_url = "http://localhost:11434"
-            junit_jar = "test_jars/junit-platform-console-standalone-1.13.0-RC1.jar"
-            context_files = context_paths 
+
+@app.route("/generate-tests", methods=["POST"])
+def generate():
+    try:
+        data = request.get_json()
+        # print("📥 Incoming JSON:", data)
+
+        Args, file_name = _prepare_generation(data)
+        if Args is None:
+            return jsonify({"error": "Missing code or fileName"}), 400
 
         generator = TestGenerator(Args)
         output = generator.run()
@@ -206,6 +249,49 @@ def generate():
         print("🔥 EXCEPTION in /generate-tests")
         traceback.print_exc()
         return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
+
+@app.route("/generate-tests/stream", methods=["POST"])
+def generate_stream():
+    """Server-Sent Events variant of /generate-tests that forwards model tokens as they arrive"""
+    # Errors before the stream starts get the same JSON responses as /generate-tests
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    try:
+        Args, file_name = _prepare_generation(data)
+    except Exception as e:
+        print("🔥 EXCEPTION in /generate-tests/stream")
+        logger.exception("Could not prepare streamed generation")
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+    if Args is None:
+        return jsonify({"error": "Missing code or fileName"}), 400
+
+    def sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    def events():
+        try:
+            generator = TestGenerator(Args)
+            for kind, value in generator.stream():
+                if kind == 'token':
+                    yield sse('token', {'text': value})
+                elif kind == 'result':
+                    test_file = f"{generator.class_parser.class_name}Test.java"
+                    log_test_run(file_name, test_file, value, success=True)
+                    yield sse('done', {'testFile': test_file, 'code': value})
+                else:
+                    yield sse('error', {'error': value})
+        except Exception as e:
+            print("🔥 EXCEPTION in /generate-tests/stream")
+            logger.exception("Streamed generation failed")
+            yield sse('error', {'error': "Internal server error", 'details': str(e)})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
     
 
 @app.route("/tests", methods=["GET"])
@@ -364,7 +450,7 @@ def clone_repo(url, extract_to):
         if url.endswith("/"):
             url = url[:-1]
         url += "/archive/refs/heads/main.zip"
-    r = requests.get(url)
+    r = http_client.get(url)
     if r.status_code == 200:
         zip_path = os.path.join(extract_to, "repo.zip")
         with open(zip_path, "wb") as f:
@@ -399,6 +485,7 @@ def upload():
 
     uploaded_file = request.files.get("zipFile")
     repo_url = request.form.get("repoUrl")
+    bulk_parse = request.form.get("bulkParse", os.getenv("BULK_PARSE_ON_UPLOAD", "false")).lower() == "true"
 
     try:
         if uploaded_file:
@@ -426,6 +513,17 @@ def upload():
             print(f"📁 [UPLOAD] Cloning repository: {repo_url}")
             clone_repo(repo_url, temp_dir)
 
+        print(f"📁 [UPLOAD] Indexing project symbols...")
+        project_index = ProjectIndex.build(temp_dir)
+        project_index.save()
+        ProjectIndex.invalidate(temp_dir)
+        print(f"📁 [UPLOAD] Indexed {len(project_index)} Java files")
+
+        if bulk_parse:
+            # Runs in the background; the upload returns without waiting for it
+            queue_project_parse(temp_dir, files=project_index.java_files())
+            print(f"📁 [UPLOAD] Queued parallel parse of all Java files")
+
         print(f"📁 [UPLOAD] Building file tree...")
         tree = build_file_tree(temp_dir, UPLOAD_DIR)
         print(f"📁 [UPLOAD] File tree built successfully")
@@ -495,14 +593,14 @@ def suggest_context():
         
         # Create a simple args object for AI client
         class SimpleArgs:
-            model = "gemini-pro"  # or get from request
-            api_url = "http://localhost:11434"
+            # Same model as the later /generate-tests call so it can reuse this analysis
+            model = data.get('llm') or "gemini-pro"
+            api_url = OLLAMA_URLS
         
         # Use AI analyzer for smarter suggestions
-        from test_generator.ai_client_factory import AIClientFactory
         from test_generator.ai_context_analyzer import AIContextAnalyzer
         
-        ai_client = AIClientFactory.create_client(SimpleArgs())
+        ai_client = AIClientFactory.get_client_for('analysis', SimpleArgs())
         ai_analyzer = AIContextAnalyzer(UPLOAD_FOLDER, ai_client)
         
         try:
@@ -602,7 +700,7 @@ def fix_code():
             file_name = data.get('fileName')
             model = data.get('llm')
             framework = data.get('framework')
-            api_url = "http://localhost:11434"
+            api_url = OLLAMA_URLS
         original_code = data.get('code')
         error_message = data.get('error')
         
@@ -646,7 +744,7 @@ def dashboard_stats():
                 
                 # Get recent builds for test counts
                 job_url = f"{jenkins_url}/job/{job_name}/api/json"
-                job_response = requests.get(job_url, auth=auth, timeout=10)
+                job_response = http_client.get(job_url, auth=auth, timeout=10)
                 
                 print(f"🌐 [API] Jenkins job API response: {job_response.status_code}")
                 
@@ -664,7 +762,7 @@ def dashboard_stats():
                             test_url = f"{build['url']}testReport/api/json"
                             print(f"🌐 [API] Fetching test data for build {build.get('number')}: {test_url}")
                             
-                            test_response = requests.get(test_url, auth=auth, timeout=10)
+                            test_response = http_client.get(test_url, auth=auth, timeout=10)
                             print(f"🌐 [API] Build {i+1} test response: {test_response.status_code}")
                             
                             if test_response.status_code == 200:
@@ -734,7 +832,7 @@ def dashboard_trends():
                 
                 # Get recent builds
                 job_url = f"{jenkins_url}/job/{job_name}/api/json"
-                job_response = requests.get(job_url, auth=auth, timeout=10)
+                job_response = http_client.get(job_url, auth=auth, timeout=10)
                 
                 if job_response.status_code == 200:
                     job_data = job_response.json()
@@ -747,7 +845,7 @@ def dashboard_trends():
                     for i, build in enumerate(builds):
                         try:
                             build_url = f"{build['url']}api/json"
-                            build_response = requests.get(build_url, auth=auth, timeout=10)
+                            build_response = http_client.get(build_url, auth=auth, timeout=10)
                             
                             if build_response.status_code == 200:
                                 build_data = build_response.json()
@@ -758,7 +856,7 @@ def dashboard_trends():
                                 
                                 # Get test results for this build
                                 test_url = f"{build['url']}testReport/api/json"
-                                test_response = requests.get(test_url, auth=auth, timeout=10)
+                                test_response = http_client.get(test_url, auth=auth, timeout=10)
                                 
                                 if test_response.status_code == 200:
                                     test_data = test_response.json()
@@ -835,7 +933,7 @@ def dashboard_coverage():
                 jacoco_url = f"{jenkins_url}/job/{job_name}/lastSuccessfulBuild/jacoco/api/json"
                 print(f"🌐 [API] Fetching JaCoCo data from: {jacoco_url}")
                 
-                response = requests.get(jacoco_url, auth=auth, timeout=10)
+                response = http_client.get(jacoco_url, auth=auth, timeout=10)
                 print(f"🌐 [API] JaCoCo response status: {response.status_code}")
                 
                 if response.status_code == 200:
@@ -998,14 +1096,14 @@ def test_jenkins():
         headers = {'Authorization': f'Basic {auth_header}'}
         
         # Try to get Jenkins version info
-        response = requests.get(f"{jenkins_url}/api/json", headers=headers, timeout=10)
+        response = http_client.get(f"{jenkins_url}/api/json", headers=headers, timeout=10)
         
         if response.status_code == 200:
             jenkins_info = response.json()
             
             # If job name is provided, check if it exists
             if job_name:
-                job_response = requests.get(f"{jenkins_url}/job/{job_name}/api/json", headers=headers, timeout=10)
+                job_response = http_client.get(f"{jenkins_url}/job/{job_name}/api/json", headers=headers, timeout=10)
                 if job_response.status_code != 200:
                     return jsonify({'error': f'Job "{job_name}" not found'}), 400
             
@@ -1058,7 +1156,7 @@ def test_ollama():
         model_name = data.get('model')
         
         # Test Ollama connection
-        response = requests.get(f"{ollama_url}/api/tags", timeout=10)
+        response = http_client.get(f"{ollama_url}/api/tags", timeout=10)
         
         if response.status_code == 200:
             models = response.json()
@@ -1119,7 +1217,7 @@ def trigger_jenkins_job():
         
         trigger_url = f"{jenkins_url}/job/{job_name}/buildWithParameters"
         
-        response = requests.post(trigger_url, data=job_params, auth=auth, timeout=30)
+        response = http_client.post(trigger_url, data=job_params, auth=auth, timeout=30)
         
         if response.status_code in [200, 201]:
             return jsonify({'status': 'triggered', 'job': job_name})
@@ -1146,7 +1244,7 @@ def get_jenkins_builds():
         
         auth = (jenkins_config['username'], jenkins_config['token'])
         
-        response = requests.get(url, auth=auth, timeout=30)
+        response = http_client.get(url, auth=auth, timeout=30)
         response.raise_for_status()
         
         job_data = response.json()
@@ -1155,7 +1253,7 @@ def get_jenkins_builds():
         builds = []
         for build in job_data.get('builds', [])[:10]:
             build_url = f"{build['url']}api/json"
-            build_response = requests.get(build_url, auth=auth, timeout=30)
+            build_response = http_client.get(build_url, auth=auth, timeout=30)
             
             if build_response.status_code == 200:
                 build_data = build_response.json()
@@ -1205,7 +1303,7 @@ def test_jenkins_connection():
         
         # Test basic Jenkins connection
         try:
-            response = requests.get(f"{jenkins_url}/api/json", auth=auth, timeout=10)
+            response = http_client.get(f"{jenkins_url}/api/json", auth=auth, timeout=10)
             if response.status_code == 401:
                 return jsonify({'success': False, 'message': 'Invalid Jenkins credentials'}), 200
             elif response.status_code != 200:
@@ -1219,7 +1317,7 @@ def test_jenkins_connection():
         if job_name:
             try:
                 job_url = f"{jenkins_url}/job/{job_name}/api/json"
-                job_response = requests.get(job_url, auth=auth, timeout=10)
+                job_response = http_client.get(job_url, auth=auth, timeout=10)
                 
                 if job_response.status_code == 404:
                     return jsonify({
@@ -1270,7 +1368,7 @@ def get_jenkins_coverage():
                 else:
                     # Get build numbers from job info first
                     job_url = f"{jenkins_url}/job/{job_name}/api/json"
-                    job_response = requests.get(job_url, auth=auth, timeout=30)
+                    job_response = http_client.get(job_url, auth=auth, timeout=30)
                     
                     if job_response.status_code == 200:
                         job_data = job_response.json()
@@ -1286,7 +1384,7 @@ def get_jenkins_coverage():
                 # Try to get JaCoCo coverage report
                 jacoco_url = f"{jenkins_url}/job/{job_name}/{build_id}/jacoco/api/json"
                 
-                response = requests.get(jacoco_url, auth=auth, timeout=30)
+                response = http_client.get(jacoco_url, auth=auth, timeout=30)
                 
                 if response.status_code == 200:
                     jacoco_data = response.json()
@@ -1326,7 +1424,7 @@ def get_jenkins_test_results():
         
         # Get test results from recent builds
         job_url = f"{jenkins_url}/job/{job_name}/api/json"
-        job_response = requests.get(job_url, auth=auth, timeout=30)
+        job_response = http_client.get(job_url, auth=auth, timeout=30)
         
         if job_response.status_code == 200:
             job_data = job_response.json()
@@ -1336,14 +1434,14 @@ def get_jenkins_test_results():
                 try:
                     test_url = f"{build['url']}testReport/api/json"
                     
-                    response = requests.get(test_url, auth=auth, timeout=30)
+                    response = http_client.get(test_url, auth=auth, timeout=30)
                     
                     if response.status_code == 200:
                         test_data = response.json()
                         
                         # Get build details for timestamp
                         build_details_url = f"{build['url']}api/json"
-                        build_details = requests.get(build_details_url, auth=auth, timeout=30)
+                        build_details = http_client.get(build_details_url, auth=auth, timeout=30)
                         
                         timestamp = None
                         if build_details.status_code == 200:
@@ -1463,5 +1561,31 @@ def get_jenkins_settings():
     except Exception as e:
         return jsonify({'error': f'Failed to get settings: {str(e)}'}), 500
 
+@app.route('/api/diagnostics/http', methods=['GET'])
+def http_diagnostics():
+    """Per-host request counts and connection reuse of the shared HTTP transport"""
+    return jsonify(http_client.stats())
+
+@app.route('/api/diagnostics/llm', methods=['GET'])
+def llm_diagnostics():
+    """Circuit breaker states, observed latencies and coalescing/caching counters of the LLM backends"""
+    cache = get_response_cache()
+    analysis_cache = get_analysis_cache()
+    return jsonify({
+        'breakers': breaker_states(),
+        'latency': latency_tracker.snapshot(),
+        'single_flight': {
+            'generation': generation_flight.stats(),
+            'analysis': analysis_flight.stats(),
+        },
+        'models': get_model_registry().snapshot(),
+        'response_cache': cache.stats() if cache else None,
+        'analysis_cache': analysis_cache.stats() if analysis_cache else None,
+        'warmer': get_warmer().snapshot() if get_warmer() else None,
+        'ollama_endpoints': pool_states(),
+        'hedging': hedge_stats(),
+        'rate_limits': limiter_stats(),
+    })
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5005)
\ No newline at end of file
@@ -4,6 +4,12 @@ import os
 import re
 from datetime import datetime
 from typing import List, Dict, Any, Optional
+from test_generator.http_transport import get_transport
+from test_generator.composite_client import call_policy, hedged_call
+from test_generator.rate_limiter import get_rate_limiter
+from test_generator.prompt_budget import estimate_tokens
+from test_generator.gemini_client import api_base
+from test_generator.ollama_pool import get_pool
 
 class ChatAssistant:
     def __init__(self):
@@ -14,7 +20,7 @@ class ChatAssistant:
         self.gemini_api_key = os.getenv('GEMINI_API_KEY')
         
         # For backwards compatibility, set these attributes
-        self.ollama_url = "http://localhost:11434"
+        self.ollama_url = os.getenv('OLLAMA_URLS', "http://localhost:11434")
         self.model = "starchat2:15b"
         
     def get_coverage_insights(self) -> List[Dict[str, Any]]:
@@ -38,7 +44,21 @@ class ChatAssistant:
         return insights
     
     def _call_ai(self, prompt: str, system_prompt: Optional[str] = None) -> str:
-        """Make a request to the configured AI service (Gemini or Ollama)"""
+        """Make a request to the configured AI service (Gemini or Ollama).
+
+        With LLM_FAILOVER_CHAT set (e.g. "gemini,ollama") the request is hedged
+        across the listed providers and the first good answer wins.
+        """
+        providers = {
+            'gemini': lambda: self._call_gemini(prompt, system_prompt),
+            'ollama': lambda: self._call_ollama_direct(prompt, system_prompt),
+        }
+        policy = call_policy('chat')
+        order = [p for p in policy['order'] if p in providers and (p != 'gemini' or self.gemini_api_key)]
+        if len(order) > 1:
+            return hedged_call([(name, providers[name]) for name in order], policy['deadline'], 'chat',
+                               accept=lambda response: bool(response) and not response.startswith('Error'))
+
         if self.use_gemini and self.gemini_api_key:
             return self._call_gemini(prompt, system_prompt)
         else:
@@ -53,7 +73,7 @@ class ChatAssistant:
             else:
                 full_prompt = prompt
             
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={self.gemini_api_key}"
+            url = f"{api_base()}/v1beta/models/gemini-1.5-flash:generateContent?key={self.gemini_api_key}"
             
             payload = {
                 "contents": [{
@@ -63,13 +83,20 @@ class ChatAssistant:
                 }]
             }
             
-            response = requests.post(
+            # Share the Gemini quota with test generation (GEMINI_RPM / GEMINI_TPM)
+            limiter = get_rate_limiter('gemini')
+            if limiter:
+                limiter.acquire(estimate_tokens(full_prompt))
+
+            response = get_transport().post(
                 url,
                 json=payload,
                 headers={'Content-Type': 'application/json'},
                 timeout=30
             )
             
+            if limiter and response.status_code == 429:
+                limiter.throttle()
             if response.status_code == 200:
                 data = response.json()
                 if 'candidates' in data and data['candidates']:
@@ -104,11 +131,12 @@ class ChatAssistant:
                 "stream": False
             }
             
-            response = requests.post(
-                f"{self.ollama_url}/api/chat",
-                json=payload,
-                timeout=30
-            )
+            with get_pool(self.ollama_url).lease(self.model) as url:
+                response = get_transport().post(
+                    f"{url}/api/chat",
+                    json=payload,
+                    timeout=30
+                )
             
             if response.status_code == 200:
                 return response.json()['message']['content']
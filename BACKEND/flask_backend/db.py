@@ -2,7 +2,7 @@ import sqlite3
 from datetime import datetime, timedelta
 import random
 import os
-import requests
+from test_generator.http_transport import get_transport
 
 def init_db():
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -169,7 +169,7 @@ def get_dashboard_stats(time_range='7d'):
             jacoco_url = f"{jenkins_url}/job/{job_name}/lastSuccessfulBuild/jacoco/api/json"
             print(f"🏗️ [JENKINS] JaCoCo URL: {jacoco_url}")
             
-            response = requests.get(jacoco_url, auth=auth, timeout=10)
+            response = get_transport().get(jacoco_url, auth=auth, timeout=10)
             print(f"🏗️ [JENKINS] Response status code: {response.status_code}")
             
             if response.status_code == 200:
@@ -1,12 +1,26 @@
 # backend/test_generator/ai_client_factory.py
 import os
 import logging
+import threading
 from .ollama_client import OllamaClient
 from .gemini_client import GeminiClient
+from .composite_client import CompositeClient, call_policy
 
 logger = logging.getLogger("test-generator")
 
+# Ollama model used when a request names a Gemini model but fails over to Ollama
+DEFAULT_OLLAMA_FALLBACK_MODEL = "starchat2:15b"
+
 class AIClientFactory:
+    # Long-lived clients keyed by (provider, model, endpoint). They are shared
+    # across request threads because they hold no per-request state: prompts,
+    # retries and stream state live on the call stack, while model availability,
+    # endpoint health, breakers and rate limits live in the process-wide
+    # registry, pool and limiter, which do their own locking. GeminiClient's
+    # _model_verified is only a hint; a racing write at worst repeats a check.
+    _clients = {}
+    _clients_lock = threading.Lock()
+
     @staticmethod
     def create_client(args=None, use_gemini=None):
         """
@@ -19,6 +33,82 @@ class AIClientFactory:
         Returns:
             Either OllamaClient or GeminiClient instance
         """
+        provider, model_name, endpoint = AIClientFactory._resolve(args, use_gemini)
+        return AIClientFactory._build(provider, model_name, endpoint)
+
+    @classmethod
+    def get_client(cls, args=None, use_gemini=None):
+        """Shared client for the resolved provider+model+endpoint, created on first use"""
+        return cls._shared(cls._resolve(args, use_gemini))
+
+    @classmethod
+    def get_client_for(cls, call_site, args=None, use_gemini=None):
+        """Client for a call site ('generation', 'analysis', 'fixer', ...).
+
+        When LLM_FAILOVER_<SITE> (or LLM_FAILOVER) lists more than one usable
+        provider this is a CompositeClient that hedges between them; otherwise
+        it is the same shared client as ``get_client``.
+        """
+        policy = call_policy(call_site)
+        clients = []
+        for provider in policy['order']:
+            if provider == 'gemini' and os.getenv('GEMINI_API_KEY'):
+                clients.append((provider, cls._shared(cls._resolve(args, use_gemini=True))))
+            elif provider == 'ollama' and args is not None and getattr(args, 'api_url', None):
+                clients.append((provider, cls._shared(('ollama', cls._ollama_model(args), args.api_url))))
+            else:
+                logger.warning(f"Ignoring unusable provider '{provider}' in the {call_site} failover order")
+
+        if len(clients) < 2:
+            return clients[0][1] if clients else cls.get_client(args, use_gemini)
+        return CompositeClient(clients, policy['deadline'], call_site)
+
+    @staticmethod
+    def _ollama_model(args):
+        """The requested model if Ollama can serve it, else OLLAMA_FALLBACK_MODEL"""
+        model = getattr(args, 'model', None)
+        if not model or model.lower().startswith('gemini'):
+            return os.getenv('OLLAMA_FALLBACK_MODEL', DEFAULT_OLLAMA_FALLBACK_MODEL)
+        return model
+
+    @classmethod
+    def _shared(cls, key):
+        with cls._clients_lock:
+            client = cls._clients.get(key)
+            if client is None:
+                client = cls._build(*key)
+                cls._clients[key] = client
+            return client
+
+    @classmethod
+    def prewarm(cls, models, api_url="http://localhost:11434"):
+        """Build and verify shared clients for ``models`` ahead of the first request"""
+        for model in models:
+            class Args:
+                pass
+            Args.model = model
+            Args.api_url = api_url
+            try:
+                client = cls.get_client(Args)
+                if client.ensure_model_available():
+                    logger.info(f"Pre-warmed client for {model}")
+                else:
+                    logger.warning(f"Pre-warm could not verify {model}")
+            except Exception as e:
+                logger.warning(f"Pre-warm failed for {model}: {e}")
+
+    @staticmethod
+    def create_async_client(args=None, use_gemini=None):
+        """asyncio client (AsyncOllamaClient/AsyncGeminiClient) for the same configuration"""
+        from .async_clients import AsyncOllamaClient, AsyncGeminiClient
+        provider, model_name, endpoint = AIClientFactory._resolve(args, use_gemini)
+        if provider == 'gemini':
+            return AsyncGeminiClient(model_name=model_name, api_key=os.getenv('GEMINI_API_KEY'))
+        return AsyncOllamaClient(model_name=model_name, api_url=endpoint)
+
+    @staticmethod
+    def _resolve(args=None, use_gemini=None):
+        """Return the (provider, model, endpoint) a configuration maps to"""
         # Check if we should use Gemini
         gemini_api_key = os.getenv('GEMINI_API_KEY')
         use_gemini_env = os.getenv('USE_GEMINI', 'false').lower() == 'true'
@@ -31,7 +121,6 @@ class AIClientFactory:
         )
         
         if should_use_gemini and gemini_api_key:
-            logger.info("Using Gemini API for test generation")
             # Map common model names to Gemini models
             model_name = "gemini-1.5-flash"  # Default Gemini model
             if args and hasattr(args, 'model'):
@@ -45,9 +134,16 @@ class AIClientFactory:
                 }
                 model_name = model_mapping.get(args.model, 'gemini-1.5-flash')
             
-            return GeminiClient(model_name=model_name, api_key=gemini_api_key)
+            return 'gemini', model_name, None
         else:
-            logger.info("Using Ollama for test generation")
             if not args:
                 raise ValueError("args is required for Ollama client")
-            return OllamaClient(model_name=args.model, api_url=args.api_url)
+            return 'ollama', AIClientFactory._ollama_model(args), args.api_url
+
+    @staticmethod
+    def _build(provider, model_name, endpoint):
+        if provider == 'gemini':
+            logger.info("Using Gemini API for test generation")
+            return GeminiClient(model_name=model_name, api_key=os.getenv('GEMINI_API_KEY'))
+        logger.info("Using Ollama for test generation")
+        return OllamaClient(model_name=model_name, api_url=endpoint)
@@ -1,11 +1,21 @@
 import os
-import re
+import copy
 import logging
 from typing import Dict, List, Set, Optional
 from .ai_client_factory import AIClientFactory
+from .project_index import ProjectIndex
+from .java_lexer import scan_java, primary_type, project_imports, class_references, primary_constructors, signature_source
+from .prompt_budget import PromptBudget, MIN_SECTION_TOKENS
+from .single_flight import analysis_flight, flight_key
+from .analysis_cache import get_analysis_cache, content_hash, candidates_hash
 
 logger = logging.getLogger("ai-context-analyzer")
 
+# Most candidate files read for one analysis (ranked, so the best come first)
+MAX_ANALYSIS_CANDIDATES = 20
+# Stop reading candidates after this many in a row did not fit the budget
+MAX_BUDGET_MISSES = 3
+
 class AIContextAnalyzer:
     """AI-powered context analyzer for intelligent dependency selection"""
     
@@ -13,44 +23,109 @@ class AIContextAnalyzer:
         self.project_root = project_root
         self.ai_client = ai_client
         self.java_files_cache = {}
+        self.index = ProjectIndex.for_root(project_root)
         
-    def analyze_dependencies_with_ai(self, target_file: str, available_files: List[str]) -> Dict[str, any]:
-        """Use AI to analyze and rank dependencies intelligently"""
-        
+    def analyze_dependencies_with_ai(self, target_file: str, available_files: List[str],
+                                     reuse_latest: bool = False) -> Dict[str, any]:
+        """Use AI to analyze and rank dependencies intelligently
+
+        Results are cached per (target source, candidate list, model) until any
+        file that went into them changes. With ``reuse_latest`` a valid analysis
+        of the same target by the same model is reused even if it was made for
+        a different candidate list (e.g. generation after /suggest-context), as
+        long as that list already contained every current candidate.
+        """
+        model_name = getattr(self.ai_client, 'model_name', '')
+        try:
+            with open(target_file, 'r', encoding='utf-8') as f:
+                target_source = f.read()
+        except Exception:
+            return self._analyze_dependencies(target_file, available_files)[0]
+
+        target_hash = content_hash(target_source)
+        candidates = candidates_hash(available_files)
+        cache = get_analysis_cache()
+        if cache:
+            cached = cache.get(target_hash, candidates, model_name)
+            if cached is None and reuse_latest:
+                cached = cache.latest(target_hash, model_name, available_files)
+            if cached is not None:
+                logger.info(f"Reusing cached dependency analysis for {os.path.basename(target_file)}")
+                return cached
+
+        # Concurrent requests for the same target and candidates share one AI call
+        key = flight_key(target_source, model_name, *available_files)
+        (analysis, file_hashes), shared = analysis_flight.do(
+            key, lambda: self._analyze_dependencies(target_file, available_files))
+        if shared:
+            return copy.deepcopy(analysis)
+
+        # Rule-based fallbacks are cheap and should not shadow a later AI answer
+        if cache and analysis.get('ai_analysis') is not None:
+            file_hashes[os.path.abspath(target_file)] = target_hash
+            cache.put(target_hash, candidates, model_name, file_hashes, analysis, available_files)
+        return analysis
+
+    def _analyze_dependencies(self, target_file: str, available_files: List[str]):
+        """Returns (analysis, {path: content hash} of the files it was based on)"""
+        file_hashes = {}
         try:
             # Read target file
             with open(target_file, 'r', encoding='utf-8') as f:
                 target_content = f.read()
             
-            # Get available file contents (limit to reasonable number)
+            # Fill the model's context budget with candidates in ranked order:
+            # full source while it fits, then signatures only
+            budget = PromptBudget.for_model(getattr(self.ai_client, 'model_name', ''))
+            budget.reserve(self._build_ai_analysis_prompt('', {}))
+            target_text = budget.take(target_content, signature_source(target_content), required=True)
+
             file_contents = {}
-            for file_path in available_files[:20]:  # Limit to prevent token overflow
+            prompt_files = {}
+            misses = 0
+            for file_path in available_files[:MAX_ANALYSIS_CANDIDATES]:
+                if budget.remaining < MIN_SECTION_TOKENS or misses >= MAX_BUDGET_MISSES:
+                    break
                 try:
                     with open(file_path, 'r', encoding='utf-8') as f:
                         content = f.read()
-                        if len(content) < 10000:  # Skip very large files
-                            file_name = os.path.splitext(os.path.basename(file_path))[0]
-                            file_contents[file_name] = content
                 except Exception:
                     continue
+                file_name = os.path.splitext(os.path.basename(file_path))[0]
+                if file_name in file_contents:
+                    continue
+                text = budget.take(self._file_section(file_name, content),
+                                   self._file_section(file_name, signature_source(content)))
+                if not text:
+                    misses += 1
+                    continue
+                misses = 0
+                file_contents[file_name] = content
+                prompt_files[file_name] = text
+                file_hashes[os.path.abspath(file_path)] = content_hash(content)
+            logger.info(f"Dependency analysis prompt: {len(prompt_files)} files, {budget.summary()}")
             
             # Create AI analysis prompt
-            analysis_prompt = self._build_ai_analysis_prompt(target_content, file_contents)
+            analysis_prompt = self._build_ai_analysis_prompt(target_text, prompt_files)
             
             # Get AI analysis
             if self.ai_client:
                 ai_response = self.ai_client.generate_tests(analysis_prompt)
-                return self._parse_ai_response(ai_response, file_contents)
+                return self._parse_ai_response(ai_response, file_contents), file_hashes
             else:
                 logger.warning("No AI client available, falling back to rule-based analysis")
-                return self._fallback_analysis(target_content, file_contents)
+                return self._fallback_analysis(target_content, file_contents), file_hashes
                 
         except Exception as e:
             logger.error(f"Error in AI dependency analysis: {e}")
-            return self._fallback_analysis(target_content, {})
+            return self._fallback_analysis(target_content, {}), file_hashes
     
+    @staticmethod
+    def _file_section(file_name: str, content: str) -> str:
+        return f"\n### {file_name}.java:\n```java\n{content}\n```\n"
+
     def _build_ai_analysis_prompt(self, target_content: str, available_files: Dict[str, str]) -> str:
-        """Build prompt for AI dependency analysis"""
+        """Build prompt for AI dependency analysis (``available_files`` maps names to rendered sections)"""
         
         target_class_name = self._extract_class_name(target_content)
         
@@ -67,8 +142,8 @@ Analyze the target class and available project files to determine the most impor
 ## Available Project Files:
 """
         
-        for file_name, content in available_files.items():
-            prompt += f"\n### {file_name}.java:\n```java\n{content[:2000]}{'...' if len(content) > 2000 else ''}\n```\n"
+        for section in available_files.values():
+            prompt += section
         
         prompt += f"""
 
@@ -134,9 +209,7 @@ Analyze now and provide only the JSON response:"""
     
     def _extract_class_name(self, content: str) -> str:
         """Extract the main class name from Java content"""
-        class_pattern = r'(?:public\s+)?class\s+(\w+)'
-        match = re.search(class_pattern, content)
-        return match.group(1) if match else "UnknownClass"
+        return primary_type(scan_java(content)) or "UnknownClass"
     
     def _parse_ai_response(self, ai_response: str, file_contents: Dict[str, str]) -> Dict[str, any]:
         """Parse AI response and extract dependency information"""
@@ -223,41 +296,10 @@ Analyze now and provide only the JSON response:"""
     
     def _extract_constructors(self, content: str) -> List[Dict[str, any]]:
         """Extract constructor information from Java class"""
-        constructors = []
-        
-        # Find class name
-        class_pattern = r'(?:public\s+)?class\s+(\w+)'
-        class_match = re.search(class_pattern, content)
-        if not class_match:
-            return constructors
-            
-        class_name = class_match.group(1)
-        
-        # Find constructors
-        constructor_pattern = rf'(?:public|protected|private)?\s*{class_name}\s*\(([^)]*)\)'
-        constructor_matches = re.finditer(constructor_pattern, content)
-        
-        for match in constructor_matches:
-            params_str = match.group(1).strip()
-            params = []
-            
-            if params_str:
-                param_parts = [p.strip() for p in params_str.split(',')]
-                for param in param_parts:
-                    param_match = re.match(r'([^<\s]+(?:<[^>]+>)?)\s+(\w+)', param.strip())
-                    if param_match:
-                        params.append({
-                            'type': param_match.group(1),
-                            'name': param_match.group(2)
-                        })
-            
-            constructors.append({
-                'signature': f"{class_name}({params_str})",
-                'parameters': params,
-                'parameter_count': len(params)
-            })
-        
-        return constructors
+        return [
+            {'signature': ctor['signature'], 'parameters': list(ctor['parameters']), 'parameter_count': len(ctor['parameters'])}
+            for ctor in primary_constructors(content)
+        ]
     
     def _fallback_analysis(self, target_content: str, file_contents: Dict[str, str]) -> Dict[str, any]:
         """Fallback rule-based analysis when AI is not available"""
@@ -304,40 +346,20 @@ Analyze now and provide only the JSON response:"""
     
     def _extract_imports(self, content: str) -> List[str]:
         """Extract import statements"""
-        import_pattern = r'import\s+(?:static\s+)?([a-zA-Z_][a-zA-Z0-9_.]*);'
-        imports = re.findall(import_pattern, content)
-        
-        project_imports = []
-        for imp in imports:
-            if not imp.startswith(('java.', 'javax.', 'org.springframework.', 'org.junit.', 'org.mockito.')):
-                class_name = imp.split('.')[-1]
-                if class_name and class_name != '*':
-                    project_imports.append(class_name)
-        
-        return project_imports
+        return project_imports(content)
     
     def _extract_class_references(self, content: str) -> List[str]:
         """Extract class references from method signatures, fields, etc."""
-        references = set()
-        
-        patterns = [
-            r'(?:private|protected|public)\s+([A-Z][a-zA-Z0-9_]*(?:<[^>]+>)?)\s+\w+',  # Fields
-            r'\(\s*([A-Z][a-zA-Z0-9_]*(?:<[^>]+>)?)\s+\w+',  # Method parameters
-            r'(?:public|protected|private)\s+([A-Z][a-zA-Z0-9_]*(?:<[^>]+>)?)\s+\w+\s*\(',  # Return types
-            r'new\s+([A-Z][a-zA-Z0-9_]*)\s*\('  # Constructor calls
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, content)
-            for match in matches:
-                clean_type = re.sub(r'<.*?>', '', match)
-                if clean_type and clean_type not in ['String', 'Integer', 'Boolean', 'Long', 'Double', 'List', 'Set', 'Map']:
-                    references.add(clean_type)
-        
-        return list(references)
+        return class_references(content)
 
-    def generate_enhanced_context_prompt(self, target_file: str, ai_analysis: Dict[str, any]) -> str:
-        """Generate enhanced context prompt using AI analysis"""
+    def generate_enhanced_context_prompt(self, target_file: str, ai_analysis: Dict[str, any],
+                                         budget: Optional[PromptBudget] = None) -> str:
+        """Generate enhanced context prompt using AI analysis.
+
+        With a ``budget``, high-priority sources fall back to signatures when
+        they do not fit, medium-priority ones are always signatures only, and
+        whatever still does not fit is left out.
+        """
         
         context_prompt = "## AI-ENHANCED PROJECT CONTEXT:\n\n"
         
@@ -347,36 +369,47 @@ Analyze now and provide only the JSON response:"""
             context_prompt += f"**Test Focus**: {test_strategy.get('primary_focus', 'Comprehensive testing')}\n"
             context_prompt += f"**Key Scenarios**: {', '.join(test_strategy.get('key_test_scenarios', []))}\n\n"
         
+        # Mocking strategy goes last in the prompt but is cheap and always kept
+        mock_strategy = ai_analysis.get('mock_strategy', {})
+        mocking_prompt = ""
+        if mock_strategy.get('classes_to_mock'):
+            mocking_prompt += f"\n### Recommended Mocking Strategy:\n"
+            mocking_prompt += f"**Classes to Mock**: {', '.join(mock_strategy['classes_to_mock'])}\n"
+            mocking_prompt += f"**Reasoning**: These are service/repository layers that should be mocked for unit testing\n"
+
         context_prompt += "### Essential Dependencies (High Priority):\n"
+        if budget:
+            budget.reserve(context_prompt + mocking_prompt + "\n### Useful Dependencies (Medium Priority):\n")
         recommended = ai_analysis.get('recommended_context', {})
         
         for class_name, info in recommended.items():
             if info.get('priority') == 'high':
-                context_prompt += f"\n#### {class_name} (Score: {info['score']}):\n"
-                context_prompt += f"**Reason**: {info['reason']}\n"
-                context_prompt += f"**Should Mock**: {info.get('should_mock', False)}\n"
+                section = f"\n#### {class_name} (Score: {info['score']}):\n"
+                section += f"**Reason**: {info['reason']}\n"
+                section += f"**Should Mock**: {info.get('should_mock', False)}\n"
                 
                 # Add constructor info
                 constructors = ai_analysis.get('constructor_info', {}).get(class_name, [])
                 if constructors:
-                    context_prompt += "**Available Constructors**:\n"
+                    section += "**Available Constructors**:\n"
                     for constructor in constructors:
-                        context_prompt += f"- {constructor['signature']}\n"
+                        section += f"- {constructor['signature']}\n"
                 
-                context_prompt += f"```java\n{info['content']}\n```\n"
+                code = f"```java\n{info['content']}\n```\n"
+                if budget:
+                    signatures = f"```java\n{signature_source(info['content'])}\n```\n"
+                    context_prompt += budget.take(section + code, section + signatures) or ""
+                else:
+                    context_prompt += section + code
         
         context_prompt += "\n### Useful Dependencies (Medium Priority):\n"
         for class_name, info in recommended.items():
             if info.get('priority') == 'medium':
-                context_prompt += f"\n#### {class_name} (Score: {info['score']}):\n"
-                context_prompt += f"**Reason**: {info['reason']}\n"
-                context_prompt += f"```java\n{info['content']}\n```\n"
-        
-        # Add mocking strategy
-        mock_strategy = ai_analysis.get('mock_strategy', {})
-        if mock_strategy.get('classes_to_mock'):
-            context_prompt += f"\n### Recommended Mocking Strategy:\n"
-            context_prompt += f"**Classes to Mock**: {', '.join(mock_strategy['classes_to_mock'])}\n"
-            context_prompt += f"**Reasoning**: These are service/repository layers that should be mocked for unit testing\n"
-        
-        return context_prompt
+                section = f"\n#### {class_name} (Score: {info['score']}):\n"
+                section += f"**Reason**: {info['reason']}\n"
+                if budget:
+                    context_prompt += budget.take(section + f"```java\n{signature_source(info['content'])}\n```\n") or ""
+                else:
+                    context_prompt += section + f"```java\n{info['content']}\n```\n"
+        
+        return context_prompt + mocking_prompt
@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("analysis-cache")
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'analysis_cache.db')
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+def candidates_hash(paths: List[str]) -> str:
+    """Identity of an ordered candidate list (order decides what fits the prompt budget)"""
+    return content_hash('\n'.join(os.path.abspath(p) for p in paths))
+
+
+def file_hash(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return content_hash(f.read())
+    except OSError:
+        return None
+
+
+def file_record(path: str, sha256: str) -> Optional[Dict]:
+    """Size/mtime/hash of ``path`` if its content still hashes to ``sha256``.
+
+    The stat is taken before re-reading, so an edit racing with this call
+    shows up as an mtime change on the next lookup.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if file_hash(path) != sha256:
+        return None
+    return {'sha256': sha256, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+class AnalysisCache:
+    """SQLite store of AI dependency analyses.
+
+    Entries are keyed by (target source hash, candidate set hash, model) and
+    remember the size, mtime and hash of every file whose source went into
+    the analysis, so an entry is only served while none of those files has
+    changed. Like ProjectIndex, a file is only re-hashed when its size or
+    mtime moved. The candidate paths are stored too, so ``latest`` never
+    serves an analysis that did not get to see a newly added candidate.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_TTL_SECONDS):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                target_hash TEXT,
+                candidates_hash TEXT,
+                model TEXT,
+                files TEXT,
+                analysis TEXT,
+                created_at REAL,
+                candidates TEXT,
+                PRIMARY KEY (target_hash, candidates_hash, model)
+            )
+        """)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(analyses)")]
+        if 'candidates' not in columns:  # Store created by an older version
+            self.conn.execute("ALTER TABLE analyses ADD COLUMN candidates TEXT")
+        self.conn.commit()
+
+    def get(self, target_hash: str, candidates: str, model: str) -> Optional[Dict]:
+        """Analysis for exactly this target, candidate list and model, if still valid"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT files, analysis FROM analyses WHERE target_hash = ? AND candidates_hash = ? AND model = ? AND created_at > ?",
+                (target_hash, candidates, model, time.time() - self.ttl)
+            ).fetchone()
+        return self._validated(row, target_hash, candidates, model)
+
+    def latest(self, target_hash: str, model: str, candidate_paths: List[str]) -> Optional[Dict]:
+        """Most recent valid analysis of this target source by this model whose
+        candidate list covered every path in ``candidate_paths`` (in any order)"""
+        wanted = {os.path.abspath(p) for p in candidate_paths}
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT files, analysis, candidates_hash, candidates FROM analyses "
+                "WHERE target_hash = ? AND model = ? AND created_at > ? ORDER BY created_at DESC",
+                (target_hash, model, time.time() - self.ttl)
+            ).fetchall()
+        for files, analysis, candidates, seen in rows:
+            # Entries without a recorded list, or made before a candidate was added, are stale here
+            if seen is None or not wanted.issubset(json.loads(seen)):
+                continue
+            result = self._validated((files, analysis), target_hash, candidates, model)
+            if result is not None:
+                return result
+        return None
+
+    def _validated(self, row, target_hash: str, candidates: str, model: str) -> Optional[Dict]:
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        files, analysis = row
+        records = json.loads(files)
+        changed = []
+        touched = False
+        for path, record in records.items():
+            if not isinstance(record, dict):  # Hash-only entry from an older version
+                changed.append(path)
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                changed.append(path)
+                continue
+            if stat.st_size == record['size'] and stat.st_mtime_ns == record['mtime_ns']:
+                continue
+            if file_hash(path) != record['sha256']:
+                changed.append(path)
+                continue
+            # Touched but not edited: remember the new mtime so it is not re-hashed again
+            record['size'], record['mtime_ns'] = stat.st_size, stat.st_mtime_ns
+            touched = True
+
+        with self._lock:
+            if changed:
+                logger.info(f"Dropping cached analysis: {len(changed)} file(s) changed, e.g. {changed[0]}")
+                self.conn.execute(
+                    "DELETE FROM analyses WHERE target_hash = ? AND candidates_hash = ? AND model = ?",
+                    (target_hash, candidates, model)
+                )
+                self.conn.commit()
+                self.invalidated += 1
+                self.misses += 1
+                return None
+            if touched:
+                self.conn.execute(
+                    "UPDATE analyses SET files = ? WHERE target_hash = ? AND candidates_hash = ? AND model = ?",
+                    (json.dumps(records), target_hash, candidates, model)
+                )
+                self.conn.commit()
+            self.hits += 1
+        return json.loads(analysis)
+
+    def put(self, target_hash: str, candidates: str, model: str, files: Dict[str, str], analysis: Dict,
+            candidate_paths: Optional[List[str]] = None):
+        """Store ``analysis``, made from ``files`` ({path: content hash}), unless one changed meanwhile.
+
+        ``candidate_paths`` is the list ``candidates`` was hashed from; without
+        it the entry is only served by ``get``.
+        """
+        records = {}
+        for path, sha256 in files.items():
+            record = file_record(path, sha256)
+            if record is None:
+                logger.info(f"Not caching analysis: {path} changed while it was analyzed")
+                return
+            records[path] = record
+
+        now = time.time()
+        with self._lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO analyses (target_hash, candidates_hash, model, files, analysis, created_at, candidates)
+                VALUES (?,?,?,?,?,?,?)
+            """, (target_hash, candidates, model, json.dumps(records), json.dumps(analysis), now,
+                  json.dumps([os.path.abspath(p) for p in candidate_paths]) if candidate_paths is not None else None))
+            self.conn.execute("DELETE FROM analyses WHERE created_at <= ?", (now - self.ttl,))
+            self.conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'invalidated': self.invalidated, 'entries': entries}
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> Optional[AnalysisCache]:
+    """Process-wide analysis cache, or None unless ANALYSIS_CACHE_ENABLED=true"""
+    global _default_cache
+    if os.getenv('ANALYSIS_CACHE_ENABLED', 'false').lower() != 'true':
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = AnalysisCache(
+                db_path=os.getenv('ANALYSIS_CACHE_PATH', DEFAULT_CACHE_PATH),
+                ttl=float(os.getenv('ANALYSIS_CACHE_TTL', DEFAULT_TTL_SECONDS)),
+            )
+        return _default_cache
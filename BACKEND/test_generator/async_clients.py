@@ -0,0 +1,424 @@
+# backend/test_generator/async_clients.py
+import os
+import json
+import time
+import asyncio
+import logging
+from .ollama_client import TIMEOUT as OLLAMA_TIMEOUT, MAX_RETRIES, TEMPERATURE
+from .gemini_client import TIMEOUT as GEMINI_TIMEOUT, api_base
+from .model_registry import get_model_registry
+from .response_cache import ResponseCache, get_response_cache
+from .prompt_budget import estimate_tokens
+from .rate_limiter import get_rate_limiter
+from .resilience import backoff_delay, get_breaker, latency_tracker
+from .ollama_warmer import keep_alive_policy, runner_options
+from .ollama_pool import get_pool, endpoint_breaker
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+logger = logging.getLogger("test-generator")
+
+
+async def _cached(provider, model, prompt, generate, use_cache):
+    """Async counterpart of response_cache.cached_generate; SQLite work runs off the event loop"""
+    cache = get_response_cache() if use_cache else None
+    if cache is None:
+        return await generate()
+
+    key = ResponseCache.make_key(provider, model, TEMPERATURE, prompt)
+    response = await asyncio.to_thread(cache.get, key)
+    if response is not None:
+        logger.info(f"Serving cached {provider} response for {model}")
+        return response
+
+    response = await generate()
+    if response:
+        await asyncio.to_thread(cache.put, key, provider, model, response)
+    return response
+
+
+class _AsyncHttpClient:
+    """Lazily opened aiohttp session bound to the event loop that first uses it"""
+
+    def __init__(self, timeout):
+        if aiohttp is None:
+            raise RuntimeError("aiohttp is required for the async LLM clients")
+        self._timeout = timeout
+        self._session = None
+
+    async def _http(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self._timeout),
+                connector=aiohttp.TCPConnector(limit=int(os.getenv('HTTP_POOL_MAXSIZE', '16'))),
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class AsyncOllamaClient(_AsyncHttpClient):
+    """asyncio version of OllamaClient: many generations share one event loop"""
+
+    def __init__(self, model_name, api_url="http://localhost:11434"):
+        if not model_name:
+            raise ValueError("model_name is required and cannot be empty")
+        super().__init__(OLLAMA_TIMEOUT)
+        self.model_name = model_name
+        self.api_url = api_url
+        self.pool = get_pool(api_url)
+
+    async def ensure_model_available(self):
+        """Ensure the model is usable on at least one endpoint (no automatic pull)."""
+        tried = set()
+        while True:
+            url = self.pool.pick(self.model_name, exclude=tried)
+            if url is None:
+                return False
+            if await self._ensure_on(url):
+                return True
+            tried.add(url)
+
+    async def _ensure_on(self, url):
+        """Ensure the model is listed on one endpoint and answers a short prompt there."""
+        registry = get_model_registry()
+        if registry.is_available('ollama', self.model_name, url):
+            return True
+
+        try:
+            http = await self._http()
+            async with http.get(f"{url}/api/tags") as response:
+                if response.status != 200:
+                    logger.error(f"Failed to list models on {url}: {response.status} {await response.text()}")
+                    self.pool.report_failure(url)
+                    return False
+                models = (await response.json(content_type=None)).get('models', [])
+            if self.model_name not in [m.get('name') for m in models]:
+                logger.error(f"Model {self.model_name} not found on {url}")
+                self.pool.model_missing(url, self.model_name)
+                return False
+
+            payload = {"model": self.model_name, "prompt": "Hello", "stream": False,
+                       "options": {"temperature": TEMPERATURE, **runner_options(self.model_name)}}
+            async with http.post(f"{url}/api/generate", json=payload,
+                                 timeout=aiohttp.ClientTimeout(total=30)) as response:
+                if response.status != 200 or 'response' not in await response.json(content_type=None):
+                    logger.error(f"Model {self.model_name} verification failed on {url}: {response.status}")
+                    self.pool.model_missing(url, self.model_name)
+                    return False
+
+            registry.mark_available('ollama', self.model_name, url)
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Ollama connection error at {url}: {e}")
+            self.pool.mark_down(url)
+            return False
+
+    async def _admit(self, url, unusable):
+        """Breaker of ``url`` if a call may go there now, else None (and ``url`` joins ``unusable``)"""
+        breaker = endpoint_breaker(url)
+        if not breaker.allow():
+            logger.warning(f"Ollama at {url} is unhealthy (circuit open); trying another endpoint")
+        elif await self._ensure_on(url):
+            return breaker
+        else:
+            breaker.release()
+        unusable.add(url)
+        return None
+
+    def _model_missing(self, url, unusable):
+        logger.error(f"Model {self.model_name} not found on {url}")
+        get_model_registry().invalidate('ollama', self.model_name, url)
+        self.pool.model_missing(url, self.model_name)
+        unusable.add(url)
+
+    async def generate_tests(self, prompt, retries=MAX_RETRIES, use_cache=True):
+        """Generate tests using the specified model (served from the response cache when enabled)."""
+        return await _cached('ollama', self.model_name, prompt, lambda: self._generate(prompt, retries), use_cache)
+
+    async def _generate(self, prompt, retries):
+        http = await self._http()
+        keep_alive_policy.touch(self.model_name)
+        latency_key = f"ollama|{self.model_name}"
+        unusable = set()  # Endpoints that cannot serve this call: circuit open, unreachable or model missing
+        payload = {"model": self.model_name, "prompt": prompt, "stream": False,
+                   "keep_alive": keep_alive_policy.keep_alive_for(self.model_name),
+                   "options": {"temperature": TEMPERATURE, **runner_options(self.model_name)}}
+        for attempt in range(retries):
+            timeout = latency_tracker.timeout_for(latency_key, OLLAMA_TIMEOUT)
+            # Skipping an endpoint that is down or lacks the model does not use up an attempt
+            while True:
+                with self.pool.lease(self.model_name, exclude=unusable) as url:
+                    if url is None:
+                        logger.error(f"Cannot generate tests: no Ollama endpoint can serve {self.model_name}")
+                        return None
+                    breaker = await self._admit(url, unusable)
+                    if breaker is None:
+                        continue
+                    started = time.time()
+                    try:
+                        with breaker.guard():
+                            logger.info(f"Sending prompt to {self.model_name} at {url} (attempt {attempt+1}/{retries}, timeout {timeout:.0f}s)")
+                            async with http.post(f"{url}/api/generate", json=payload,
+                                                 timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                                if response.status == 200:
+                                    response_data = await response.json(content_type=None)
+                                    breaker.record_success()
+                                    self.pool.report_success(url, self.model_name)
+                                    latency_tracker.record(latency_key, time.time() - started)
+                                    if 'response' in response_data:
+                                        return response_data['response'].strip()
+                                    logger.error(f"Invalid response format from model {self.model_name}")
+                                    return None
+                                text = await response.text()
+                                if response.status == 404 and "model" in text.lower():
+                                    self._model_missing(url, unusable)
+                                    continue
+                                breaker.record_failure()
+                                self.pool.report_failure(url)
+                                logger.warning(f"Generation attempt {attempt+1} failed: {response.status} {text}")
+                    except aiohttp.ClientConnectionError as e:
+                        logger.error(f"Ollama at {url} unreachable on attempt {attempt+1}: {e}")
+                        self.pool.mark_down(url)
+                        unusable.add(url)
+                        continue
+                    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                        self.pool.report_failure(url)
+                        logger.error(f"Request error on attempt {attempt+1}: {e}")
+                break  # The endpoint was reached and the generation failed
+            if attempt < retries - 1:
+                await asyncio.sleep(backoff_delay(attempt))
+
+        logger.error(f"All {retries} generation attempts failed for model {self.model_name}")
+        return None
+
+    async def stream_tests(self, prompt):
+        """Yield generated text chunks as Ollama produces them (NDJSON stream).
+
+        Until the first chunk arrives, an endpoint that is unreachable, lacks
+        the model or answers with an error is skipped for the next one.
+        """
+        http = await self._http()
+        keep_alive_policy.touch(self.model_name)
+        unusable = set()
+        last_error = None
+        payload = {"model": self.model_name, "prompt": prompt, "stream": True,
+                   "keep_alive": keep_alive_policy.keep_alive_for(self.model_name),
+                   "options": {"temperature": TEMPERATURE, **runner_options(self.model_name)}}
+        while True:
+            with self.pool.lease(self.model_name, exclude=unusable) as url:
+                if url is None:
+                    raise RuntimeError(last_error or f"No Ollama endpoint can serve {self.model_name}")
+                breaker = await self._admit(url, unusable)
+                if breaker is None:
+                    continue
+
+                started = time.time()
+                streamed = False
+                timeout = latency_tracker.timeout_for(f"ollama|{self.model_name}", OLLAMA_TIMEOUT)
+                try:
+                    with breaker.guard():
+                        async with http.post(f"{url}/api/generate", json=payload,
+                                             timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                            if response.status == 404:
+                                self._model_missing(url, unusable)
+                                continue
+                            if response.status != 200:
+                                last_error = f"Generation failed on {url}: {response.status} {await response.text()}"
+                                logger.warning(last_error)
+                                breaker.record_failure()
+                                self.pool.report_failure(url)
+                                unusable.add(url)
+                                continue
+                            async for line in response.content:
+                                if not line.strip():
+                                    continue
+                                chunk = json.loads(line)
+                                if chunk.get('error'):
+                                    raise RuntimeError(f"Generation failed: {chunk['error']}")
+                                if chunk.get('response'):
+                                    streamed = True
+                                    yield chunk['response']
+                                if chunk.get('done'):
+                                    break
+                        breaker.record_success()
+                        self.pool.report_success(url, self.model_name)
+                        latency_tracker.record(f"ollama|{self.model_name}", time.time() - started)
+                except aiohttp.ClientConnectionError as e:
+                    if streamed:
+                        raise
+                    last_error = f"Ollama at {url} unreachable: {e}"
+                    logger.error(last_error)
+                    self.pool.mark_down(url)
+                    unusable.add(url)
+                    continue
+                return
+
+
+class AsyncGeminiClient(_AsyncHttpClient):
+    """asyncio version of GeminiClient, always over the REST API"""
+
+    def __init__(self, model_name="gemini-1.5-flash", api_key=None):
+        super().__init__(GEMINI_TIMEOUT)
+        self.model_name = model_name
+        self.api_key = api_key or os.getenv('GEMINI_API_KEY')
+        if not self.api_key:
+            raise ValueError("GEMINI_API_KEY environment variable is required")
+        self.api_url = f"{api_base()}/v1beta/models"
+        self._model_verified = False
+
+    def _request(self, prompt, max_tokens=8192):
+        return {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {"temperature": TEMPERATURE, "maxOutputTokens": max_tokens, "topP": 0.95},
+        }
+
+    @property
+    def _headers(self):
+        return {'Content-Type': 'application/json', 'x-goog-api-key': self.api_key}
+
+    @staticmethod
+    async def _wait_for_quota(prompt):
+        """Queue under the shared Gemini quota without blocking the event loop"""
+        limiter = get_rate_limiter('gemini')
+        if limiter:
+            await asyncio.to_thread(limiter.acquire, estimate_tokens(prompt))
+
+    @staticmethod
+    def _throttle():
+        limiter = get_rate_limiter('gemini')
+        if limiter:
+            limiter.throttle()
+
+    @staticmethod
+    def _charge_output(response):
+        limiter = get_rate_limiter('gemini')
+        if limiter and response:
+            limiter.charge(estimate_tokens(response))
+
+    def _model_missing(self):
+        self._model_verified = False
+        get_model_registry().invalidate('gemini', self.model_name, self.api_url)
+
+    async def ensure_model_available(self):
+        """Ensure the Gemini API is accessible and the model answers."""
+        registry = get_model_registry()
+        if registry.is_available('gemini', self.model_name, self.api_url):
+            self._model_verified = True
+            return True
+
+        try:
+            http = await self._http()
+            await self._wait_for_quota("Hello, respond with just 'Hi'")
+            async with http.post(f"{self.api_url}/{self.model_name}:generateContent", headers=self._headers,
+                                 json=self._request("Hello, respond with just 'Hi'", max_tokens=10),
+                                 timeout=aiohttp.ClientTimeout(total=30)) as response:
+                if response.status != 200 or not (await response.json(content_type=None)).get('candidates'):
+                    logger.error(f"Gemini model {self.model_name} verification failed: {response.status}")
+                    return False
+            self._model_verified = True
+            registry.mark_available('gemini', self.model_name, self.api_url)
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Gemini API connection error: {e}")
+            return False
+
+    async def generate_tests(self, prompt, retries=MAX_RETRIES, use_cache=True):
+        """Generate tests using the Gemini model (served from the response cache when enabled)."""
+        return await _cached('gemini', self.model_name, prompt, lambda: self._generate(prompt, retries), use_cache)
+
+    async def _generate(self, prompt, retries):
+        if not self._model_verified and not await self.ensure_model_available():
+            logger.error(f"Cannot generate tests: Gemini model {self.model_name} is not available")
+            return None
+
+        http = await self._http()
+        breaker = get_breaker(f"gemini|{self.api_url}")
+        latency_key = f"gemini|{self.model_name}"
+        for attempt in range(retries):
+            if not breaker.allow():
+                logger.error("Gemini API is unhealthy (circuit open); failing fast")
+                return None
+            timeout = latency_tracker.timeout_for(latency_key, GEMINI_TIMEOUT)
+            try:
+                await self._wait_for_quota(prompt)
+                started = time.time()
+                with breaker.guard():
+                    logger.info(f"Sending prompt to Gemini {self.model_name} (attempt {attempt+1}/{retries}, timeout {timeout:.0f}s)")
+                    async with http.post(f"{self.api_url}/{self.model_name}:generateContent",
+                                         headers=self._headers, json=self._request(prompt),
+                                         timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                        if response.status == 200:
+                            result = self._text(await response.json(content_type=None)).strip() or None
+                            if result is None:
+                                return None
+                            breaker.record_success()
+                            latency_tracker.record(latency_key, time.time() - started)
+                            self._charge_output(result)
+                            return result
+                        text = await response.text()
+                        if response.status in (400, 403, 404):
+                            # The request itself was rejected; no verdict on the API's health
+                            logger.error(f"Gemini API rejected the request: {response.status} {text}")
+                            if response.status == 404:
+                                self._model_missing()
+                            return None
+                        if response.status == 429:
+                            self._throttle()
+                        breaker.record_failure()
+                        logger.warning(f"Generation failed: {response.status} {text}")
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.error(f"Request error on attempt {attempt+1}: {e}")
+            if attempt < retries - 1:
+                await asyncio.sleep(backoff_delay(attempt))
+
+        logger.error(f"All {retries} generation attempts failed for Gemini model {self.model_name}")
+        return None
+
+    async def stream_tests(self, prompt):
+        """Yield generated text chunks from streamGenerateContent (server-sent events)."""
+        if not self._model_verified and not await self.ensure_model_available():
+            raise RuntimeError(f"Gemini model {self.model_name} is not available")
+
+        breaker = get_breaker(f"gemini|{self.api_url}")
+        if not breaker.allow():
+            raise RuntimeError("Gemini API is unhealthy (circuit open)")
+
+        http = await self._http()
+        await self._wait_for_quota(prompt)
+        started = time.time()
+        with breaker.guard():
+            async with http.post(f"{self.api_url}/{self.model_name}:streamGenerateContent?alt=sse",
+                                 headers=self._headers, json=self._request(prompt)) as response:
+                if response.status != 200:
+                    if response.status == 404:
+                        self._model_missing()
+                    elif response.status == 429:
+                        self._throttle()
+                    raise RuntimeError(f"Generation failed: {response.status} {await response.text()}")
+                async for raw_line in response.content:
+                    line = raw_line.decode('utf-8').strip()
+                    if line.startswith('data:'):
+                        text = self._text(json.loads(line[len('data:'):]))
+                        if text:
+                            yield text
+            breaker.record_success()
+            latency_tracker.record(f"gemini|{self.model_name}", time.time() - started)
+
+    @staticmethod
+    def _text(response_data):
+        candidates = response_data.get('candidates') or [{}]
+        parts = candidates[0].get('content', {}).get('parts', [])
+        return ''.join(part.get('text', '') for part in parts)
@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from .parser import JavaClassParser, PARSER_VERSION
+from .parse_cache import ParseCache, get_parse_cache
+from .project_index import ProjectIndex
+
+logger = logging.getLogger("bulk-parser")
+
+METADATA_SUFFIX = ".metadata.db"
+COMMIT_EVERY = 200
+
+
+class ProjectMetadataStore:
+    """Per-project SQLite store of parsed class info, kept next to the extracted tree"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.db_path = os.path.normpath(root) + METADATA_SUFFIX
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS classes (
+                path TEXT PRIMARY KEY,
+                sha256 TEXT,
+                class_name TEXT,
+                package TEXT,
+                class_info TEXT,
+                error TEXT,
+                parsed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self.conn.commit()
+
+    def record(self, rel_path: str, sha256: str, class_info: Optional[Dict], error: Optional[str]):
+        self.conn.execute("""
+            INSERT OR REPLACE INTO classes (path, sha256, class_name, package, class_info, error)
+            VALUES (?,?,?,?,?,?)
+        """, (
+            rel_path,
+            sha256,
+            class_info.get('class_name') if class_info else None,
+            class_info.get('package') if class_info else None,
+            json.dumps(class_info) if class_info else None,
+            error,
+        ))
+
+    def remove(self, rel_path: str):
+        self.conn.execute("DELETE FROM classes WHERE path = ?", (rel_path,))
+
+    def commit(self):
+        self.conn.commit()
+
+    def get(self, rel_path: str) -> Optional[Dict]:
+        row = self.conn.execute(
+            "SELECT class_info FROM classes WHERE path = ? AND class_info IS NOT NULL", (rel_path,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def errors(self) -> List[Tuple[str, str]]:
+        return self.conn.execute(
+            "SELECT path, error FROM classes WHERE error IS NOT NULL ORDER BY path"
+        ).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+def _parse_file(item: Tuple[str, str]) -> Tuple[str, Optional[str], Optional[str], Optional[Dict], Optional[str]]:
+    """Process pool worker: parse one file and report (rel_path, sha256, cache_key, class_info, error)"""
+    full_path, rel_path = item
+    try:
+        with open(full_path, 'r', encoding='utf-8') as f:
+            source_code = f.read()
+    except Exception as e:
+        return rel_path, None, None, None, f"{type(e).__name__}: {e}"
+
+    sha256 = hashlib.sha256(source_code.encode('utf-8')).hexdigest()
+    # Workers only keep an in-memory cache; the parent owns the shared store
+    parser = JavaClassParser(file_path=full_path, source_code=source_code,
+                             cache=ParseCache(cache_dir=None, max_memory_entries=1))
+    cache_key = ParseCache.make_key(source_code, PARSER_VERSION)
+    if not parser.parse():
+        return rel_path, sha256, cache_key, None, parser.error or "Unknown parse error"
+
+    class_info = parser.get_class_info()
+    class_info.pop('file_path')
+    return rel_path, sha256, cache_key, class_info, None
+
+
+def parse_project(root: str, workers: Optional[int] = None, files: Optional[List[str]] = None) -> Dict[str, any]:
+    """Parse every Java file under ``root`` across a process pool.
+
+    Results stream into the project's ProjectMetadataStore as workers finish
+    and are also written to the shared parse cache, so later requests for
+    the same sources skip javalang entirely. A file that fails to parse is
+    recorded with its error and does not abort the run.
+    """
+    started = time.time()
+    if files is None:
+        files = ProjectIndex.for_root(root).java_files()
+    items = [(path, os.path.relpath(path, root)) for path in files]
+    workers = workers or os.cpu_count() or 1
+
+    store = ProjectMetadataStore(root)
+    cache = get_parse_cache()
+    parsed = 0
+    failed = 0
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunksize = max(1, len(items) // (workers * 4))
+            results = executor.map(_parse_file, items, chunksize=chunksize)
+            for rel_path, sha256, cache_key, class_info, error in results:
+                store.record(rel_path, sha256, class_info, error)
+                if class_info:
+                    parsed += 1
+                    cache.put(cache_key, class_info)
+                else:
+                    failed += 1
+                    logger.warning(f"Failed to parse {rel_path}: {error}")
+                if (parsed + failed) % COMMIT_EVERY == 0:
+                    store.commit()
+        store.commit()
+    finally:
+        store.close()
+
+    elapsed = time.time() - started
+    logger.info(f"Bulk parsed {parsed} files ({failed} failed) in {elapsed:.2f}s using {workers} workers")
+    return {'parsed': parsed, 'failed': failed, 'workers': workers, 'seconds': round(elapsed, 3)}
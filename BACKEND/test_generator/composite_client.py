@@ -0,0 +1,250 @@
+import os
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+from .resilience import cancel_scope
+
+logger = logging.getLogger("composite-client")
+
+# Seconds to wait for the current provider before hedging to the next one
+DEFAULT_DEADLINES = {
+    'generation': 120,
+    'analysis': 45,
+    'chat': 20,
+    'fixer': 90,
+}
+
+# Every attempt runs on its own thread, so a primary never queues behind
+# abandoned attempts. Backups started next to a still-running call (hedges)
+# are capped process-wide; when none is free the call just keeps waiting.
+_hedge_slots = threading.BoundedSemaphore(int(os.getenv('LLM_HEDGE_WORKERS', '8')))
+_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+
+def call_policy(call_site: str) -> Dict[str, Any]:
+    """Provider order and hedge deadline for a call site.
+
+    LLM_FAILOVER_<SITE> (e.g. "gemini,ollama") and LLM_DEADLINE_<SITE> override
+    the global LLM_FAILOVER / LLM_DEADLINE. An empty order means "use the
+    configured provider only".
+    """
+    site = call_site.upper()
+    order = os.getenv(f'LLM_FAILOVER_{site}', os.getenv('LLM_FAILOVER', ''))
+    deadline = os.getenv(f'LLM_DEADLINE_{site}', os.getenv('LLM_DEADLINE', DEFAULT_DEADLINES.get(call_site, 60)))
+    return {
+        'order': [p.strip().lower() for p in order.split(',') if p.strip()],
+        'deadline': float(deadline),
+    }
+
+
+def _count(call_site: str, event: str):
+    with _stats_lock:
+        counters = _stats.setdefault(call_site, {})
+        counters[event] = counters.get(event, 0) + 1
+
+
+def hedge_stats() -> Dict[str, Dict[str, int]]:
+    with _stats_lock:
+        return {site: dict(counters) for site, counters in _stats.items()}
+
+
+def hedged_call(calls: List[Tuple[str, Callable[[], Any]]], deadline: float, call_site: str = "llm",
+                accept: Callable[[Any], bool] = bool) -> Any:
+    """Run ``calls`` (name, fn) in order, hedging on slowness and failing over on errors.
+
+    The first call starts immediately. The next one starts when the running
+    ones have produced nothing acceptable within ``deadline`` seconds of
+    starting, or as soon as one fails. The first acceptable result wins; the
+    others are cancelled (they finish their current request but do not retry)
+    and ignored. If nothing is acceptable the last result is returned (None
+    if every call raised).
+    """
+    results = queue.Queue()
+    cancel = threading.Event()
+    next_call = 0
+    running = 0
+    last_result = None
+
+    def run(index, fn, started, hedge):
+        try:
+            with cancel_scope(cancel):
+                started.set()
+                results.put((index, fn(), None))
+        except Exception as e:
+            results.put((index, None, e))
+        finally:
+            if hedge:
+                _hedge_slots.release()
+
+    def launch():
+        """Start the next call; False when it would be a hedge and none is free"""
+        nonlocal next_call, running
+        hedge = running > 0
+        if hedge and not _hedge_slots.acquire(blocking=False):
+            _count(call_site, "hedge_skipped")
+            return False
+        name, fn = calls[next_call]
+        if next_call > 0:
+            logger.info(f"{call_site}: starting {name} as backup")
+            _count(call_site, f"backup_{name}")
+        started = threading.Event()
+        threading.Thread(target=run, args=(next_call, fn, started, hedge),
+                         name=f"llm-{call_site}-{name}", daemon=True).start()
+        started.wait()  # The hedge deadline counts from here, not from submission
+        next_call += 1
+        running += 1
+        return True
+
+    launch()
+    try:
+        while running:
+            timeout = deadline if next_call < len(calls) else None
+            try:
+                index, result, error = results.get(timeout=timeout)
+            except queue.Empty:
+                launch()  # Nothing within the deadline: hedge
+                continue
+
+            running -= 1
+            name = calls[index][0]
+            if error is not None:
+                logger.warning(f"{call_site}: {name} failed: {error}")
+            elif accept(result):
+                _count(call_site, f"won_{name}")
+                return result
+            else:
+                logger.warning(f"{call_site}: {name} returned no usable response")
+                last_result = result
+
+            # An attempt failed: fail over to the next provider at once
+            if next_call < len(calls):
+                launch()
+    finally:
+        cancel.set()
+
+    _count(call_site, "all_failed")
+    return last_result
+
+
+class CompositeClient:
+    """Client that spreads one logical call over several providers.
+
+    Behaves like OllamaClient/GeminiClient. Each call goes to the first client
+    and is hedged to the next one if it does not answer (or, when streaming,
+    produce its first token) within ``deadline`` seconds, or fails over at once
+    if it errors.
+    """
+
+    def __init__(self, clients: List[Tuple[str, Any]], deadline: float, call_site: str):
+        self.clients = clients
+        self.deadline = deadline
+        self.call_site = call_site
+        primary = clients[0][1]
+        self.model_name = primary.model_name
+
+    def ensure_model_available(self):
+        """Available as soon as one provider is, checked in order.
+
+        Providers after the first available one are not checked here: each
+        attempt verifies its own client when it starts, so an unreachable
+        backup only costs time if it is actually needed.
+        """
+        for name, client in self.clients:
+            if client.ensure_model_available():
+                return True
+            logger.warning(f"{self.call_site}: {name} is not available")
+        return False
+
+    @staticmethod
+    def _verified(name, client):
+        """Raise (so the call fails over) unless ``client`` can serve requests"""
+        if not client.ensure_model_available():
+            raise RuntimeError(f"{name} is not available")
+        return client
+
+    def generate_tests(self, prompt, retries=3, use_cache=True):
+        return hedged_call(
+            [(name, lambda n=name, c=client: self._verified(n, c).generate_tests(prompt, retries=retries,
+                                                                                  use_cache=use_cache))
+             for name, client in self.clients],
+            self.deadline, self.call_site
+        )
+
+    def stream_tests(self, prompt):
+        """Yield chunks from whichever provider produces a first token first."""
+        events = queue.Queue()
+        closed = threading.Event()
+        next_client = 0
+        running = 0
+        chosen = None
+
+        def pump(index, name, client, hedge):
+            try:
+                for chunk in self._verified(name, client).stream_tests(prompt):
+                    if closed.is_set() or chosen not in (None, index):
+                        return  # Closing the generator also closes its HTTP response
+                    events.put((index, 'token', chunk))
+                events.put((index, 'end', None))
+            except Exception as e:
+                events.put((index, 'error', e))
+            finally:
+                if hedge:
+                    _hedge_slots.release()
+
+        def launch():
+            """Start the next stream; False when it would be a hedge and none is free"""
+            nonlocal next_client, running
+            hedge = running > 0
+            if hedge and not _hedge_slots.acquire(blocking=False):
+                _count(self.call_site, "hedge_skipped")
+                return False
+            name, client = self.clients[next_client]
+            if next_client > 0:
+                logger.info(f"{self.call_site}: starting {name} stream as backup")
+                _count(self.call_site, f"backup_{name}")
+            threading.Thread(target=pump, args=(next_client, name, client, hedge),
+                             name=f"llm-{self.call_site}-{name}-stream", daemon=True).start()
+            next_client += 1
+            running += 1
+            return True
+
+        launch()
+        last_error = None
+        try:
+            while True:
+                timeout = self.deadline if chosen is None and next_client < len(self.clients) else None
+                try:
+                    index, kind, value = events.get(timeout=timeout)
+                except queue.Empty:
+                    launch()  # No first token in time: hedge
+                    continue
+
+                if chosen is None:
+                    if kind == 'token':
+                        chosen = index
+                        _count(self.call_site, f"won_{self.clients[index][0]}")
+                    else:
+                        running -= 1
+                        last_error = value
+                        if next_client < len(self.clients):
+                            launch()  # Failed before its first token: fail over
+                        elif running == 0:
+                            break
+                        continue
+
+                if index != chosen:
+                    continue
+                if kind == 'token':
+                    yield value
+                elif kind == 'end':
+                    return
+                else:
+                    raise value
+        finally:
+            closed.set()
+
+        _count(self.call_site, "all_failed")
+        if last_error:
+            raise last_error
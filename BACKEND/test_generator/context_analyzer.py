@@ -1,8 +1,10 @@
 import os
-import re
 import logging
 from pathlib import Path
 from typing import Dict, List, Set, Optional
+from .project_index import ProjectIndex
+from .dependency_graph import DependencyGraph
+from .java_lexer import scan_java, project_imports, class_references, primary_constructors
 
 logger = logging.getLogger("context-analyzer")
 
@@ -13,6 +15,7 @@ class ContextAnalyzer:
         self.project_root = project_root
         self.java_files_cache = {}
         self.class_dependencies = {}
+        self.index = ProjectIndex.for_root(project_root)
         
     def analyze_file_dependencies(self, target_file: str) -> Dict[str, str]:
         """Analyze a Java file and find all its dependencies with their full source code"""
@@ -22,16 +25,24 @@ class ContextAnalyzer:
             with open(target_file, 'r', encoding='utf-8') as f:
                 content = f.read()
             
-            # Extract import statements
-            imports = self._extract_imports(content)
-            
-            # Extract class references in the code
-            class_references = self._extract_class_references(content)
+            # Indexed files resolve through the precomputed dependency graph
+            if self.index.entry_for(target_file):
+                graph = DependencyGraph.for_index(self.index)
+                source_paths = graph.dependencies(target_file)
+            else:
+                # Resolve imports and class references from the target's own package and imports
+                facts = scan_java(content)
+                imports = [imp for imp in facts['imports'] if not imp.endswith('*')]
+                class_references = self._extract_class_references(content)
+                source_paths = [
+                    self._find_class_source(name, facts['package'], facts['imports'])
+                    for name in imports + class_references
+                ]
             
             # Find source files for dependencies
-            for class_name in imports + class_references:
-                source_path = self._find_class_source(class_name)
+            for source_path in source_paths:
                 if source_path and os.path.exists(source_path):
+                    class_name = os.path.splitext(os.path.basename(source_path))[0]
                     with open(source_path, 'r', encoding='utf-8') as f:
                         dependencies[class_name] = f.read()
                         
@@ -44,117 +55,30 @@ class ContextAnalyzer:
     
     def _extract_imports(self, content: str) -> List[str]:
         """Extract all import statements from Java code"""
-        import_pattern = r'import\s+(?:static\s+)?([a-zA-Z_][a-zA-Z0-9_.]*(?:\*)?);'
-        imports = re.findall(import_pattern, content)
-        
-        # Filter out standard Java/Spring imports and focus on project classes
-        project_imports = []
-        for imp in imports:
-            if not imp.startswith(('java.', 'javax.', 'org.springframework.', 'org.junit.', 'org.mockito.')):
-                # Extract simple class name
-                class_name = imp.split('.')[-1] if not imp.endswith('*') else None
-                if class_name and class_name != '*':
-                    project_imports.append(class_name)
-        
-        return project_imports
+        return project_imports(content)
     
     def _extract_class_references(self, content: str) -> List[str]:
         """Extract class references from method signatures, field declarations, etc."""
-        references = set()
-        
-        # Field declarations: private SomeClass field;
-        field_pattern = r'(?:private|protected|public)\s+([A-Z][a-zA-Z0-9_]*(?:<[^>]+>)?)\s+\w+'
-        field_matches = re.findall(field_pattern, content)
-        
-        # Method parameters: method(SomeClass param)
-        param_pattern = r'\(\s*([A-Z][a-zA-Z0-9_]*(?:<[^>]+>)?)\s+\w+'
-        param_matches = re.findall(param_pattern, content)
-        
-        # Return types: public SomeClass method()
-        return_pattern = r'(?:public|protected|private)\s+([A-Z][a-zA-Z0-9_]*(?:<[^>]+>)?)\s+\w+\s*\('
-        return_matches = re.findall(return_pattern, content)
-        
-        # Constructor calls: new SomeClass(
-        constructor_pattern = r'new\s+([A-Z][a-zA-Z0-9_]*)\s*\('
-        constructor_matches = re.findall(constructor_pattern, content)
-        
-        for matches in [field_matches, param_matches, return_matches, constructor_matches]:
-            for match in matches:
-                # Clean generic types
-                clean_type = re.sub(r'<.*?>', '', match)
-                if clean_type and not clean_type in ['String', 'Integer', 'Boolean', 'Long', 'Double', 'List', 'Set', 'Map']:
-                    references.add(clean_type)
-        
-        return list(references)
+        return class_references(content)
     
-    def _find_class_source(self, class_name: str) -> Optional[str]:
-        """Find the source file for a given class name"""
+    def _find_class_source(self, class_name: str, package: str = "", imports: List[str] = ()) -> Optional[str]:
+        """Find the source file for a class name as seen from the given package and imports"""
         if not class_name:
             return None
             
-        # Search in project directories
-        for root, dirs, files in os.walk(self.project_root):
-            for file in files:
-                if file == f"{class_name}.java":
-                    return os.path.join(root, file)
-        
-        return None
+        rel_path = self.index.resolve(class_name, package, imports)
+        return self.index.abs_path(rel_path) if rel_path else None
     
     def extract_constructor_signatures(self, java_content: str) -> List[Dict[str, any]]:
         """Extract constructor signatures from Java class"""
-        constructors = []
-        
-        # Find class name first
-        class_pattern = r'(?:public\s+)?class\s+(\w+)'
-        class_match = re.search(class_pattern, java_content)
-        if not class_match:
-            return constructors
-            
-        class_name = class_match.group(1)
-        
-        # Find constructors
-        constructor_pattern = rf'(?:public|protected|private)?\s*{class_name}\s*\(([^)]*)\)'
-        constructor_matches = re.finditer(constructor_pattern, java_content)
-        
-        for match in constructor_matches:
-            params_str = match.group(1).strip()
-            params = []
-            
-            if params_str:
-                # Parse parameters
-                param_parts = [p.strip() for p in params_str.split(',')]
-                for param in param_parts:
-                    param_match = re.match(r'([^<\s]+(?:<[^>]+>)?)\s+(\w+)', param.strip())
-                    if param_match:
-                        param_type = param_match.group(1)
-                        param_name = param_match.group(2)
-                        params.append({'type': param_type, 'name': param_name})
-            
-            constructors.append({
-                'class_name': class_name,
-                'parameters': params,
-                'signature': f"{class_name}({params_str})"
-            })
-        
-        return constructors
+        return [
+            {'class_name': ctor['class_name'], 'parameters': list(ctor['parameters']), 'signature': ctor['signature']}
+            for ctor in primary_constructors(java_content)
+        ]
     
     def extract_field_info(self, java_content: str) -> List[Dict[str, str]]:
         """Extract field information from Java class"""
-        fields = []
-        
-        # Match field declarations
-        field_pattern = r'(?:private|protected|public)\s+([^<\s]+(?:<[^>]+>)?)\s+(\w+)\s*(?:=|;)'
-        field_matches = re.finditer(field_pattern, java_content)
-        
-        for match in field_matches:
-            field_type = match.group(1)
-            field_name = match.group(2)
-            fields.append({
-                'type': field_type,
-                'name': field_name
-            })
-        
-        return fields
+        return [{'type': field['type'], 'name': field['name']} for field in scan_java(java_content)['fields']]
     
     def analyze_test_requirements(self, target_class_content: str, dependencies: Dict[str, str]) -> Dict[str, any]:
         """Analyze what's needed for comprehensive test generation"""
@@ -0,0 +1,163 @@
+import os
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Set
+from .parser import JavaClassParser
+from .project_index import ProjectIndex
+
+logger = logging.getLogger("dependency-graph")
+
+
+class DependencyGraph:
+    """Directed type dependency graph over the files of a ProjectIndex.
+
+    An edge A -> B means the class in file A uses the class in file B through
+    an import, a field, constructor/method parameter or return type, a
+    supertype or a ``new`` expression. Forward edges are computed from the
+    parsed AST on first use and memoized; reverse edges and topological order
+    are derived from the complete forward graph in O(edges).
+    """
+
+    _graphs: Dict[str, "DependencyGraph"] = {}
+    _graphs_lock = threading.Lock()
+
+    def __init__(self, index: ProjectIndex):
+        self.index = index
+        self._edges: Dict[str, Set[str]] = {}
+        self._reverse: Optional[Dict[str, Set[str]]] = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def for_index(cls, index: ProjectIndex) -> "DependencyGraph":
+        """Process-wide graph for an index, created on first use"""
+        with cls._graphs_lock:
+            graph = cls._graphs.get(index.root)
+            if graph is None or graph.index is not index:
+                graph = cls(index)
+                cls._graphs[index.root] = graph
+            return graph
+
+    @classmethod
+    def for_root(cls, root: str) -> "DependencyGraph":
+        return cls.for_index(ProjectIndex.for_root(root))
+
+    @classmethod
+    def files_updated(cls, index: ProjectIndex, delta: Dict[str, List[str]]):
+        """Drop edges made stale by an index delta, if a graph exists for the index"""
+        with cls._graphs_lock:
+            graph = cls._graphs.get(index.root)
+        if graph is not None and graph.index is index:
+            graph.invalidate(delta)
+
+    def invalidate(self, delta: Dict[str, List[str]]):
+        with self._lock:
+            if delta.get('added') or delta.get('removed'):
+                # Adding or removing a class can change how other files' names resolve
+                self._edges.clear()
+            else:
+                for rel_path in delta.get('updated', []):
+                    self._edges.pop(rel_path, None)
+            self._reverse = None
+
+    # ----- Queries ----- #
+
+    def dependencies(self, file_path: str, depth: int = 1) -> List[str]:
+        """Files reachable from ``file_path`` within ``depth`` hops, nearest first"""
+        start = self._node_for(file_path)
+        if start is None:
+            return []
+        return [self.index.abs_path(node) for node in self._bfs(start, depth, self._edges_for)]
+
+    def dependents(self, file_path: str, depth: int = 1) -> List[str]:
+        """Files that reach ``file_path`` within ``depth`` hops, nearest first"""
+        start = self._node_for(file_path)
+        if start is None:
+            return []
+        reverse = self._reverse_edges()
+        return [self.index.abs_path(node) for node in self._bfs(start, depth, lambda n: reverse.get(n, ()))]
+
+    def topological_order(self) -> List[str]:
+        """All files ordered so dependencies come before their dependents.
+
+        Members of dependency cycles are appended at the end in path order.
+        """
+        reverse = self._reverse_edges()
+        with self._lock:
+            nodes = sorted(self._edges)
+            remaining = {node: len(self._edges[node]) for node in nodes}
+        ready = deque(node for node in nodes if remaining[node] == 0)
+        order = []
+        while ready:
+            node = ready.popleft()
+            order.append(node)
+            for dependent in sorted(reverse.get(node, ())):
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        placed = set(order)
+        order.extend(node for node in nodes if node not in placed)
+        return [self.index.abs_path(node) for node in order]
+
+    def _bfs(self, start: str, depth: int, neighbours) -> List[str]:
+        seen = {start}
+        found = []
+        frontier = [start]
+        for _ in range(depth):
+            next_frontier = []
+            for node in frontier:
+                for neighbour in sorted(neighbours(node)):
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        found.append(neighbour)
+                        next_frontier.append(neighbour)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return found
+
+    def _node_for(self, file_path: str) -> Optional[str]:
+        rel_path = os.path.relpath(file_path, self.index.root)
+        return rel_path if rel_path in self.index.entries else None
+
+    # ----- Construction ----- #
+
+    def _reverse_edges(self) -> Dict[str, Set[str]]:
+        with self._lock:
+            if self._reverse is None:
+                reverse: Dict[str, Set[str]] = {}
+                for node in list(self.index.entries):
+                    for dependency in self._edges_for(node):
+                        reverse.setdefault(dependency, set()).add(node)
+                self._reverse = reverse
+            return self._reverse
+
+    def _edges_for(self, node: str) -> Set[str]:
+        with self._lock:
+            edges = self._edges.get(node)
+            if edges is None:
+                edges = self._compute_edges(node)
+                self._edges[node] = edges
+            return edges
+
+    def _compute_edges(self, node: str) -> Set[str]:
+        entry = self.index.entries.get(node)
+        if entry is None:
+            return set()
+
+        edges = set()
+        for imported in entry['imports']:
+            target = self.index.path_for_fqn(imported)
+            if target:
+                edges.add(target)
+
+        # Edges only need declarations, so method bodies are never turned into ASTs
+        parser = JavaClassParser(self.index.abs_path(node), signatures_only=True)
+        parser.parse()  # Type references are available even for non-class files
+        for name in parser.type_references:
+            target = self.index.resolve(name, entry['package'], entry['imports'])
+            if target:
+                edges.add(target)
+
+        edges.discard(node)
+        return edges
@@ -10,7 +10,7 @@ class TestFixer:
         self.args = args
         self.test_code = test_code
         self.error_output = error
-        self.ai_client = AIClientFactory.create_client(args)
+        self.ai_client = AIClientFactory.get_client_for('fixer', args)
         # self.junit_jar = args.junit_jar 
 
     def attempt_fix(self):
@@ -51,7 +51,7 @@ class TestFixer:
 
 		"""
 
-        response = self.ai_client.generate_tests(prompt)
+        response = self.ai_client.generate_tests(prompt, use_cache=False)
         fixed_code = self._extract_java_code(response)
 
         if fixed_code:
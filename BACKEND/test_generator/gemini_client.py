@@ -1,10 +1,24 @@
 # backend/test_generator/gemini_client.py
 import os
+import json
+import time
 import logging
+from .model_registry import get_model_registry
+from .response_cache import cached_generate
+from .resilience import backoff_delay, cancelled, get_breaker, latency_tracker, pause
+from .rate_limiter import get_rate_limiter
+from .prompt_budget import estimate_tokens
 
 logger = logging.getLogger("test-generator")
 TIMEOUT = 300
 MAX_RETRIES = 3
+TEMPERATURE = 0.2
+DEFAULT_API_BASE = "https://generativelanguage.googleapis.com"
+
+
+def api_base():
+    """Gemini REST root; GEMINI_API_BASE points the clients at another server (e.g. fake_llm_server.py)"""
+    return os.getenv('GEMINI_API_BASE', DEFAULT_API_BASE).rstrip('/')
 
 class GeminiClient:
     def __init__(self, model_name="gemini-1.5-flash", api_key=None):
@@ -13,40 +27,64 @@ class GeminiClient:
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY environment variable is required")
         
-        # Try to use the official Google AI library if available
+        # Try to use the official Google AI library if available; it always talks
+        # to Google, so a custom GEMINI_API_BASE means the REST path
         try:
+            if os.getenv('GEMINI_API_BASE'):
+                raise ImportError("GEMINI_API_BASE is set")
             import google.generativeai as genai  # type: ignore
             genai.configure(api_key=self.api_key)
             self.model = genai.GenerativeModel(self.model_name)
             self.use_official_lib = True
             logger.info(f"Using official Google Generative AI library for {self.model_name}")
         except ImportError:
-            # Fallback to HTTP requests
-            import requests
-            self.requests = requests
-            self.api_url = "https://generativelanguage.googleapis.com/v1beta/models"
+            # Fallback to HTTP requests over the shared keep-alive transport
+            from .http_transport import get_transport
+            self.http = get_transport()
+            self.api_url = f"{api_base()}/v1beta/models"
             self.use_official_lib = False
             logger.info(f"Using HTTP requests for Gemini API (model: {self.model_name})")
         
         self._model_verified = False
     
+    @property
+    def endpoint(self):
+        return "google-generativeai" if self.use_official_lib else self.api_url
+
     def ensure_model_available(self):
         """Ensure the Gemini API is accessible and the model is available."""
+        registry = get_model_registry()
+        if registry.is_available('gemini', self.model_name, self.endpoint):
+            self._model_verified = True
+            return True
+
         try:
             if self.use_official_lib:
                 # Test with official library
-                return self._verify_model_official()
+                verified = self._verify_model_official()
             else:
                 # Test with HTTP requests
-                return self._verify_model_http()
+                verified = self._verify_model_http()
+            if verified:
+                registry.mark_available('gemini', self.model_name, self.endpoint, refresh=self._is_listed)
+            return verified
                 
         except Exception as e:
             logger.error(f"Gemini API connection error: {e}")
             return False
+
+    def _is_listed(self):
+        """Cheap availability check: the model metadata endpoint still answers."""
+        if self.use_official_lib:
+            import google.generativeai as genai  # type: ignore
+            return genai.get_model(f"models/{self.model_name}") is not None
+        response = self.http.get(f"{self.api_url}/{self.model_name}", headers={'x-goog-api-key': self.api_key}, timeout=10)
+        return response.status_code == 200
     
     def _verify_model_official(self):
         """Verify model using official Google AI library."""
         try:
+            self._wait_for_quota("Hello, respond with just 'Hi'")
             response = self.model.generate_content("Hello, respond with just 'Hi'")
             if response.text and response.text.strip():
                 logger.info(f"Gemini model {self.model_name} verification successful")
@@ -78,7 +116,8 @@ class GeminiClient:
             }
             
             url = f"{self.api_url}/{self.model_name}:generateContent"
-            response = self.requests.post(url, headers=headers, json=data, timeout=30)
+            self._wait_for_quota(data['contents'][0]['parts'][0]['text'])
+            response = self.http.post(url, headers=headers, json=data, timeout=30)
             
             if response.status_code == 200:
                 response_data = response.json()
@@ -97,8 +136,31 @@ class GeminiClient:
             logger.error(f"Error verifying Gemini model {self.model_name}: {e}")
             return False
     
-    def generate_tests(self, prompt, retries=MAX_RETRIES):
-        """Generate tests using the Gemini model."""
+    @staticmethod
+    def _wait_for_quota(prompt):
+        """Queue under the shared Gemini RPM/TPM quota (GEMINI_RPM, GEMINI_TPM)"""
+        limiter = get_rate_limiter('gemini')
+        if limiter:
+            limiter.acquire(estimate_tokens(prompt))
+
+    @staticmethod
+    def _charge_output(response):
+        limiter = get_rate_limiter('gemini')
+        if limiter and response:
+            limiter.charge(estimate_tokens(response))
+
+    @staticmethod
+    def _throttle():
+        limiter = get_rate_limiter('gemini')
+        if limiter:
+            limiter.throttle()
+
+    def generate_tests(self, prompt, retries=MAX_RETRIES, use_cache=True):
+        """Generate tests using the Gemini model (served from the response cache when enabled)."""
+        return cached_generate('gemini', self.model_name, TEMPERATURE, prompt,
+                               lambda: self._generate(prompt, retries), use_cache)
+
+    def _generate(self, prompt, retries):
         # Ensure model is available and verified before generation
         if not self._model_verified:
             logger.info(f"Gemini model {self.model_name} not yet verified, checking availability...")
@@ -106,35 +168,116 @@ class GeminiClient:
                 logger.error(f"Cannot generate tests: Gemini model {self.model_name} is not available")
                 return None
         
+        breaker = get_breaker(f"gemini|{self.endpoint}")
+        latency_key = f"gemini|{self.model_name}"
+
         for attempt in range(retries):
+            if cancelled():
+                logger.info(f"Generation with Gemini {self.model_name} no longer needed; not retrying")
+                return None
+            if not breaker.allow():
+                logger.error("Gemini API is unhealthy (circuit open); failing fast")
+                return None
+            timeout = latency_tracker.timeout_for(latency_key, TIMEOUT)
+            self._wait_for_quota(prompt)
+            started = time.time()
             try:
-                logger.info(f"Sending prompt to Gemini {self.model_name} (attempt {attempt+1}/{retries})")
-                
-                if self.use_official_lib:
-                    return self._generate_with_official_lib(prompt)
-                else:
-                    return self._generate_with_http(prompt)
+                with breaker.guard():
+                    logger.info(f"Sending prompt to Gemini {self.model_name} (attempt {attempt+1}/{retries}, timeout {timeout:.0f}s)")
+                    
+                    if self.use_official_lib:
+                        result = self._generate_with_official_lib(prompt, timeout)
+                    else:
+                        result = self._generate_with_http(prompt, timeout)
+                    if result is None:
+                        # Rejected request (400/403/404) or empty answer: not a sign of a healthy backend
+                        return None
+                    breaker.record_success()
+                    latency_tracker.record(latency_key, time.time() - started)
+                    self._charge_output(result)
+                    return result
                     
             except Exception as e:
+                if type(e).__name__ == 'ResourceExhausted':  # 429 from the official library
+                    self._throttle()
                 logger.error(f"Request error on attempt {attempt+1}: {e}")
                 if attempt < retries - 1:  # Don't sleep on the last attempt
-                    import time
-                    time.sleep(2)
+                    pause(backoff_delay(attempt))
         
         logger.error(f"All {retries} generation attempts failed for Gemini model {self.model_name}")
         return None
     
-    def _generate_with_official_lib(self, prompt):
+    def stream_tests(self, prompt):
+        """Yield generated text chunks as Gemini produces them."""
+        if not self._model_verified and not self.ensure_model_available():
+            raise RuntimeError(f"Gemini model {self.model_name} is not available")
+
+        breaker = get_breaker(f"gemini|{self.endpoint}")
+        if not breaker.allow():
+            raise RuntimeError("Gemini API is unhealthy (circuit open)")
+
+        logger.info(f"Streaming prompt to Gemini {self.model_name}")
+        with breaker.guard():
+            self._wait_for_quota(prompt)
+            started = time.time()
+            yield from self._stream(prompt)
+            breaker.record_success()
+            latency_tracker.record(f"gemini|{self.model_name}", time.time() - started)
+
+    def _stream(self, prompt):
+        if self.use_official_lib:
+            for chunk in self.model.generate_content(prompt, stream=True):
+                if chunk.text:
+                    yield chunk.text
+            return
+
+        headers = {
+            'Content-Type': 'application/json',
+            'x-goog-api-key': self.api_key
+        }
+        url = f"{self.api_url}/{self.model_name}:streamGenerateContent?alt=sse"
+        data = {
+            "contents": [{
+                "parts": [{"text": prompt}]
+            }],
+            "generationConfig": {
+                "temperature": TEMPERATURE,
+                "maxOutputTokens": 8192,
+                "topP": 0.95
+            }
+        }
+
+        response = self.http.post(url, headers=headers, json=data, timeout=TIMEOUT, stream=True)
+        with response:
+            if response.status_code != 200:
+                if response.status_code == 404:
+                    self._model_verified = False
+                    get_model_registry().invalidate('gemini', self.model_name, self.endpoint)
+                elif response.status_code == 429:
+                    self._throttle()
+                raise RuntimeError(f"Generation failed: {response.status_code} {response.text}")
+
+            for raw_line in response.iter_lines():
+                line = raw_line.decode('utf-8')
+                if not line.startswith('data:'):
+                    continue
+                event = json.loads(line[len('data:'):])
+                for candidate in event.get('candidates', [])[:1]:
+                    for part in candidate.get('content', {}).get('parts', []):
+                        if part.get('text'):
+                            yield part['text']
+
+    def _generate_with_official_lib(self, prompt, timeout=TIMEOUT):
         """Generate using official Google AI library."""
-        response = self.model.generate_content(prompt)
+        response = self.model.generate_content(prompt, request_options={'timeout': timeout})
         if response.text and response.text.strip():
             return response.text.strip()
         else:
             logger.error(f"Empty response from Gemini model {self.model_name}")
             return None
     
-    def _generate_with_http(self, prompt):
-        """Generate using HTTP requests."""
+    def _generate_with_http(self, prompt, timeout=TIMEOUT):
+        """Generate using HTTP requests. Rate limits and server errors raise so the caller retries."""
         headers = {
             'Content-Type': 'application/json',
             'x-goog-api-key': self.api_key
@@ -147,13 +290,13 @@ class GeminiClient:
                 "parts": [{"text": prompt}]
             }],
             "generationConfig": {
-                "temperature": 0.2,
+                "temperature": TEMPERATURE,
                 "maxOutputTokens": 8192,
                 "topP": 0.95
             }
         }
         
-        response = self.requests.post(url, headers=headers, json=data, timeout=TIMEOUT)
+        response = self.http.post(url, headers=headers, json=data, timeout=timeout)
         
         if response.status_code == 200:
             response_data = response.json()
@@ -178,6 +321,15 @@ class GeminiClient:
         elif response.status_code == 403:
             logger.error(f"Gemini API key authentication failed: {response.text}")
             return None
+        elif response.status_code == 404:
+            logger.error(f"Gemini model {self.model_name} not found: {response.text}")
+            self._model_verified = False
+            get_model_registry().invalidate('gemini', self.model_name, self.endpoint)
+            return None
+        elif response.status_code == 429 or response.status_code >= 500:
+            if response.status_code == 429:
+                self._throttle()
+            raise RuntimeError(f"Gemini API returned {response.status_code}: {response.text}")
         else:
             logger.warning(f"Generation failed: {response.status_code} {response.text}")
             return None
@@ -194,7 +346,7 @@ class GeminiClient:
         else:
             try:
                 headers = {'x-goog-api-key': self.api_key}
-                response = self.requests.get(f"{self.api_url}/{self.model_name}", headers=headers, timeout=10)
+                response = self.http.get(f"{self.api_url}/{self.model_name}", headers=headers, timeout=10)
                 
                 if response.status_code == 200:
                     model_data = response.json()
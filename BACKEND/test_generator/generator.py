@@ -5,7 +5,12 @@ from pathlib import Path
 from .parser import JavaClassParser
 from .ai_client_factory import AIClientFactory
 from .context_analyzer import ContextAnalyzer
-from .ai_context_analyzer import AIContextAnalyzer
+from .ai_context_analyzer import AIContextAnalyzer, MAX_ANALYSIS_CANDIDATES
+from .project_index import ProjectIndex
+from .dependency_graph import DependencyGraph
+from .java_lexer import scan_java, signature_source
+from .prompt_budget import PromptBudget
+from .single_flight import generation_flight, flight_key
 
 logger = logging.getLogger("test-generator")
 TEST_OUTPUT_DIR = "generated_tests"
@@ -17,12 +22,12 @@ class TestGenerator:
         self.mocking = getattr(args, 'mocking', 'Mockito')
         self.class_parser = None
         self.context = None
-        self.ai_client = AIClientFactory.create_client(args)
+        self.ai_client = AIClientFactory.get_client_for('generation', args)
         
         # Initialize context analyzer
         upload_dir = os.path.dirname(args.file) if hasattr(args, 'file') else "uploads"
         self.context_analyzer = ContextAnalyzer(upload_dir)
-        self.ai_context_analyzer = AIContextAnalyzer(upload_dir, self.ai_client)
+        self.ai_context_analyzer = AIContextAnalyzer(upload_dir, AIClientFactory.get_client_for('analysis', args))
         
         # Process manual context files if provided
         self.manual_context = {}
@@ -34,40 +39,101 @@ class TestGenerator:
                         self.manual_context[class_name] = f.read()
 
     def run(self):
+        """Generate tests, sharing the result with concurrent identical requests"""
+        key = self._flight_key()
+        if key is None:
+            return self._run()
+
+        output, shared = generation_flight.do(key, self._run)
+        if shared and self.class_parser is None:
+            self._parse_java_class()  # Callers read class_parser; the parse cache makes this free
+        return output
+
+    def _flight_key(self):
+        """Identity of a generation: target source, context sources, model and frameworks"""
         try:
-            logger.info("Validating Java file...")
-            if not self._validate_input():
-                return "Invalid Java file."
-
-            logger.info("Parsing Java class...")
-            if not self._parse_java_class():
-                return "Failed to parse Java class."
+            with open(self.args.file, 'r', encoding='utf-8') as f:
+                source = f.read()
+        except Exception:
+            return None
+        context = [f"{name}\n{content}" for name, content in sorted(self.manual_context.items())]
+        return flight_key(source, *context, str(self.args.model), str(self.framework), str(self.mocking),
+                          str(getattr(self.args, 'use_cache', True)))
 
-            logger.info(f"Checking model availability ({self.args.model})...")
-            print(self.args.model)
-            print(self.args.framework)
-            if not self.ai_client.ensure_model_available():
-                return "Model is not available."
+    def _run(self):
+        try:
+            test_code_prompt, error = self._prepare_prompt()
+            if error:
+                return error
 
-            class_info = self.class_parser.get_class_info()
+            use_cache = getattr(self.args, 'use_cache', True)
+            test_code_response = self.ai_client.generate_tests(test_code_prompt, use_cache=use_cache)
+            return self._finish(test_code_response)
 
-            # Enhanced single-step generation with comprehensive analysis
-            logger.info("Generating test code...")
-            test_code_prompt = self._build_comprehensive_prompt(class_info)
-            test_code_response = self.ai_client.generate_tests(test_code_prompt)
-            test_code = self._extract_test_code(test_code_response)
-            if not test_code or not test_code.strip():
-                return "❌ Failed to extract Java code from response."
+        except Exception as e:
+            logger.exception("⚠️ Exception during test generation:")
+            return f"❌ Error: {str(e)}"
 
-            logger.info("💾 Saving generated test file...")
-            if not self._save_test_file(test_code):
-                return "❌ Failed to save test file."
+    def stream(self):
+        """Generate tests, yielding ('token', text) as the model produces them.
 
-            return test_code, "✅ Test generation complete!"
+        The last event is ('result', test_code) once the test file is saved,
+        or ('error', message) if any step fails.
+        """
+        try:
+            test_code_prompt, error = self._prepare_prompt()
+            if error:
+                yield 'error', error
+                return
+
+            chunks = []
+            for chunk in self.ai_client.stream_tests(test_code_prompt):
+                chunks.append(chunk)
+                yield 'token', chunk
+
+            output = self._finish(''.join(chunks))
+            if isinstance(output, tuple):
+                yield 'result', output[0]
+            else:
+                yield 'error', output
 
         except Exception as e:
-            logger.exception("⚠️ Exception during test generation:")
-            return f"❌ Error: {str(e)}"
+            logger.exception("⚠️ Exception during streamed test generation:")
+            yield 'error', f"❌ Error: {str(e)}"
+
+    def _prepare_prompt(self):
+        """Validate, parse and check the model; returns (prompt, None) or (None, error message)"""
+        logger.info("Validating Java file...")
+        if not self._validate_input():
+            return None, "Invalid Java file."
+
+        logger.info("Parsing Java class...")
+        if not self._parse_java_class():
+            return None, "Failed to parse Java class."
+
+        logger.info(f"Checking model availability ({self.args.model})...")
+        print(self.args.model)
+        print(self.args.framework)
+        if not self.ai_client.ensure_model_available():
+            return None, "Model is not available."
+
+        class_info = self.class_parser.get_class_info()
+
+        # Enhanced single-step generation with comprehensive analysis
+        logger.info("Generating test code...")
+        return self._build_comprehensive_prompt(class_info), None
+
+    def _finish(self, test_code_response):
+        """Extract and save the test class from a complete model response"""
+        test_code = self._extract_test_code(test_code_response) if test_code_response else None
+        if not test_code or not test_code.strip():
+            return "❌ Failed to extract Java code from response."
+
+        logger.info("💾 Saving generated test file...")
+        if not self._save_test_file(test_code):
+            return "❌ Failed to save test file."
+
+        return test_code, "✅ Test generation complete!"
 
     def _validate_input(self):
         java_file = Path(self.args.file)
@@ -88,23 +154,14 @@ class TestGenerator:
         
         # Use AI to analyze dependencies and select best context
         logger.info("Using AI to analyze dependencies and select optimal context...")
+        # Reuse the analysis the user just reviewed in /suggest-context when the
+        # target is unchanged, even though its candidate list was built differently
         ai_analysis = self.ai_context_analyzer.analyze_dependencies_with_ai(
             self.args.file, 
-            available_files
+            available_files,
+            reuse_latest=True
         )
         
-        # Generate AI-enhanced context prompt
-        context_prompt = self.ai_context_analyzer.generate_enhanced_context_prompt(
-            self.args.file, 
-            ai_analysis
-        )
-        
-        # Add manual context if provided
-        if self.manual_context:
-            context_prompt += "\n### Additional Manual Context:\n"
-            for class_name, content in self.manual_context.items():
-                context_prompt += f"\n#### {class_name}:\n```java\n{content}\n```\n"
-        
         # Analyze the class structure
         analysis = self._analyze_class_structure(class_info)
         
@@ -113,7 +170,34 @@ class TestGenerator:
         mock_recommendations = mock_strategy.get('classes_to_mock', [])
         test_focus = mock_strategy.get('test_focus', 'Comprehensive unit testing')
         
-        # Build the comprehensive prompt
+        # Fill the model's context budget by priority: the target class, then
+        # manually selected context, then AI-ranked dependencies
+        budget = PromptBudget.for_model(self.args.model)
+        budget.reserve(self._render_prompt('', '', analysis, test_focus, mock_recommendations))
+        full_class_code = budget.take(full_class_code, signature_source(full_class_code), required=True)
+
+        manual_prompt = ""
+        if self.manual_context:
+            manual_prompt += "\n### Additional Manual Context:\n"
+            budget.reserve(manual_prompt)
+            for class_name, content in self.manual_context.items():
+                manual_prompt += budget.take(
+                    f"\n#### {class_name}:\n```java\n{content}\n```\n",
+                    f"\n#### {class_name}:\n```java\n{signature_source(content)}\n```\n"
+                ) or ""
+        
+        # Generate AI-enhanced context prompt
+        context_prompt = self.ai_context_analyzer.generate_enhanced_context_prompt(
+            self.args.file, 
+            ai_analysis,
+            budget
+        ) + manual_prompt
+        logger.info(f"Test generation prompt: {budget.summary()}")
+        
+        return self._render_prompt(full_class_code, context_prompt, analysis, test_focus, mock_recommendations)
+
+    def _render_prompt(self, full_class_code, context_prompt, analysis, test_focus, mock_recommendations):
+        """Fill the test generation template"""
         prompt = f"""# AI-Enhanced Java Unit Test Generation
 
 You are an expert Java test engineer with access to AI-analyzed project context. Generate comprehensive unit tests using {self.framework} and {self.mocking}.
@@ -194,14 +278,14 @@ Generate the complete, production-ready test class now:"""
 
     def _find_available_files(self):
         """Find all available Java files in the project for AI analysis"""
-        available_files = []
         upload_dir = os.path.dirname(self.args.file)
+        target_name = os.path.basename(self.args.file)
+        index = ProjectIndex.for_root(upload_dir)
         
-        for root, dirs, files in os.walk(upload_dir):
-            for file in files:
-                if file.endswith('.java') and file != os.path.basename(self.args.file):
-                    file_path = os.path.join(root, file)
-                    available_files.append(file_path)
+        # Classes the target actually depends on (up to two hops) come first,
+        # then manual context files, then other project files up to the cap
+        related = DependencyGraph.for_index(index).dependencies(self.args.file, depth=2)
+        available_files = [file_path for file_path in related if os.path.basename(file_path) != target_name]
         
         # Add manual context files
         if hasattr(self.args, 'context_files') and self.args.context_files:
@@ -209,6 +293,12 @@ Generate the complete, production-ready test class now:"""
                 if os.path.exists(context_file) and context_file not in available_files:
                     available_files.append(context_file)
         
+        for file_path in index.java_files():
+            if len(available_files) >= MAX_ANALYSIS_CANDIDATES:
+                break
+            if os.path.basename(file_path) != target_name and file_path not in available_files:
+                available_files.append(file_path)
+        
         return available_files
 
     def _analyze_class_structure(self, class_info):
@@ -284,15 +374,16 @@ Generate the complete, production-ready test class now:"""
             with open(self.args.file, 'r', encoding='utf-8') as f:
                 content = f.read()
             
-            if 'if (' in content or 'else' in content:
+            keywords = scan_java(content)['keywords']
+            if keywords['if'] or keywords['else']:
                 indicators.append("Conditional logic")
-            if 'for (' in content or 'while (' in content:
+            if keywords['for'] or keywords['while'] or keywords['do']:
                 indicators.append("Loops")
-            if 'try {' in content or 'catch (' in content:
+            if keywords['try'] or keywords['catch']:
                 indicators.append("Exception handling")
-            if 'switch (' in content:
+            if keywords['switch']:
                 indicators.append("Switch statements")
-            if content.count('return ') > 3:
+            if keywords['return'] > 3:
                 indicators.append("Multiple return paths")
                 
         except Exception:
@@ -0,0 +1,125 @@
+import os
+import time
+import logging
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("http-transport")
+
+
+class HttpTransport:
+    """Keep-alive HTTP sessions shared by every outbound caller.
+
+    One ``requests.Session`` is kept per scheme://host:port, each with its own
+    connection pool, so repeated calls to Ollama, Gemini or Jenkins reuse open
+    TCP/TLS connections instead of paying a handshake per request. Calls
+    without an explicit ``timeout`` get the configured (connect, read) default.
+    Sessions never store cookies, since callers with different credentials
+    share them; pass ``cookies=`` per request where one is needed.
+    """
+
+    def __init__(self, pool_connections: int = 4, pool_maxsize: int = 16,
+                 connect_timeout: float = 5.0, read_timeout: float = 120.0):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = (connect_timeout, read_timeout)
+        self._sessions: Dict[str, requests.Session] = {}
+        self._metrics: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        return f"{parts.scheme}://{parts.hostname}:{port}"
+
+    def session_for(self, url: str) -> requests.Session:
+        """Pooled session for the host of ``url``, created on first use"""
+        key = self.host_key(url)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[key] = session
+                self._metrics[key] = {'requests': 0, 'errors': 0, 'total_seconds': 0.0}
+            return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        session = self.session_for(url)
+        metrics = self._metrics[self.host_key(url)]
+        started = time.time()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                metrics['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                metrics['requests'] += 1
+                metrics['total_seconds'] += time.time() - started
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-host request counts, latency and how many TCP connections were actually opened"""
+        with self._lock:
+            hosts = list(self._sessions.items())
+            metrics = {key: dict(value) for key, value in self._metrics.items()}
+
+        stats = {}
+        for key, session in hosts:
+            host_metrics = metrics[key]
+            opened = 0
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for pool_key in list(pools.keys()):
+                    pool = pools.get(pool_key)
+                    opened += getattr(pool, 'num_connections', 0) if pool else 0
+            count = host_metrics['requests']
+            stats[key] = {
+                'requests': count,
+                'errors': host_metrics['errors'],
+                'connections_opened': opened,
+                'avg_seconds': round(host_metrics['total_seconds'] / count, 4) if count else 0.0,
+            }
+        return stats
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_transport: Optional[HttpTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """Process-wide transport configured from HTTP_* environment variables"""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HttpTransport(
+                pool_connections=int(os.getenv('HTTP_POOL_CONNECTIONS', '4')),
+                pool_maxsize=int(os.getenv('HTTP_POOL_MAXSIZE', '16')),
+                connect_timeout=float(os.getenv('HTTP_CONNECT_TIMEOUT', '5')),
+                read_timeout=float(os.getenv('HTTP_READ_TIMEOUT', '120')),
+            )
+        return _transport
@@ -0,0 +1,139 @@
+import os
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+from .parser import JavaClassParser
+from .project_index import ProjectIndex
+from .bulk_parser import METADATA_SUFFIX, ProjectMetadataStore, parse_project
+from .dependency_graph import DependencyGraph
+
+logger = logging.getLogger("incremental-indexer")
+
+# Deltas at least this large are re-parsed across the bulk parser's process pool
+BULK_REPARSE_MIN = int(os.getenv('INCREMENTAL_BULK_REPARSE_MIN', '50'))
+
+# One background thread re-parses changed files and bulk-parses uploads, so
+# requests never wait for javalang and metadata writes stay serialized
+_reparse_executor = None
+_reparse_executor_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _reparse_executor
+    with _reparse_executor_lock:
+        if _reparse_executor is None:
+            _reparse_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reparse")
+        return _reparse_executor
+
+
+class IncrementalIndexer:
+    """Keeps a project's index and metadata in sync with edits on disk.
+
+    Only files whose mtime/size changed are re-read, and only files whose
+    content hash changed are re-parsed, so an edit to one class costs one
+    parse instead of a full rebuild. The index and dependency graph are
+    updated before ``refresh`` returns; the re-parse runs in the background.
+    """
+
+    def __init__(self, root: str, index: Optional[ProjectIndex] = None):
+        self.root = root
+        self.index = index or ProjectIndex.for_root(root)
+
+    def refresh(self, paths: Optional[List[str]] = None, wait: bool = False) -> Dict[str, List[str]]:
+        """Re-index the given paths, or stat the whole tree when none are given.
+
+        With ``wait`` the call also blocks until the changed files are re-parsed.
+        """
+        delta = self.index.update_files(paths) if paths is not None else self.index.refresh()
+        if not any(delta.values()):
+            return delta
+
+        pending = self.queue_reparse(delta)
+        DependencyGraph.files_updated(self.index, delta)
+        if ProjectIndex.is_persisted(self.root):
+            self.index.save()
+        logger.info(
+            f"Re-indexed {self.root}: {len(delta['added'])} added, "
+            f"{len(delta['updated'])} updated, {len(delta['removed'])} removed"
+        )
+        if wait:
+            pending.result()
+        return delta
+
+    def queue_reparse(self, delta: Dict[str, List[str]]) -> Future:
+        return _executor().submit(self._reparse_logged, delta)
+
+    def _reparse_logged(self, delta: Dict[str, List[str]]):
+        try:
+            self._reparse(delta)
+        except Exception as e:
+            logger.error(f"Background re-parse of {self.root} failed: {e}")
+
+    def _reparse(self, delta: Dict[str, List[str]]):
+        """Parse changed classes (warming the parse cache) and update the metadata store"""
+        changed = delta['added'] + delta['updated']
+        has_store = os.path.exists(os.path.normpath(self.root) + METADATA_SUFFIX)
+        if has_store and len(changed) >= BULK_REPARSE_MIN:
+            parse_project(self.root, files=[self.index.abs_path(rel_path) for rel_path in changed])
+            changed = []
+
+        store = ProjectMetadataStore(self.root) if has_store else None
+        try:
+            for rel_path in changed:
+                entry = self.index.entries.get(rel_path)
+                parser = JavaClassParser(self.index.abs_path(rel_path))
+                if parser.parse():
+                    class_info = parser.get_class_info()
+                    class_info.pop('file_path')
+                    error = None
+                else:
+                    class_info, error = None, parser.error
+                if store:
+                    store.record(rel_path, entry.get('sha256') if entry else None, class_info, error)
+
+            if store:
+                for rel_path in delta['removed']:
+                    store.remove(rel_path)
+                store.commit()
+        finally:
+            if store:
+                store.close()
+
+
+def queue_project_parse(root: str, files: Optional[List[str]] = None) -> Future:
+    """Bulk-parse a whole project on the re-parse thread instead of in the caller"""
+    def run():
+        try:
+            summary = parse_project(root, files=files)
+            logger.info(f"Bulk parse of {root} complete: {summary}")
+        except Exception as e:
+            logger.error(f"Bulk parse of {root} failed: {e}")
+    return _executor().submit(run)
+
+
+def files_changed(paths: List[str]) -> Dict[str, Dict[str, List[str]]]:
+    """Propagate edits of ``paths`` to every index that covers them.
+
+    That is every cached in-process index whose root contains a path, plus
+    the persisted project index (if any) of the upload the path lives in.
+    """
+    roots = {}  # absolute root -> root as the index cache knows it
+    for path in paths:
+        abs_path = os.path.abspath(path)
+        for root in ProjectIndex.cached_roots():
+            if abs_path.startswith(os.path.abspath(root) + os.sep):
+                roots.setdefault(os.path.abspath(root), root)
+
+        directory = os.path.dirname(abs_path)
+        while directory and directory != os.path.dirname(directory):
+            if ProjectIndex.is_persisted(directory):
+                roots.setdefault(directory, directory)
+                break
+            directory = os.path.dirname(directory)
+
+    deltas = {}
+    for root in roots.values():
+        index = ProjectIndex.for_root(root)
+        deltas[root] = IncrementalIndexer(root, index).refresh(paths)
+    return deltas
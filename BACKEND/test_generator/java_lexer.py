@@ -0,0 +1,505 @@
+import re
+import logging
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("java-lexer")
+
+IDENT = 'ident'
+NUMBER = 'number'
+LITERAL = 'literal'
+OP = 'op'
+
+TYPE_KEYWORDS = {'class', 'interface', 'enum', 'record'}
+MODIFIERS = {
+    'public', 'protected', 'private', 'static', 'final', 'abstract', 'synchronized',
+    'native', 'transient', 'volatile', 'strictfp', 'default', 'sealed', 'non-sealed',
+}
+CONTROL_KEYWORDS = {'if', 'else', 'for', 'while', 'do', 'try', 'catch', 'finally', 'switch', 'return', 'throw'}
+JAVA_KEYWORDS = MODIFIERS | TYPE_KEYWORDS | CONTROL_KEYWORDS | {
+    'new', 'this', 'super', 'package', 'import', 'extends', 'implements', 'throws', 'instanceof',
+    'case', 'break', 'continue', 'void', 'null', 'true', 'false', 'assert', 'yield', 'var',
+}
+
+_IDENT_START = re.compile(r'[A-Za-z_$]')
+_IDENT_BODY = re.compile(r'[\w$]*')
+_NUMBER_BODY = re.compile(r'[\w.]*')
+_MULTI_CHAR_OPS = ('...', '::', '->')
+
+
+def tokenize(source: str, offsets: Optional[List[int]] = None) -> List[Tuple[str, str]]:
+    """Split Java source into (kind, text) tokens in a single pass.
+
+    Comments are dropped and string/char/text-block literals are collapsed
+    into a single LITERAL token, so nothing inside them is mistaken for code.
+    Multi-character operators other than ``...``, ``::`` and ``->`` are kept
+    as single characters, which keeps nested generics (``>>``) balanced.
+    When ``offsets`` is given, the start offset of each token is appended to it.
+    """
+    tokens = []
+    i = 0
+    length = len(source)
+    while i < length:
+        start = i
+        ch = source[i]
+        if ch.isspace():
+            i += 1
+        elif ch == '/' and source.startswith('//', i):
+            end = source.find('\n', i)
+            i = length if end < 0 else end
+        elif ch == '/' and source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = length if end < 0 else end + 2
+        elif source.startswith('"""', i):
+            end = source.find('"""', i + 3)
+            while end > 0 and source[end - 1] == '\\':
+                end = source.find('"""', end + 1)
+            i = length if end < 0 else end + 3
+            tokens.append((LITERAL, '""'))
+        elif ch == '"' or ch == "'":
+            j = i + 1
+            while j < length and source[j] != ch and source[j] != '\n':
+                j += 2 if source[j] == '\\' else 1
+            i = j + 1
+            tokens.append((LITERAL, ch * 2))
+        elif _IDENT_START.match(ch):
+            end = _IDENT_BODY.match(source, i + 1).end()
+            tokens.append((IDENT, source[i:end]))
+            i = end
+        elif ch.isdigit():
+            end = _NUMBER_BODY.match(source, i + 1).end()
+            tokens.append((NUMBER, source[i:end]))
+            i = end
+        else:
+            for op in _MULTI_CHAR_OPS:
+                if source.startswith(op, i):
+                    tokens.append((OP, op))
+                    i += len(op)
+                    break
+            else:
+                tokens.append((OP, ch))
+                i += 1
+        if offsets is not None and len(offsets) < len(tokens):
+            offsets.append(start)
+    return tokens
+
+
+def render_type(tokens: List[Tuple[str, str]]) -> str:
+    """Render type tokens back to source form, e.g. ``Map<String, List<User>>``"""
+    parts = []
+    previous = None
+    for kind, text in tokens:
+        if previous is not None and kind == IDENT and previous[0] == IDENT:
+            parts.append(' ')
+        elif previous is not None and previous[1] == ',':
+            parts.append(' ')
+        parts.append(text)
+        previous = (kind, text)
+    return ''.join(parts).replace('...', '[]')
+
+
+def base_type_name(type_text: str) -> str:
+    """Strip generics and array brackets: ``List<User>[]`` -> ``List``"""
+    return re.sub(r'<.*>', '', type_text).replace('[]', '').strip()
+
+
+@lru_cache(maxsize=256)
+def scan_java(source: str) -> Dict:
+    """Extract every structural fact the analyzers need from one walk over the tokens.
+
+    The result is cached per source text and shared between callers, so it
+    must be treated as read-only. Keys:
+
+    - ``package``: package name or ""
+    - ``imports``: imported names (``a.b.C`` or ``a.b.*``), ``static_imports`` likewise
+    - ``types``: declared types as ``{'name', 'kind', 'outer'}`` in source order
+    - ``fields``: ``{'type', 'name', 'modifiers', 'owner'}`` for every field declarator
+    - ``methods``: ``{'name', 'return_type', 'parameters', 'modifiers', 'owner'}``
+    - ``constructors``: ``{'class_name', 'parameters', 'signature', 'modifiers'}``
+    - ``new_types``, ``class_literals``, ``variable_types``, ``annotations``: type names
+    - ``keywords``: occurrence counts of control-flow keywords
+    - ``member_bodies``: ``(open, close)`` offsets of the braces around each
+      method, constructor and initializer body
+    """
+    offsets: List[int] = []
+    tokens = tokenize(source, offsets)
+    return _Scanner(tokens, offsets).scan()
+
+
+def signature_source(source: str) -> str:
+    """Source with every member body emptied to ``{}``, keeping only declarations.
+
+    The result is still valid Java for parsing purposes, but is a fraction of
+    the size, so building an AST for it skips all statement-level work.
+    """
+    pieces = []
+    position = 0
+    for open_offset, close_offset in sorted(scan_java(source)['member_bodies']):
+        if open_offset < position:
+            continue  # Body of a local or anonymous class inside an emptied body
+        pieces.append(source[position:open_offset + 1])
+        position = close_offset
+    pieces.append(source[position:])
+    return ''.join(pieces)
+
+
+class _Scanner:
+    def __init__(self, tokens: List[Tuple[str, str]], offsets: List[int]):
+        self.tokens = tokens
+        self.offsets = offsets
+        self.facts = {
+            'package': "",
+            'imports': [],
+            'static_imports': [],
+            'types': [],
+            'fields': [],
+            'methods': [],
+            'constructors': [],
+            'new_types': [],
+            'class_literals': [],
+            'variable_types': [],
+            'annotations': [],
+            'keywords': Counter(),
+            'member_bodies': [],
+        }
+
+    def scan(self) -> Dict:
+        tokens = self.tokens
+        facts = self.facts
+        # Stack of enclosing blocks: a type name for type bodies, None for code blocks
+        stack: List[Optional[str]] = []
+        pending_type: Optional[str] = None
+        member: List[Tuple[str, str]] = []
+        enum_constants = False
+        body_starts: Dict[int, int] = {}  # Stack depth -> token index of a member body's '{'
+        i = 0
+        while i < len(tokens):
+            kind, text = tokens[i]
+            self._observe(i)
+            in_type_body = bool(stack) and stack[-1] is not None
+
+            if not stack and kind == IDENT and text in ('package', 'import'):
+                end = self._find(';', i)
+                self._header(tokens[i:end])
+                i = end + 1
+                continue
+
+            if kind == IDENT and text in TYPE_KEYWORDS and self._declares_type(i):
+                pending_type = tokens[i + 1][1]
+                facts['types'].append({
+                    'name': pending_type,
+                    'kind': 'annotation' if i > 0 and tokens[i - 1][1] == '@' else text,
+                    'outer': next((name for name in reversed(stack) if name), None),
+                })
+
+            if text == '{':
+                if pending_type is not None:
+                    stack.append(pending_type)
+                    enum_constants = facts['types'][-1]['kind'] == 'enum'
+                    pending_type = None
+                    member = []
+                elif in_type_body and self._has_top_level(member, '='):
+                    # Array initializer or anonymous class inside a field initializer
+                    end = self._matching_brace(i)
+                    member.extend(tokens[i:end + 1])
+                    for j in range(i + 1, end):
+                        self._observe(j)
+                    i = end + 1
+                    continue
+                else:
+                    if in_type_body:
+                        self._member(member, stack[-1])
+                        body_starts[len(stack) + 1] = i
+                    stack.append(None)
+                    member = []
+                i += 1
+                continue
+
+            if text == '}':
+                start = body_starts.pop(len(stack), None)
+                if start is not None:
+                    facts['member_bodies'].append((self.offsets[start], self.offsets[i]))
+                if stack and stack.pop() is not None:
+                    enum_constants = False
+                member = []
+                i += 1
+                continue
+
+            if in_type_body:
+                if text == ';':
+                    if enum_constants:
+                        enum_constants = False
+                    else:
+                        self._member(member, stack[-1])
+                    member = []
+                elif not enum_constants:
+                    member.append((kind, text))
+            i += 1
+        return facts
+
+    # ----- Whole-file observations ----- #
+
+    def _observe(self, i: int):
+        tokens = self.tokens
+        kind, text = tokens[i]
+        if kind != IDENT:
+            if text == '@' and i + 1 < len(tokens) and tokens[i + 1][0] == IDENT and tokens[i + 1][1] != 'interface':
+                self.facts['annotations'].append(tokens[i + 1][1])
+            return
+        if text in CONTROL_KEYWORDS:
+            self.facts['keywords'][text] += 1
+        elif text == 'new' and i + 1 < len(tokens) and tokens[i + 1][0] == IDENT:
+            self.facts['new_types'].append(self._dotted_name(i + 1))
+        elif text == 'class' and i > 0 and tokens[i - 1][1] == '.':
+            j = i - 2
+            if j >= 0 and tokens[j][0] == IDENT:
+                self.facts['class_literals'].append(tokens[j][1])
+        elif (i + 2 < len(tokens) and tokens[i + 1][0] == IDENT and tokens[i + 2][1] in ('=', ';')
+              and text not in JAVA_KEYWORDS and tokens[i + 1][1] not in JAVA_KEYWORDS):
+            self.facts['variable_types'].append(text)
+        elif text not in JAVA_KEYWORDS and i + 1 < len(tokens) and tokens[i + 1][1] == '<':
+            # Generic declaration like `List<User> users =`; find the closing '>'
+            end = self._matching_angle(i + 1)
+            if (end is not None and end + 2 < len(tokens) and tokens[end + 1][0] == IDENT
+                    and tokens[end + 2][1] in ('=', ';')):
+                self.facts['variable_types'].append(text)
+
+    def _dotted_name(self, i: int) -> str:
+        tokens = self.tokens
+        parts = [tokens[i][1]]
+        while i + 2 < len(tokens) and tokens[i + 1][1] == '.' and tokens[i + 2][0] == IDENT:
+            i += 2
+            parts.append(tokens[i][1])
+        return '.'.join(parts)
+
+    # ----- Declarations ----- #
+
+    def _header(self, statement: List[Tuple[str, str]]):
+        words = [text for _, text in statement]
+        if words[0] == 'package':
+            self.facts['package'] = ''.join(words[1:])
+        elif len(words) > 2 and words[1] == 'static':
+            self.facts['static_imports'].append(''.join(words[2:]))
+        else:
+            self.facts['imports'].append(''.join(words[1:]))
+
+    def _declares_type(self, i: int) -> bool:
+        tokens = self.tokens
+        if i + 1 >= len(tokens) or tokens[i + 1][0] != IDENT:
+            return False
+        previous = tokens[i - 1][1] if i > 0 else None
+        return previous != '.'  # `Foo.class` is a literal, not a declaration
+
+    def _member(self, member: List[Tuple[str, str]], owner: str):
+        """Classify one class-body declaration (without its body) and record it"""
+        modifiers, rest = self._split_modifiers(member)
+        if not rest or any(text in TYPE_KEYWORDS for _, text in rest):
+            return  # Initializer block or nested type header
+        if rest[0][1] == '<':
+            end = self._matching_angle_in(rest, 0)
+            rest = rest[end + 1:] if end is not None else rest
+
+        paren = next((idx for idx, (_, text) in enumerate(rest) if text == '('), None)
+        equals = next((idx for idx, (_, text) in enumerate(rest) if text == '='), None)
+        if paren is not None and (equals is None or paren < equals):
+            self._callable(rest, paren, modifiers, owner)
+        else:
+            self._fields(rest, modifiers, owner)
+
+    def _callable(self, rest, paren: int, modifiers: List[str], owner: str):
+        if paren == 0 or rest[paren - 1][0] != IDENT:
+            return
+        name = rest[paren - 1][1]
+        close = self._matching_paren_in(rest, paren)
+        parameters = self._parameters(rest[paren + 1:close])
+        type_tokens = rest[:paren - 1]
+        if not type_tokens and name == owner:
+            self.facts['constructors'].append({
+                'class_name': owner,
+                'parameters': parameters,
+                'signature': f"{owner}({', '.join(p['type'] + ' ' + p['name'] for p in parameters)})",
+                'modifiers': modifiers,
+            })
+        elif type_tokens:
+            self.facts['methods'].append({
+                'name': name,
+                'return_type': render_type(type_tokens),
+                'parameters': parameters,
+                'modifiers': modifiers,
+                'owner': owner,
+            })
+
+    def _parameters(self, tokens) -> List[Dict[str, str]]:
+        parameters = []
+        for part in self._split_top_level(tokens, ','):
+            _, part = self._split_modifiers(part)
+            if len(part) < 2 or part[-1][0] != IDENT:
+                continue
+            type_tokens = part[:-1]
+            # C-style array parameters: `String args[]`
+            parameters.append({'type': render_type(type_tokens), 'name': part[-1][1]})
+        return parameters
+
+    def _fields(self, rest, modifiers: List[str], owner: str):
+        declarators = self._split_top_level(rest, ',')
+        if not declarators:
+            return
+        first = declarators[0]
+        equals = next((idx for idx, (_, text) in enumerate(first) if text == '='), len(first))
+        head = first[:equals]
+        if len(head) < 2 or head[-1][0] != IDENT:
+            return
+        field_type = render_type(head[:-1])
+        names = [head[-1][1]]
+        for declarator in declarators[1:]:
+            if declarator and declarator[0][0] == IDENT:
+                names.append(declarator[0][1])
+        for name in names:
+            self.facts['fields'].append({'type': field_type, 'name': name, 'modifiers': modifiers, 'owner': owner})
+
+    # ----- Token helpers ----- #
+
+    def _split_modifiers(self, tokens):
+        """Separate leading modifiers and annotations from a declaration"""
+        modifiers = []
+        i = 0
+        while i < len(tokens):
+            kind, text = tokens[i]
+            if text == '@' and i + 1 < len(tokens) and tokens[i + 1][1] != 'interface':
+                i += 2
+                while i + 1 < len(tokens) and tokens[i][1] == '.' and tokens[i + 1][0] == IDENT:
+                    i += 2
+                if i < len(tokens) and tokens[i][1] == '(':
+                    i = self._matching_paren_in(tokens, i) + 1
+            elif kind == IDENT and text in MODIFIERS:
+                modifiers.append(text)
+                i += 1
+            else:
+                break
+        return modifiers, tokens[i:]
+
+    def _split_top_level(self, tokens, separator: str):
+        parts, current, depth = [], [], 0
+        for token in tokens:
+            text = token[1]
+            if text in ('<', '(', '[', '{'):
+                depth += 1
+            elif text in ('>', ')', ']', '}'):
+                depth -= 1
+            if text == separator and depth == 0:
+                parts.append(current)
+                current = []
+            else:
+                current.append(token)
+        if current:
+            parts.append(current)
+        return parts
+
+    def _has_top_level(self, tokens, wanted: str) -> bool:
+        depth = 0
+        for _, text in tokens:
+            if text in ('(', '['):
+                depth += 1
+            elif text in (')', ']'):
+                depth -= 1
+            elif text == wanted and depth == 0:
+                return True
+        return False
+
+    def _find(self, wanted: str, start: int) -> int:
+        for i in range(start, len(self.tokens)):
+            if self.tokens[i][1] == wanted:
+                return i
+        return len(self.tokens)
+
+    def _matching_brace(self, start: int) -> int:
+        depth = 0
+        for i in range(start, len(self.tokens)):
+            text = self.tokens[i][1]
+            if text == '{':
+                depth += 1
+            elif text == '}':
+                depth -= 1
+                if depth == 0:
+                    return i
+        return len(self.tokens) - 1
+
+    def _matching_angle(self, start: int) -> Optional[int]:
+        return self._matching_angle_in(self.tokens, start)
+
+    @staticmethod
+    def _matching_angle_in(tokens, start: int) -> Optional[int]:
+        depth = 0
+        for i in range(start, min(len(tokens), start + 64)):
+            kind, text = tokens[i]
+            if text == '<':
+                depth += 1
+            elif text == '>':
+                depth -= 1
+                if depth == 0:
+                    return i
+            elif kind != IDENT and text not in (',', '.', '?', '[', ']', '&', '@'):
+                return None  # Not a type argument list (e.g. a comparison)
+        return None
+
+    @staticmethod
+    def _matching_paren_in(tokens, start: int) -> int:
+        depth = 0
+        for i in range(start, len(tokens)):
+            text = tokens[i][1]
+            if text == '(':
+                depth += 1
+            elif text == ')':
+                depth -= 1
+                if depth == 0:
+                    return i
+        return len(tokens) - 1
+
+
+# ----- Convenience views shared by the analyzers ----- #
+
+EXTERNAL_PACKAGES = ('java.', 'javax.', 'org.springframework.', 'org.junit.', 'org.mockito.')
+COMMON_TYPES = {'String', 'Integer', 'Boolean', 'Long', 'Double', 'List', 'Set', 'Map'}
+
+
+def primary_type(facts: Dict) -> Optional[str]:
+    """Name of the first top-level type declared in the file"""
+    for declared in facts['types']:
+        if declared['outer'] is None:
+            return declared['name']
+    return None
+
+
+def project_imports(source: str) -> List[str]:
+    """Simple names of explicitly imported project classes (library packages excluded)"""
+    facts = scan_java(source)
+    names = []
+    for imported in facts['imports']:
+        if not imported.startswith(EXTERNAL_PACKAGES) and not imported.endswith('*'):
+            names.append(imported.split('.')[-1])
+    return names
+
+
+def class_references(source: str) -> List[str]:
+    """Project-looking class names used by fields, parameters, return types and `new`"""
+    facts = scan_java(source)
+    types = [field['type'] for field in facts['fields']]
+    for member in facts['methods'] + facts['constructors']:
+        types.extend(param['type'] for param in member['parameters'])
+    types.extend(method['return_type'] for method in facts['methods'])
+    types.extend(facts['new_types'])
+
+    references = []
+    for type_text in types:
+        name = base_type_name(type_text).split('.')[-1]
+        if name and name[0].isupper() and name not in COMMON_TYPES and name not in references:
+            references.append(name)
+    return references
+
+
+def primary_constructors(source: str) -> List[Dict]:
+    """Constructors declared by the file's primary type"""
+    facts = scan_java(source)
+    class_name = primary_type(facts)
+    return [ctor for ctor in facts['constructors'] if ctor['class_name'] == class_name]
@@ -0,0 +1,101 @@
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger("model-registry")
+
+ModelKey = Tuple[str, str, str]  # (provider, model, endpoint)
+
+
+class ModelRegistry:
+    """Process-wide TTL cache of (provider, model, endpoint) tuples known to work.
+
+    Clients record a model here after their first successful verification,
+    so later requests skip the tags lookup and test generation entirely.
+    Entries close to expiry are re-checked in a background thread with the
+    cheap ``refresh`` callable supplied at registration; an entry whose check
+    fails or raises is dropped and the next request verifies in full again.
+    """
+
+    def __init__(self, ttl: float = 600.0, refresh_interval: float = 60.0):
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self._entries: Dict[ModelKey, Dict] = {}
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+
+    def is_available(self, provider: str, model: str, endpoint: str) -> bool:
+        with self._lock:
+            entry = self._entries.get((provider, model, endpoint))
+            return entry is not None and entry['expires_at'] > time.time()
+
+    def mark_available(self, provider: str, model: str, endpoint: str,
+                       refresh: Optional[Callable[[], bool]] = None):
+        with self._lock:
+            self._entries[(provider, model, endpoint)] = {
+                'expires_at': time.time() + self.ttl,
+                'verified_at': time.time(),
+                'refresh': refresh,
+            }
+            if refresh is not None and self._refresher is None:
+                self._refresher = threading.Thread(target=self._refresh_loop, name="model-registry", daemon=True)
+                self._refresher.start()
+
+    def invalidate(self, provider: str, model: str, endpoint: str):
+        with self._lock:
+            self._entries.pop((provider, model, endpoint), None)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Known models and seconds until each entry expires"""
+        now = time.time()
+        with self._lock:
+            return {
+                '|'.join(key): {
+                    'expires_in': round(entry['expires_at'] - now, 1),
+                    'verified_at': entry['verified_at'],
+                }
+                for key, entry in self._entries.items()
+            }
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            now = time.time()
+            with self._lock:
+                due = [
+                    (key, entry['refresh']) for key, entry in self._entries.items()
+                    if entry['refresh'] is not None and entry['expires_at'] - now <= self.refresh_interval
+                ]
+            for key, refresh in due:
+                try:
+                    still_available = refresh()
+                except Exception as e:
+                    logger.warning(f"Availability refresh failed for {key}: {e}")
+                    still_available = False
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is None:
+                        continue
+                    if still_available:
+                        entry['expires_at'] = time.time() + self.ttl
+                    else:
+                        logger.info(f"Model {key[1]} at {key[2]} no longer available; dropping cached verification")
+                        del self._entries[key]
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Shared registry configured from MODEL_AVAILABILITY_TTL / MODEL_REFRESH_INTERVAL"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry(
+                ttl=float(os.getenv('MODEL_AVAILABILITY_TTL', '600')),
+                refresh_interval=float(os.getenv('MODEL_REFRESH_INTERVAL', '60')),
+            )
+        return _registry
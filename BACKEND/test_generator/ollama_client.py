@@ -1,103 +1,115 @@
 # backend/test_generator/ollama_client.py
 import time
+import json
 import requests
 import logging
+from .http_transport import get_transport
+from .model_registry import get_model_registry
+from .response_cache import cached_generate
+from .resilience import backoff_delay, cancelled, latency_tracker, pause
+from .ollama_warmer import keep_alive_policy, pull_model, runner_options
+from .ollama_pool import get_pool, endpoint_breaker
 
 logger = logging.getLogger("test-generator")
 TIMEOUT = 300
 MAX_RETRIES = 3
+TEMPERATURE = 0.2
 
 class OllamaClient:
     def __init__(self, model_name, api_url="http://localhost:11434"):
         if not model_name:
             raise ValueError("model_name is required and cannot be empty")
         self.model_name = model_name
+        # One URL or a comma-separated list of Ollama servers to balance across
         self.api_url = api_url
-        self._model_verified = False
+        self.pool = get_pool(api_url)
     
     def ensure_model_available(self):
-        """Ensure the specified model is available, pulling it if necessary."""
+        """Ensure the model is usable on at least one endpoint, pulling it if necessary."""
+        tried = set()
+        while True:
+            url = self.pool.pick(self.model_name, exclude=tried)
+            if url is None:
+                return False
+            if self._ensure_on(url):
+                return True
+            tried.add(url)
+
+    def _ensure_on(self, url):
+        """Ensure the model is usable on one endpoint. Verification is cached per endpoint;
+        an unreachable endpoint is ejected and one that lacks the model is ranked last for it."""
+        registry = get_model_registry()
+        if registry.is_available('ollama', self.model_name, url):
+            return True
+
         try:
-            response = requests.get(f"{self.api_url}/api/tags")
+            response = get_transport().get(f"{url}/api/tags")
             if response.status_code == 200:
                 models = response.json().get('models', [])
                 model_names = [m.get('name') for m in models]
                 
                 if self.model_name not in model_names:
-                    logger.info(f"Model {self.model_name} not found locally. Pulling...")
-                    if not self._pull_model():
+                    logger.info(f"Model {self.model_name} not found on {url}. Pulling...")
+                    if not self._pull_model(url):
+                        self.pool.model_missing(url, self.model_name)
                         return False
                 else:
-                    logger.info(f"Model {self.model_name} is already available")
+                    logger.info(f"Model {self.model_name} is already available on {url}")
                 
                 # Verify the model is actually usable
-                if self._verify_model():
-                    self._model_verified = True
+                if self._verify_model(url):
+                    registry.mark_available('ollama', self.model_name, url, refresh=lambda: self._is_listed(url))
                     return True
                 else:
-                    logger.error(f"Model {self.model_name} exists but is not usable")
+                    logger.error(f"Model {self.model_name} exists on {url} but is not usable")
+                    self.pool.model_missing(url, self.model_name)
                     return False
             else:
-                logger.error(f"Failed to list models: {response.status_code} {response.text}")
+                logger.error(f"Failed to list models on {url}: {response.status_code} {response.text}")
+                self.pool.report_failure(url)
                 return False
         except requests.RequestException as e:
-            logger.error(f"Ollama connection error: {e}")
+            logger.error(f"Ollama connection error at {url}: {e}")
+            self.pool.mark_down(url)
             return False
     
-    def _pull_model(self):
-        """Pull the model from Ollama registry."""
-        try:
-            pull_url = f"{self.api_url}/api/pull"
-            logger.info(f"Starting pull for model {self.model_name}...")
-            
-            pull_response = requests.post(
-                pull_url, 
-                json={"name": self.model_name},
-                timeout=TIMEOUT
-            )
-            
-            if pull_response.status_code != 200:
-                logger.error(f"Failed to initiate pull for model {self.model_name}: {pull_response.text}")
-                return False
-            
-            # Wait for pull to complete
-            max_wait_time = 600  # 10 minutes
-            wait_time = 0
-            
-            while wait_time < max_wait_time:
-                time.sleep(5)
-                wait_time += 5
-                
-                try:
-                    status_response = requests.get(f"{self.api_url}/api/tags")
-                    if status_response.status_code == 200:
-                        models = status_response.json().get('models', [])
-                        model_names = [m.get('name') for m in models]
-                        if self.model_name in model_names:
-                            logger.info(f"Successfully pulled model {self.model_name}")
-                            return True
-                except requests.RequestException:
-                    continue
-            
-            logger.error(f"Timeout waiting for model {self.model_name} to be pulled")
-            return False
-            
-        except requests.RequestException as e:
-            logger.error(f"Error pulling model {self.model_name}: {e}")
+    def _is_listed(self, url):
+        """Cheap availability check: the model still appears in the endpoint's /api/tags."""
+        response = get_transport().get(f"{url}/api/tags", timeout=10)
+        if response.status_code != 200:
             return False
+        return self.model_name in [m.get('name') for m in response.json().get('models', [])]
+
+    def _admit(self, url, unusable):
+        """Breaker of ``url`` if a call may go there now, else None (and ``url`` joins ``unusable``)"""
+        breaker = endpoint_breaker(url)
+        if not breaker.allow():
+            logger.warning(f"Ollama at {url} is unhealthy (circuit open); trying another endpoint")
+        elif self._ensure_on(url):
+            return breaker
+        else:
+            breaker.release()
+        unusable.add(url)
+        return None
+
+    def _pull_model(self, url):
+        """Pull the model from Ollama registry, following the streamed progress."""
+        return pull_model(url, self.model_name)
     
-    def _verify_model(self):
+    def _verify_model(self, url):
         """Verify the model is actually usable by sending a simple test prompt."""
         try:
-            generation_url = f"{self.api_url}/api/generate"
-            test_response = requests.post(
+            generation_url = f"{url}/api/generate"
+            test_response = get_transport().post(
                 generation_url,
                 json={
                     "model": self.model_name,
                     "prompt": "Hello",
                     "stream": False,
+                    "keep_alive": keep_alive_policy.keep_alive_for(self.model_name),
                     "options": {
                         "temperature": 0.2,
+                        **runner_options(self.model_name),
                     }
                 },
                 timeout=30  # Shorter timeout for verification
@@ -119,63 +131,171 @@ class OllamaClient:
             logger.error(f"Error verifying model {self.model_name}: {e}")
             return False
     
-    def generate_tests(self, prompt, retries=MAX_RETRIES):
-        """Generate tests using the specified model."""
-        # Ensure model is available and verified before generation
-        if not self._model_verified:
-            logger.info(f"Model {self.model_name} not yet verified, checking availability...")
-            if not self.ensure_model_available():
-                logger.error(f"Cannot generate tests: model {self.model_name} is not available")
-                return None
-        
-        generation_url = f"{self.api_url}/api/generate"
+    def generate_tests(self, prompt, retries=MAX_RETRIES, use_cache=True):
+        """Generate tests using the specified model (served from the response cache when enabled)."""
+        return cached_generate('ollama', self.model_name, TEMPERATURE, prompt,
+                               lambda: self._generate(prompt, retries), use_cache)
+
+    def _generate(self, prompt, retries):
+        keep_alive_policy.touch(self.model_name)
+        latency_key = f"ollama|{self.model_name}"
+        unusable = set()  # Endpoints that cannot serve this call: circuit open, unreachable or model missing
         
         for attempt in range(retries):
-            try:
-                logger.info(f"Sending prompt to {self.model_name} (attempt {attempt+1}/{retries})")
-                response = requests.post(
-                    generation_url,
-                    json={
-                        "model": self.model_name,
-                        "prompt": prompt,
-                        "stream": False,
-                        "options": {
-                            "temperature": 0.2,
-                            # "top_p": 0.95,
-                        }
-                    },
-                    timeout=TIMEOUT
-                )
-                
-                if response.status_code == 200:
-                    response_data = response.json()
-                    if 'response' in response_data:
-                        return response_data['response'].strip()
-                    else:
-                        logger.error(f"Invalid response format from model {self.model_name}")
+            if cancelled():
+                logger.info(f"Generation with {self.model_name} no longer needed; not retrying")
+                return None
+            timeout = latency_tracker.timeout_for(latency_key, TIMEOUT)
+            # Skipping an endpoint that is down or lacks the model does not use up an attempt
+            while True:
+                with self.pool.lease(self.model_name, exclude=unusable) as url:
+                    if url is None:
+                        logger.error(f"Cannot generate tests: no Ollama endpoint can serve {self.model_name}")
                         return None
-                elif response.status_code == 404 and "model" in response.text.lower():
-                    logger.error(f"Model {self.model_name} not found on server")
-                    self._model_verified = False  # Reset verification status
-                    return None
-                else:
-                    logger.warning(f"Generation attempt {attempt+1} failed: {response.status_code} {response.text}")
-                    
-                if attempt < retries - 1:  # Don't sleep on the last attempt
-                    time.sleep(2)
-                    
-            except requests.RequestException as e:
-                logger.error(f"Request error on attempt {attempt+1}: {e}")
-                if attempt < retries - 1:  # Don't sleep on the last attempt
-                    time.sleep(2)
+                    breaker = self._admit(url, unusable)
+                    if breaker is None:
+                        continue
+                    started = time.time()
+                    try:
+                        with breaker.guard():
+                            logger.info(f"Sending prompt to {self.model_name} at {url} (attempt {attempt+1}/{retries}, timeout {timeout:.0f}s)")
+                            response = get_transport().post(
+                                f"{url}/api/generate",
+                                json={
+                                    "model": self.model_name,
+                                    "prompt": prompt,
+                                    "stream": False,
+                                    "keep_alive": keep_alive_policy.keep_alive_for(self.model_name),
+                                    "options": {
+                                        "temperature": TEMPERATURE,
+                                        **runner_options(self.model_name),
+                                        # "top_p": 0.95,
+                                    }
+                                },
+                                timeout=timeout
+                            )
+                        
+                            if response.status_code == 200:
+                                response_data = response.json()
+                                breaker.record_success()
+                                self.pool.report_success(url, self.model_name)
+                                latency_tracker.record(latency_key, time.time() - started)
+                                if 'response' in response_data:
+                                    return response_data['response'].strip()
+                                else:
+                                    logger.error(f"Invalid response format from model {self.model_name}")
+                                    return None
+                            elif response.status_code == 404 and "model" in response.text.lower():
+                                # The server answered; only the model is missing, so try another endpoint
+                                self._model_missing(url, unusable)
+                                continue
+                            else:
+                                breaker.record_failure()
+                                self.pool.report_failure(url)
+                                logger.warning(f"Generation attempt {attempt+1} failed: {response.status_code} {response.text}")
+
+                    except requests.ConnectionError as e:
+                        logger.error(f"Ollama at {url} unreachable on attempt {attempt+1}: {e}")
+                        self.pool.mark_down(url)
+                        unusable.add(url)
+                        continue
+                    except (requests.RequestException, ValueError) as e:
+                        self.pool.report_failure(url)
+                        logger.error(f"Request error on attempt {attempt+1}: {e}")
+                break  # The endpoint was reached and the generation failed
+
+            if attempt < retries - 1:  # Don't sleep on the last attempt
+                pause(backoff_delay(attempt))
         
         logger.error(f"All {retries} generation attempts failed for model {self.model_name}")
         return None
+
+    def _model_missing(self, url, unusable):
+        logger.error(f"Model {self.model_name} not found on {url}")
+        get_model_registry().invalidate('ollama', self.model_name, url)
+        self.pool.model_missing(url, self.model_name)
+        unusable.add(url)
     
+    def stream_tests(self, prompt):
+        """Yield generated text chunks as Ollama produces them (NDJSON stream).
+
+        Until the first chunk arrives, an endpoint that is unreachable, lacks
+        the model or answers with an error is skipped for the next one.
+        """
+        keep_alive_policy.touch(self.model_name)
+        unusable = set()
+        last_error = None
+        while True:
+            with self.pool.lease(self.model_name, exclude=unusable) as url:
+                if url is None:
+                    raise RuntimeError(last_error or f"No Ollama endpoint can serve {self.model_name}")
+                breaker = self._admit(url, unusable)
+                if breaker is None:
+                    continue
+
+                started = time.time()
+                streamed = False
+                try:
+                    with breaker.guard():
+                        logger.info(f"Streaming prompt to {self.model_name} at {url}")
+                        response = get_transport().post(
+                            f"{url}/api/generate",
+                            json={
+                                "model": self.model_name,
+                                "prompt": prompt,
+                                "stream": True,
+                                "keep_alive": keep_alive_policy.keep_alive_for(self.model_name),
+                                "options": {
+                                    "temperature": TEMPERATURE,
+                                    **runner_options(self.model_name),
+                                }
+                            },
+                            timeout=latency_tracker.timeout_for(f"ollama|{self.model_name}", TIMEOUT),
+                            stream=True
+                        )
+                        with response:
+                            if response.status_code == 404:
+                                self._model_missing(url, unusable)
+                                continue
+                            if response.status_code != 200:
+                                last_error = f"Generation failed on {url}: {response.status_code} {response.text}"
+                                logger.warning(last_error)
+                                breaker.record_failure()
+                                self.pool.report_failure(url)
+                                unusable.add(url)
+                                continue
+
+                            for line in response.iter_lines():
+                                if not line:
+                                    continue
+                                chunk = json.loads(line)
+                                if chunk.get('error'):
+                                    raise RuntimeError(f"Generation failed: {chunk['error']}")
+                                if chunk.get('response'):
+                                    streamed = True
+                                    yield chunk['response']
+                                if chunk.get('done'):
+                                    break
+                        breaker.record_success()
+                        self.pool.report_success(url, self.model_name)
+                        latency_tracker.record(f"ollama|{self.model_name}", time.time() - started)
+                except requests.ConnectionError as e:
+                    if streamed:
+                        raise
+                    last_error = f"Ollama at {url} unreachable: {e}"
+                    logger.error(last_error)
+                    self.pool.mark_down(url)
+                    unusable.add(url)
+                    continue
+                return
+
     def get_model_info(self):
         """Get information about the currently configured model."""
+        url = self.pool.pick(self.model_name)
+        if url is None:
+            return None
         try:
-            response = requests.get(f"{self.api_url}/api/tags")
+            response = get_transport().get(f"{url}/api/tags")
             if response.status_code == 200:
                 models = response.json().get('models', [])
                 for model in models:
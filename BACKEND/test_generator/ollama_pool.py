@@ -0,0 +1,223 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Set
+import requests
+from .http_transport import get_transport
+from .resilience import get_breaker
+
+logger = logging.getLogger("ollama-pool")
+
+
+def split_urls(api_url: str) -> List[str]:
+    """"http://a:11434, http://b:11434" -> ['http://a:11434', 'http://b:11434']"""
+    return [url.strip().rstrip('/') for url in (api_url or '').split(',') if url.strip()]
+
+
+def endpoint_breaker(url: str):
+    """Circuit breaker of a single Ollama server"""
+    return get_breaker(f"ollama|{url}")
+
+
+class _Endpoint:
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.served = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.loaded: Set[str] = set()
+        self.installed: Optional[Set[str]] = None  # None until the first health check
+        self.missing: Set[str] = set()  # Models this server failed to serve since the last health check
+
+    @property
+    def healthy(self) -> bool:
+        return time.time() >= self.ejected_until
+
+
+class OllamaPool:
+    """Routes requests across several Ollama servers.
+
+    Each request goes to the healthy endpoint with the fewest outstanding
+    requests, preferring endpoints that already have the model in memory,
+    then those that have it installed. An endpoint is ejected for
+    ``eject_seconds`` after ``failure_threshold`` consecutive failures, a
+    connection error or a failed health check, and readmitted when a health
+    check succeeds. Endpoints whose circuit breaker is open are skipped too.
+    """
+
+    def __init__(self, urls: List[str], health_interval: float = 15, eject_seconds: float = 30,
+                 failure_threshold: int = 3):
+        if not urls:
+            raise ValueError("at least one Ollama URL is required")
+        self.endpoints = [_Endpoint(url) for url in urls]
+        self.health_interval = health_interval
+        self.eject_seconds = eject_seconds
+        self.failure_threshold = failure_threshold
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def pick(self, model_name: str, exclude: Iterable[str] = ()) -> Optional[str]:
+        """Endpoint URL for the next request, without reserving it; None when all are excluded"""
+        with self._lock:
+            endpoint = self._choose(model_name, exclude)
+            return endpoint.url if endpoint else None
+
+    def _choose(self, model_name: str, exclude: Iterable[str] = ()) -> Optional[_Endpoint]:
+        candidates = [e for e in self.endpoints if e.url not in exclude]
+        if not candidates:
+            return None
+        usable = [e for e in candidates if e.healthy and not endpoint_breaker(e.url).is_open()]
+        # Everything is down: trying some server beats refusing outright
+        candidates = usable or candidates
+
+        def rank(endpoint):
+            if model_name in endpoint.missing:
+                warmth = 3
+            elif model_name in endpoint.loaded:
+                warmth = 0
+            elif endpoint.installed is None or model_name in endpoint.installed:
+                warmth = 1
+            else:
+                warmth = 2
+            return warmth, endpoint.outstanding
+
+        return min(candidates, key=rank)
+
+    @contextmanager
+    def lease(self, model_name: str, exclude: Iterable[str] = ()):
+        """Reserve an endpoint for one request; yields its URL (None when all are excluded).
+
+        Raising ``requests.RequestException`` inside the block counts as a
+        failure of that endpoint; call ``report_failure`` for failed responses.
+        """
+        with self._lock:
+            endpoint = self._choose(model_name, exclude)
+            if endpoint is not None:
+                endpoint.outstanding += 1
+        if endpoint is None:
+            yield None
+            return
+        try:
+            yield endpoint.url
+        except requests.RequestException:
+            self.report_failure(endpoint.url)
+            raise
+        finally:
+            with self._lock:
+                endpoint.outstanding -= 1
+                endpoint.served += 1
+
+    def report_failure(self, url: str):
+        with self._lock:
+            endpoint = self._find(url)
+            endpoint.consecutive_failures += 1
+            if endpoint.consecutive_failures >= self.failure_threshold and endpoint.healthy:
+                self._eject(endpoint)
+
+    def report_success(self, url: str, model_name: Optional[str] = None):
+        with self._lock:
+            endpoint = self._find(url)
+            endpoint.consecutive_failures = 0
+            if model_name:
+                endpoint.loaded.add(model_name)
+
+    def mark_down(self, url: str):
+        """The endpoint is unreachable: eject it now rather than after repeated failures"""
+        with self._lock:
+            self._eject(self._find(url))
+
+    def model_missing(self, url: str, model_name: str):
+        """The endpoint answered but cannot serve ``model_name``; rank it last for that model"""
+        with self._lock:
+            endpoint = self._find(url)
+            endpoint.missing.add(model_name)
+            endpoint.loaded.discard(model_name)
+
+    def _find(self, url: str) -> _Endpoint:
+        return next(e for e in self.endpoints if e.url == url)
+
+    def _eject(self, endpoint: _Endpoint):
+        if endpoint.healthy and len(self.endpoints) > 1:
+            logger.warning(f"Ejecting Ollama endpoint {endpoint.url} for {self.eject_seconds:.0f}s")
+        endpoint.ejected_until = time.time() + self.eject_seconds
+
+    def check_health(self):
+        """Refresh loaded and installed models of every endpoint; eject unreachable ones"""
+        for endpoint in self.endpoints:
+            try:
+                loaded = get_transport().get(f"{endpoint.url}/api/ps", timeout=5)
+                installed = get_transport().get(f"{endpoint.url}/api/tags", timeout=5)
+                ok = loaded.status_code == 200 and installed.status_code == 200
+            except requests.RequestException:
+                ok = False
+
+            with self._lock:
+                if not ok:
+                    self._eject(endpoint)
+                    continue
+                if not endpoint.healthy:
+                    logger.info(f"Readmitting Ollama endpoint {endpoint.url}")
+                endpoint.ejected_until = 0.0
+                endpoint.consecutive_failures = 0
+                endpoint.loaded = {m.get('name') for m in loaded.json().get('models', [])}
+                endpoint.installed = {m.get('name') for m in installed.json().get('models', [])}
+                endpoint.missing -= endpoint.installed
+
+    def start(self):
+        """Run health checks in the background (only useful with more than one endpoint)"""
+        if self._thread is None and len(self.endpoints) > 1:
+            self._thread = threading.Thread(target=self._health_loop, name="ollama-pool-health", daemon=True)
+            self._thread.start()
+
+    def _health_loop(self):
+        while True:
+            try:
+                self.check_health()
+            except Exception as e:
+                logger.warning(f"Ollama health check failed: {e}")
+            time.sleep(self.health_interval)
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {
+                    'url': e.url,
+                    'healthy': e.healthy,
+                    'outstanding': e.outstanding,
+                    'served': e.served,
+                    'consecutive_failures': e.consecutive_failures,
+                    'loaded_models': sorted(e.loaded),
+                }
+                for e in self.endpoints
+            ]
+
+
+_pools: Dict[str, OllamaPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(api_url: str) -> OllamaPool:
+    """Process-wide pool for a (comma-separated) Ollama URL list"""
+    urls = split_urls(api_url)
+    key = ','.join(urls)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = OllamaPool(
+                urls,
+                health_interval=float(os.getenv('OLLAMA_HEALTH_INTERVAL', '15')),
+                eject_seconds=float(os.getenv('OLLAMA_EJECT_SECONDS', '30')),
+                failure_threshold=int(os.getenv('OLLAMA_EJECT_FAILURES', '3')),
+            )
+            pool.start()
+            _pools[key] = pool
+        return pool
+
+
+def pool_states() -> Dict[str, List[Dict]]:
+    with _pools_lock:
+        pools = dict(_pools)
+    return {key: pool.snapshot() for key, pool in pools.items()}
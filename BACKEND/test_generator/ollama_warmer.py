@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+import requests
+from .http_transport import get_transport
+from .ollama_pool import split_urls
+from .prompt_budget import context_window
+
+logger = logging.getLogger("ollama-warmer")
+
+PULL_READ_TIMEOUT = 300  # Longest silence tolerated between two progress events
+PRELOAD_TIMEOUT = 300
+
+
+class KeepAlivePolicy:
+    """Chooses Ollama's ``keep_alive`` per model from recent traffic.
+
+    A model that served at least ``busy_requests`` requests in the last
+    ``window`` seconds is kept loaded for ``busy``; otherwise Ollama may
+    unload it after ``idle``.
+    """
+
+    def __init__(self, busy: str = "60m", idle: str = "5m", window: float = 1800, busy_requests: int = 3):
+        self.busy = busy
+        self.idle = idle
+        self.window = window
+        self.busy_requests = busy_requests
+        self._requests: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, model_name: str):
+        """Record a request for ``model_name``"""
+        with self._lock:
+            self._requests.setdefault(model_name, deque(maxlen=max(self.busy_requests, 1))).append(time.time())
+
+    def _recent(self, model_name: str) -> int:
+        cutoff = time.time() - self.window
+        return sum(1 for t in self._requests.get(model_name, ()) if t >= cutoff)
+
+    def is_busy(self, model_name: str) -> bool:
+        with self._lock:
+            return self._recent(model_name) >= self.busy_requests
+
+    def keep_alive_for(self, model_name: str) -> str:
+        return self.busy if self.is_busy(model_name) else self.idle
+
+    def busy_models(self) -> List[str]:
+        with self._lock:
+            return [model for model in self._requests if self._recent(model) >= self.busy_requests]
+
+
+keep_alive_policy = KeepAlivePolicy(
+    busy=os.getenv('OLLAMA_KEEP_ALIVE_BUSY', '60m'),
+    idle=os.getenv('OLLAMA_KEEP_ALIVE_IDLE', '5m'),
+    window=float(os.getenv('OLLAMA_BUSY_WINDOW', '1800')),
+    busy_requests=int(os.getenv('OLLAMA_BUSY_REQUESTS', '3')),
+)
+
+def runner_options(model_name: str) -> Dict:
+    """Options that decide how Ollama loads ``model_name`` into memory.
+
+    Ollama reloads a model whose context size changes between requests, so
+    preloads, verification and generation all send these same options.
+    """
+    return {"num_ctx": context_window(model_name)}
+
+
+# Latest pull status per model, e.g. {'status': 'pulling 3a43f9...', 'percent': 40}
+pull_progress: Dict[str, Dict] = {}
+
+
+def pull_model(api_url: str, model_name: str) -> bool:
+    """Pull a model, following /api/pull's progress stream until it reports success"""
+    logger.info(f"Pulling model {model_name} from {api_url}...")
+    try:
+        response = get_transport().post(
+            f"{api_url}/api/pull",
+            json={"name": model_name, "stream": True},
+            timeout=PULL_READ_TIMEOUT,
+            stream=True
+        )
+        with response:
+            if response.status_code != 200:
+                logger.error(f"Failed to initiate pull for model {model_name}: {response.status_code} {response.text}")
+                return False
+
+            last_logged = None
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event.get('error'):
+                    logger.error(f"Pull of {model_name} failed: {event['error']}")
+                    pull_progress[model_name] = {'status': 'error', 'error': event['error']}
+                    return False
+
+                status = event.get('status', '')
+                progress = {'status': status}
+                if event.get('total'):
+                    progress['percent'] = int(event.get('completed', 0) * 100 / event['total'])
+                pull_progress[model_name] = progress
+
+                # Log each status change and every 10% of a layer download
+                marker = (status, progress.get('percent', 0) // 10)
+                if marker != last_logged:
+                    percent = f" {progress['percent']}%" if 'percent' in progress else ""
+                    logger.info(f"Pull {model_name}: {status}{percent}")
+                    last_logged = marker
+
+                if status == 'success':
+                    logger.info(f"Successfully pulled model {model_name}")
+                    return True
+
+        logger.error(f"Pull stream for {model_name} ended without success")
+        return False
+
+    except (requests.RequestException, ValueError) as e:
+        logger.error(f"Error pulling model {model_name}: {e}")
+        pull_progress[model_name] = {'status': 'error', 'error': str(e)}
+        return False
+
+
+class OllamaWarmer:
+    """Keeps configured and busy models loaded so requests skip the cold start.
+
+    Every ``interval`` seconds it compares, on each server of ``api_url`` (one
+    URL or a comma-separated list), the models Ollama has in memory
+    (``/api/ps``) with the configured ones plus those the keep-alive policy
+    considers busy, pulls any that are missing from the server, and loads the
+    rest with an empty prompt.
+    """
+
+    def __init__(self, api_url: str, models: List[str], interval: float = 300,
+                 policy: KeepAlivePolicy = keep_alive_policy):
+        self.api_url = api_url
+        self.urls = split_urls(api_url)
+        self.models = list(models)
+        self.interval = interval
+        self.policy = policy
+        self.last_run = None
+        self.preloads = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def loaded_models(self, url: str) -> Optional[Set[str]]:
+        """Models currently in Ollama's memory, or None if the server cannot be reached"""
+        try:
+            response = get_transport().get(f"{url}/api/ps", timeout=10)
+            if response.status_code != 200:
+                return None
+            return {m.get('name') for m in response.json().get('models', [])}
+        except requests.RequestException:
+            return None
+
+    def installed_models(self, url: str) -> Set[str]:
+        try:
+            response = get_transport().get(f"{url}/api/tags", timeout=10)
+            if response.status_code != 200:
+                return set()
+            return {m.get('name') for m in response.json().get('models', [])}
+        except requests.RequestException:
+            return set()
+
+    def preload(self, url: str, model_name: str, keep_alive: str) -> bool:
+        """Load a model into memory without generating anything"""
+        try:
+            started = time.time()
+            response = get_transport().post(
+                f"{url}/api/generate",
+                json={"model": model_name, "prompt": "", "stream": False, "keep_alive": keep_alive,
+                      "options": runner_options(model_name)},
+                timeout=PRELOAD_TIMEOUT
+            )
+            if response.status_code != 200:
+                logger.warning(f"Preload of {model_name} on {url} failed: {response.status_code} {response.text}")
+                return False
+            self.preloads += 1
+            logger.info(f"Loaded {model_name} on {url} in {time.time() - started:.1f}s (keep_alive {keep_alive})")
+            return True
+        except requests.RequestException as e:
+            logger.warning(f"Preload of {model_name} on {url} failed: {e}")
+            return False
+
+    def warm_once(self):
+        self.last_run = time.time()
+        targets = list(dict.fromkeys(self.models + self.policy.busy_models()))
+        for url in self.urls:
+            self._warm(url, targets)
+
+    def _warm(self, url: str, targets: List[str]):
+        loaded = self.loaded_models(url)
+        if loaded is None:
+            logger.warning(f"Ollama at {url} is not reachable; skipping warm-up")
+            return
+
+        cold = [model for model in targets if model not in loaded]
+        if not cold:
+            return
+
+        installed = self.installed_models(url)
+        for model in cold:
+            if model not in installed and not pull_model(url, model):
+                continue
+            # Configured models stay loaded like busy ones; others follow the traffic
+            keep_alive = self.policy.busy if model in self.models else self.policy.keep_alive_for(model)
+            self.preload(url, model, keep_alive)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ollama-warmer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.warm_once()
+            except Exception as e:
+                logger.warning(f"Warm-up pass failed: {e}")
+            self._stop.wait(self.interval)
+
+    def snapshot(self) -> Dict:
+        return {
+            'urls': self.urls,
+            'models': self.models,
+            'busy_models': self.policy.busy_models(),
+            'last_run': self.last_run,
+            'preloads': self.preloads,
+            'pulls': dict(pull_progress),
+        }
+
+
+_warmer = None
+_warmer_lock = threading.Lock()
+
+
+def start_warmer(api_url: str, models: List[str]) -> OllamaWarmer:
+    """Start the process-wide warmer (interval from OLLAMA_WARM_INTERVAL)"""
+    global _warmer
+    with _warmer_lock:
+        if _warmer is None:
+            _warmer = OllamaWarmer(api_url, models, interval=float(os.getenv('OLLAMA_WARM_INTERVAL', '300')))
+            _warmer.start()
+        return _warmer
+
+
+def get_warmer() -> Optional[OllamaWarmer]:
+    return _warmer
@@ -0,0 +1,192 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger("parse-cache")
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'parse_cache')
+DEFAULT_MEMORY_ENTRIES = 512
+DEFAULT_DISK_BYTES = 64 * 1024 * 1024
+
+
+class ParseCache:
+    """Two-tier cache of parsed class info keyed by source content hash.
+
+    The first tier is an in-process LRU, the second a directory of JSON files
+    that survives restarts. Both tiers are size bounded: the LRU by entry
+    count, the disk store by total bytes (least recently used files go first).
+    """
+
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 max_memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 max_disk_bytes: int = DEFAULT_DISK_BYTES):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self._disk_bytes = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(source_code: str, version: str) -> str:
+        """Cache key for a source text parsed by a given parser version"""
+        digest = hashlib.sha256()
+        digest.update(version.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(source_code.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            info = self._memory.get(key)
+            if info is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return info
+
+        info = self._read_disk(key)
+        with self._lock:
+            if info is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, info)
+        return info
+
+    def put(self, key: str, info: Dict):
+        with self._lock:
+            self._remember(key, info)
+        self._write_disk(key, info)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'memory_entries': len(self._memory),
+            'disk_bytes': self._disk_bytes or 0,
+        }
+
+    def _remember(self, key: str, info: Dict):
+        self._memory[key] = info
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    # ----- Disk tier ----- #
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Dict]:
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            os.utime(path)  # Mark as recently used for eviction
+            return info
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable parse cache entry {path}: {e}")
+            return None
+
+    def _write_disk(self, key: str, info: Dict):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data = json.dumps(info)
+            try:
+                replaced = os.path.getsize(path)  # Overwriting an entry only adds the difference
+            except OSError:
+                replaced = 0
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write parse cache entry {path}: {e}")
+            return
+
+        # Directory scans and deletes happen outside the lock so lookups never wait on them
+        with self._lock:
+            known = self._disk_bytes is not None
+            if known:
+                self._disk_bytes += len(data) - replaced
+        if not known:
+            total = sum(size for _, size, _ in self._scan_disk())
+            with self._lock:
+                if self._disk_bytes is None:
+                    self._disk_bytes = total
+        with self._lock:
+            over_budget = self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _scan_disk(self):
+        for root, dirs, files in os.walk(self.cache_dir):
+            for file in files:
+                if file.endswith('.json'):
+                    path = os.path.join(root, file)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    def _evict_disk(self):
+        """Delete least recently used files until the store is at 80% of its budget"""
+        if not self._evict_lock.acquire(blocking=False):
+            return  # Another thread is already evicting
+        try:
+            with self._lock:
+                counted = self._disk_bytes
+            entries = sorted(self._scan_disk(), key=lambda e: e[2])
+            total = sum(size for _, size, _ in entries)
+            target = self.max_disk_bytes * 0.8
+            for path, size, _ in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    continue
+            with self._lock:
+                # Keep what other threads wrote while the scan ran
+                self._disk_bytes = total + (self._disk_bytes - counted)
+            logger.info(f"Parse cache evicted down to {total} bytes")
+        finally:
+            self._evict_lock.release()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_parse_cache() -> ParseCache:
+    """Process-wide parse cache, configured from the environment on first use"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            cache_dir = os.getenv('PARSE_CACHE_DIR', DEFAULT_CACHE_DIR)
+            _default_cache = ParseCache(
+                cache_dir=cache_dir or None,
+                max_memory_entries=int(os.getenv('PARSE_CACHE_MEMORY_ENTRIES', DEFAULT_MEMORY_ENTRIES)),
+                max_disk_bytes=int(os.getenv('PARSE_CACHE_DISK_BYTES', DEFAULT_DISK_BYTES)),
+            )
+        return _default_cache
@@ -1,17 +1,32 @@
+import copy
 import javalang
 import logging
+from .parse_cache import ParseCache, get_parse_cache
+from .java_lexer import scan_java, signature_source
 
 logger = logging.getLogger("test-generator")
 
+# Bump whenever get_class_info() output changes so cached results are not reused
+PARSER_VERSION = "3"
+
 
 class JavaClassParser:
-    def __init__(self, file_path=None, source_code=None):
+    def __init__(self, file_path=None, source_code=None, cache=None, signatures_only=False):
         self.file_path = file_path
         self.source_code = source_code
+        # Signature-only mode empties method bodies before parsing: declarations,
+        # fields and member headers are identical, but no statement ASTs are built
+        self.signatures_only = signatures_only
         self.class_name = None
         self.package_name = None
         self.methods = []
         self.imports = []
+        self.fields = []
+        self.constructors = []
+        self.type_references = []
+        self.types = []
+        self.error = None
+        self.cache = cache if cache is not None else get_parse_cache()
 
     @property
     def package(self):
@@ -25,12 +40,33 @@ class JavaClassParser:
                 with open(self.file_path, 'r', encoding='utf-8') as file:
                     self.source_code = file.read()
 
-            tree = javalang.parse.parse(self.source_code)
+            version = PARSER_VERSION + ('-signatures' if self.signatures_only else '')
+            cache_key = ParseCache.make_key(self.source_code, version)
+            cached_info = self.cache.get(cache_key)
+            if cached_info is not None:
+                self._apply_class_info(cached_info)
+                if self.error:
+                    logger.error(f"❌ {self.error}")
+                    return False
+                logger.info(f"📦 Generating test for: {self.class_name} (cached parse)")
+                return True
+
+            if self.signatures_only:
+                tree = javalang.parse.parse(signature_source(self.source_code))
+            else:
+                tree = javalang.parse.parse(self.source_code)
 
             if tree.package:
                 self.package_name = tree.package.name
 
             self.imports = [imp.path for imp in tree.imports]
+            self.type_references = self._extract_type_references(tree)
+            self.types = []
+            for type_decl in tree.types:
+                self._collect_types(type_decl, None)
+            if self.signatures_only:
+                # `new` expressions inside the emptied bodies come from the lexer instead
+                self.type_references = sorted(set(self.type_references) | set(scan_java(self.source_code)['new_types']))
 
             # Only extract top-level class declarations (not nested/inner)
             top_level_classes = [
@@ -39,7 +75,10 @@ class JavaClassParser:
             ]
 
             if not top_level_classes:
-                logger.error("❌ No top-level classes found in the file.")
+                self.error = "No top-level classes found in the file."
+                logger.error(f"❌ {self.error}")
+                # Interface/enum-only files still carry their type models; cache them too
+                self.cache.put(cache_key, self._cacheable_info())
                 return False
 
             # Prefer public class if multiple
@@ -55,12 +94,104 @@ class JavaClassParser:
             logger.info(f"📦 Generating test for: {self.class_name}")
 
             self._extract_methods(main_class)
+
+            self.cache.put(cache_key, self._cacheable_info())
             return True
 
         except Exception as e:
+            detail = str(e) or getattr(e, 'description', '') or repr(e)
+            self.error = f"{type(e).__name__}: {detail}"
             logger.error(f"Error parsing Java source: {e}")
             return False
 
+    def _extract_type_references(self, tree):
+        """Collect type names used by fields, parameters, return types, supertypes and `new` expressions"""
+        names = set()
+        for _, node in tree.filter(javalang.tree.FieldDeclaration):
+            self._collect_type_names(node.type, names)
+        for _, node in tree.filter(javalang.tree.FormalParameter):
+            self._collect_type_names(node.type, names)
+        for _, node in tree.filter(javalang.tree.MethodDeclaration):
+            self._collect_type_names(node.return_type, names)
+        for _, node in tree.filter(javalang.tree.ClassCreator):
+            self._collect_type_names(node.type, names)
+        for _, node in tree.filter(javalang.tree.TypeDeclaration):
+            supertypes = getattr(node, 'extends', None) or []
+            if not isinstance(supertypes, list):
+                supertypes = [supertypes]
+            for supertype in supertypes + list(getattr(node, 'implements', None) or []):
+                self._collect_type_names(supertype, names)
+        return sorted(names)
+
+    def _collect_type_names(self, type_node, names):
+        """Add the dotted name of a reference type and of its generic arguments"""
+        if not isinstance(type_node, javalang.tree.ReferenceType):
+            return
+        parts = []
+        while type_node is not None:
+            parts.append(type_node.name)
+            for argument in type_node.arguments or []:
+                self._collect_type_names(getattr(argument, 'type', None), names)
+            type_node = type_node.sub_type
+        names.add('.'.join(parts))
+
+    def _collect_types(self, type_decl, outer):
+        """Append a compact model of ``type_decl`` and of every type nested in it"""
+        if isinstance(type_decl, javalang.tree.EnumDeclaration):
+            members = type_decl.body.declarations if type_decl.body else []
+        else:
+            members = type_decl.body or []
+
+        qualified_name = f"{outer['qualified_name']}.{type_decl.name}" if outer else type_decl.name
+        extends = getattr(type_decl, 'extends', None) or []
+        if not isinstance(extends, list):
+            extends = [extends]
+
+        model = {
+            'name': type_decl.name,
+            'kind': type(type_decl).__name__.replace('Declaration', '').lower(),
+            'qualified_name': qualified_name,
+            'fqn': f"{self.package_name}.{qualified_name}" if self.package_name else qualified_name,
+            'outer': outer['qualified_name'] if outer else None,
+            'modifiers': sorted(type_decl.modifiers),
+            'extends': [self._type_name(t) for t in extends],
+            'implements': [self._type_name(t) for t in getattr(type_decl, 'implements', None) or []],
+            'fields': [],
+            'constructors': [],
+            'methods': [],
+        }
+        if isinstance(type_decl, javalang.tree.EnumDeclaration) and type_decl.body:
+            model['constants'] = [constant.name for constant in type_decl.body.constants]
+        self.types.append(model)
+
+        for member in members:
+            if isinstance(member, javalang.tree.FieldDeclaration):
+                for decl in member.declarators:
+                    model['fields'].append({'name': decl.name, 'type': self._type_name(member.type)})
+            elif isinstance(member, javalang.tree.ConstructorDeclaration):
+                model['constructors'].append({'name': type_decl.name, 'parameters': self._parameters(member)})
+            elif isinstance(member, javalang.tree.MethodDeclaration):
+                model['methods'].append({
+                    'name': member.name,
+                    'return_type': self._type_name(member.return_type) if member.return_type else 'void',
+                    'parameters': self._parameters(member),
+                    'modifiers': sorted(member.modifiers)
+                })
+            elif isinstance(member, javalang.tree.TypeDeclaration):
+                self._collect_types(member, model)
+
+    def _parameters(self, callable_decl):
+        return [{'type': self._type_name(param.type), 'name': param.name} for param in callable_decl.parameters]
+
+    def _type_name(self, type_node):
+        """Dotted type name with array dimensions, e.g. ``Map.Entry[]``"""
+        parts = []
+        node = type_node
+        while node is not None:
+            parts.append(node.name)
+            node = getattr(node, 'sub_type', None)
+        return '.'.join(parts) + '[]' * len(getattr(type_node, 'dimensions', None) or [])
+
     def _is_inner_class(self, path):
         """Returns True if the class is nested inside another class."""
         return any(isinstance(node, javalang.tree.ClassDeclaration) for node in path[:-1])
@@ -105,6 +236,24 @@ class JavaClassParser:
                 'modifiers': list(method.modifiers)
             })
 
+    def _cacheable_info(self):
+        class_info = copy.deepcopy(self.get_class_info())
+        class_info.pop('file_path')
+        class_info['error'] = self.error
+        return class_info
+
+    def _apply_class_info(self, class_info):
+        class_info = copy.deepcopy(class_info)
+        self.package_name = class_info['package']
+        self.imports = class_info['imports']
+        self.class_name = class_info['class_name']
+        self.methods = class_info['methods']
+        self.constructors = class_info['constructors']
+        self.fields = class_info['fields']
+        self.type_references = class_info['type_references']
+        self.types = class_info['types']
+        self.error = class_info.get('error')
+
     def get_class_info(self):
         return {
             'file_path': str(self.file_path) if self.file_path else None,
@@ -113,6 +262,8 @@ class JavaClassParser:
             'class_name': self.class_name,
             'methods': self.methods,
             'constructors': self.constructors,
-            'fields': self.fields
+            'fields': self.fields,
+            'type_references': self.type_references,
+            'types': self.types
         }
 
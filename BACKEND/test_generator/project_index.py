@@ -0,0 +1,358 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional
+from .java_lexer import primary_type, scan_java
+
+logger = logging.getLogger("project-index")
+
+INDEX_SUFFIX = ".index.json"
+INDEX_VERSION = 5
+
+_PACKAGE_PATTERN = re.compile(r'^\s*package\s+([\w.]+)\s*;', re.MULTILINE)
+_IMPORT_PATTERN = re.compile(r'^\s*import\s+(?:static\s+)?([\w.]+(?:\.\*)?)\s*;', re.MULTILINE)
+
+# Naming conventions used to tag the architectural role of a class
+ROLE_MARKERS = [
+    ('Service', ('Service',)),
+    ('Repository', ('Repository',)),
+    ('Controller', ('Controller',)),
+    ('Entity', ('Model', 'Entity')),
+    ('DTO', ('Request', 'Response')),
+    ('Config', ('Config',)),
+]
+
+
+class ProjectIndex:
+    """Symbol index of the Java files under a project root.
+
+    Built once (normally at upload time) and persisted next to the extracted
+    tree as ``<root>.index.json`` so analyzers can answer "where is class X"
+    and "which Java files exist" with dictionary lookups instead of walking
+    and re-reading the directory on every request.
+    """
+
+    _cache: Dict[str, "ProjectIndex"] = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, root: str):
+        self.root = root
+        self.entries: Dict[str, Dict] = {}
+        self._by_name: Dict[str, List[str]] = {}
+        self._by_fqn: Dict[str, str] = {}
+        self._features: Dict[str, Dict] = {}
+        self._lock = threading.RLock()
+
+    # ----- Construction ----- #
+
+    @classmethod
+    def index_path_for(cls, root: str) -> str:
+        """Location of the persisted index for a project root"""
+        return os.path.normpath(root) + INDEX_SUFFIX
+
+    @classmethod
+    def build(cls, root: str) -> "ProjectIndex":
+        """Walk ``root`` once and index every Java file.
+
+        Sub-directories that already have a persisted index (previous uploads)
+        are merged from disk instead of being walked again.
+        """
+        index = cls(root)
+        for dir_path, dirs, files in os.walk(root):
+            for sub_dir in list(dirs):
+                sub_root = os.path.join(dir_path, sub_dir)
+                nested = cls.load(sub_root)
+                if nested is not None:
+                    dirs.remove(sub_dir)
+                    index._merge(nested)
+
+            for file in files:
+                if file.endswith('.java'):
+                    full_path = os.path.join(dir_path, file)
+                    entry = _extract_entry(full_path, os.path.relpath(full_path, root))
+                    if entry:
+                        index.entries[entry['path']] = entry
+
+        index._rebuild_lookups()
+        logger.info(f"Indexed {len(index.entries)} Java files under {root}")
+        return index
+
+    @classmethod
+    def load(cls, root: str) -> Optional["ProjectIndex"]:
+        """Load a persisted index for ``root``, or None if there is none"""
+        index_path = cls.index_path_for(root)
+        if not os.path.exists(index_path):
+            return None
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_VERSION:
+                return None
+            index = cls(root)
+            index.entries = data.get('entries', {})
+            index._rebuild_lookups()
+            return index
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable project index {index_path}: {e}")
+            return None
+
+    def save(self) -> str:
+        """Persist the index next to the project tree"""
+        index_path = self.index_path_for(self.root)
+        tmp_path = index_path + '.tmp'
+        with self._lock, open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'entries': self.entries}, f)
+        os.replace(tmp_path, index_path)
+        return index_path
+
+    @classmethod
+    def for_root(cls, root: str) -> "ProjectIndex":
+        """Return the process-wide index for ``root``, loading or building it once"""
+        with cls._cache_lock:
+            index = cls._cache.get(root)
+            if index is None:
+                index = cls.load(root) or cls.build(root)
+                cls._cache[root] = index
+            return index
+
+    @classmethod
+    def cached_roots(cls) -> List[str]:
+        with cls._cache_lock:
+            return list(cls._cache)
+
+    @classmethod
+    def is_persisted(cls, root: str) -> bool:
+        return os.path.exists(cls.index_path_for(root))
+
+    @classmethod
+    def invalidate(cls, path: str):
+        """Drop cached indexes whose root contains ``path``"""
+        abs_path = os.path.abspath(path)
+        with cls._cache_lock:
+            for root in list(cls._cache):
+                abs_root = os.path.abspath(root)
+                if abs_path == abs_root or abs_path.startswith(abs_root + os.sep):
+                    del cls._cache[root]
+
+    def _merge(self, other: "ProjectIndex"):
+        prefix = os.path.relpath(other.root, self.root)
+        for rel_path, entry in other.entries.items():
+            merged = dict(entry)
+            merged['path'] = os.path.join(prefix, rel_path)
+            self.entries[merged['path']] = merged
+
+    def _rebuild_lookups(self):
+        self._by_name = {}
+        self._by_fqn = {}
+        self._features = {}
+        for rel_path in self.entries:
+            self._add_lookups(rel_path)
+
+    def _add_lookups(self, rel_path: str):
+        entry = self.entries[rel_path]
+        self._by_name.setdefault(entry['class_name'], []).append(rel_path)
+        if entry.get('fqn'):
+            self._by_fqn[entry['fqn']] = rel_path
+        self._features[rel_path] = {
+            'path': self.abs_path(rel_path),
+            'name': os.path.splitext(os.path.basename(rel_path))[0],
+            'package': entry['package'],
+            'imports': frozenset(entry['imports']),
+            'roles': frozenset(entry.get('roles', ())),
+        }
+
+    def _drop_lookups(self, rel_path: str):
+        entry = self.entries[rel_path]
+        candidates = self._by_name.get(entry['class_name'], [])
+        if rel_path in candidates:
+            candidates.remove(rel_path)
+        if not candidates:
+            self._by_name.pop(entry['class_name'], None)
+        if self._by_fqn.get(entry.get('fqn')) == rel_path:
+            del self._by_fqn[entry['fqn']]
+        self._features.pop(rel_path, None)
+
+    # ----- Incremental updates ----- #
+
+    def update_files(self, paths: List[str]) -> Dict[str, List[str]]:
+        """Re-index only the given files (added, edited or deleted).
+
+        A file is re-read only when its size or mtime changed, and its entry
+        is replaced only when the content hash differs. Returns the delta as
+        root-relative paths.
+        """
+        delta = {'added': [], 'updated': [], 'removed': []}
+        with self._lock:
+            for path in paths:
+                if not path.endswith('.java'):
+                    continue
+                rel_path = os.path.relpath(path, self.root)
+                if rel_path.startswith(os.pardir):
+                    continue
+                change = self._update_file(rel_path)
+                if change:
+                    delta[change].append(rel_path)
+        return delta
+
+    def refresh(self) -> Dict[str, List[str]]:
+        """Stat every file under the root and re-index only what changed"""
+        seen = set()
+        for dir_path, dirs, files in os.walk(self.root):
+            for file in files:
+                if file.endswith('.java'):
+                    seen.add(os.path.relpath(os.path.join(dir_path, file), self.root))
+
+        with self._lock:
+            delta = {'added': [], 'updated': [], 'removed': []}
+            for rel_path in seen | set(self.entries):
+                change = self._update_file(rel_path)
+                if change:
+                    delta[change].append(rel_path)
+        return delta
+
+    def _update_file(self, rel_path: str) -> Optional[str]:
+        full_path = self.abs_path(rel_path)
+        current = self.entries.get(rel_path)
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            if current is None:
+                return None
+            self._drop_lookups(rel_path)
+            del self.entries[rel_path]
+            return 'removed'
+
+        if current and current['size'] == stat.st_size and current['mtime'] == stat.st_mtime:
+            return None
+
+        entry = _extract_entry(full_path, rel_path)
+        if entry is None:
+            return None
+        if current and current.get('sha256') == entry['sha256']:
+            current['mtime'] = entry['mtime']  # Touched but not edited
+            return None
+
+        if current:
+            self._drop_lookups(rel_path)
+        self.entries[rel_path] = entry
+        self._add_lookups(rel_path)
+        return 'updated' if current else 'added'
+
+    # ----- Lookups ----- #
+
+    def abs_path(self, rel_path: str) -> str:
+        return os.path.join(self.root, rel_path)
+
+    def java_files(self) -> List[str]:
+        """All indexed Java files, as paths under the root"""
+        with self._lock:
+            return [self.abs_path(rel_path) for rel_path in self.entries]
+
+    def features(self) -> List[Dict]:
+        """Precomputed scoring features (name, package, import set, roles) of every file"""
+        with self._lock:
+            return list(self._features.values())
+
+    def path_for_fqn(self, fqn: str) -> Optional[str]:
+        """Root-relative path of the file declaring a fully-qualified class name"""
+        return self._by_fqn.get(fqn)
+
+    def paths_for_name(self, class_name: str) -> List[str]:
+        """Root-relative paths of every file declaring a simple class name"""
+        return list(self._by_name.get(class_name, []))
+
+    def find_class(self, class_name: str) -> Optional[str]:
+        """Path of the first file declaring ``class_name`` (simple or fully-qualified)"""
+        rel_path = self._by_fqn.get(class_name)
+        if rel_path is None:
+            candidates = self._by_name.get(class_name)
+            rel_path = candidates[0] if candidates else None
+        return self.abs_path(rel_path) if rel_path else None
+
+    def resolve(self, name: str, package: str = "", imports: List[str] = ()) -> Optional[str]:
+        """Root-relative path of the file declaring ``name`` as seen from a compilation unit.
+
+        Follows Java's lookup order: fully-qualified name, single-type import,
+        same package, then wildcard imports. A simple name that is none of
+        those resolves only if exactly one file in the project declares it,
+        so an ambiguous ``User`` or ``Config`` is never guessed.
+        """
+        if '.' in name:
+            rel_path = self._by_fqn.get(name)
+            if rel_path:
+                return rel_path
+            name = name.split('.')[0]  # Outer.Inner resolves through Outer
+
+        for imported in imports:
+            if imported.endswith('.' + name):
+                return self._by_fqn.get(imported)
+
+        if package:
+            rel_path = self._by_fqn.get(f"{package}.{name}")
+            if rel_path:
+                return rel_path
+
+        for imported in imports:
+            if imported.endswith('.*'):
+                rel_path = self._by_fqn.get(f"{imported[:-2]}.{name}")
+                if rel_path:
+                    return rel_path
+
+        candidates = self._by_name.get(name, [])
+        return candidates[0] if len(candidates) == 1 else None
+
+    def entry_for(self, file_path: str) -> Optional[Dict]:
+        """Index entry for a file path under the root"""
+        rel_path = os.path.relpath(file_path, self.root)
+        return self.entries.get(rel_path)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def _extract_entry(full_path: str, rel_path: str) -> Optional[Dict]:
+    """Read one Java file and extract the symbol data stored in the index"""
+    try:
+        stat = os.stat(full_path)
+        with open(full_path, 'rb') as f:
+            raw = f.read()
+    except OSError as e:
+        logger.warning(f"Could not index {full_path}: {e}")
+        return None
+
+    content = raw.decode('utf-8', errors='replace')
+    package, imports = extract_header(content)
+
+    # The primary type shares the file name; fall back to the first top-level type.
+    # The lexer ignores declarations that only appear in comments or strings.
+    class_name = os.path.splitext(os.path.basename(full_path))[0]
+    facts = scan_java(content)
+    if class_name not in [declared['name'] for declared in facts['types'] if declared['outer'] is None]:
+        class_name = primary_type(facts) or class_name
+
+    return {
+        'class_name': class_name,
+        'fqn': f"{package}.{class_name}" if package else class_name,
+        'package': package,
+        'path': rel_path,
+        'imports': imports,
+        'roles': role_tags(os.path.splitext(os.path.basename(full_path))[0]),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'sha256': hashlib.sha256(raw).hexdigest(),
+    }
+
+
+def extract_header(content: str):
+    """Return the package name and imported names declared by a Java source"""
+    package_match = _PACKAGE_PATTERN.search(content)
+    package = package_match.group(1) if package_match else ""
+    return package, _IMPORT_PATTERN.findall(content)
+
+
+def role_tags(class_name: str) -> List[str]:
+    """Architectural roles (Service, Repository, ...) suggested by a class name"""
+    return [role for role, markers in ROLE_MARKERS if any(marker in class_name for marker in markers)]
@@ -0,0 +1,102 @@
+import os
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger("prompt-budget")
+
+CHARS_PER_TOKEN = 4
+DEFAULT_OLLAMA_CONTEXT = 8192
+DEFAULT_GEMINI_CONTEXT = 32768
+DEFAULT_OLLAMA_OUTPUT = 2048
+DEFAULT_GEMINI_OUTPUT = 8192
+# Below this many free tokens no further file section is worth assembling
+MIN_SECTION_TOKENS = 32
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for code and English text (about four characters per token)"""
+    return (len(text or '') + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _configured_windows() -> Dict[str, int]:
+    """Per-model overrides from LLM_CONTEXT_WINDOWS, e.g. "codellama:13b=16384,llama3=8192" """
+    windows = {}
+    for item in os.getenv('LLM_CONTEXT_WINDOWS', '').split(','):
+        name, _, tokens = item.partition('=')
+        if name.strip() and tokens.strip().isdigit():
+            windows[name.strip()] = int(tokens)
+    return windows
+
+
+def _is_gemini(model_name: str) -> bool:
+    return (model_name or '').startswith('gemini')
+
+
+def context_window(model_name: str) -> int:
+    """Context size in tokens used for a model; also sent to Ollama as num_ctx"""
+    windows = _configured_windows()
+    if model_name in windows:
+        return windows[model_name]
+    # "llama3" also configures "llama3:8b"
+    family = (model_name or '').split(':')[0]
+    if family in windows:
+        return windows[family]
+    if _is_gemini(model_name):
+        return int(os.getenv('GEMINI_CONTEXT_TOKENS', DEFAULT_GEMINI_CONTEXT))
+    return int(os.getenv('OLLAMA_CONTEXT_TOKENS', DEFAULT_OLLAMA_CONTEXT))
+
+
+def prompt_budget(model_name: str) -> int:
+    """Tokens available for the prompt once room for the response is set aside"""
+    default_output = DEFAULT_GEMINI_OUTPUT if _is_gemini(model_name) else DEFAULT_OLLAMA_OUTPUT
+    output = int(os.getenv('LLM_OUTPUT_TOKENS', default_output))
+    return max(0, context_window(model_name) - output)
+
+
+class PromptBudget:
+    """Greedy token budget for assembling a prompt from sections in priority order.
+
+    Callers first ``reserve`` the fixed template, then ``take`` sections from
+    most to least important. A section that does not fit is replaced by its
+    cheaper fallback (e.g. signatures only) when that fits, otherwise dropped.
+    """
+
+    def __init__(self, total: int):
+        self.total = total
+        self.used = 0
+        self.dropped = 0
+
+    @classmethod
+    def for_model(cls, model_name: str) -> 'PromptBudget':
+        return cls(prompt_budget(model_name))
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.total - self.used)
+
+    def reserve(self, text: str):
+        self.used += estimate_tokens(text)
+
+    def take(self, text: str, fallback: Optional[str] = None, required: bool = False) -> Optional[str]:
+        """Return ``text`` or ``fallback``, whichever fits first, and charge it to the budget.
+
+        A required section is always returned (its fallback if the full text
+        does not fit) even when that overruns the budget.
+        """
+        for candidate in (text, fallback):
+            if candidate is not None and estimate_tokens(candidate) <= self.remaining:
+                self.used += estimate_tokens(candidate)
+                return candidate
+
+        if required:
+            candidate = fallback if fallback is not None else text
+            logger.warning(f"Required prompt section ({estimate_tokens(candidate)} tokens) exceeds the "
+                           f"remaining budget of {self.remaining} tokens")
+            self.used += estimate_tokens(candidate)
+            return candidate
+
+        self.dropped += 1
+        return None
+
+    def summary(self) -> str:
+        return f"{self.used}/{self.total} tokens used, {self.dropped} sections dropped"
@@ -0,0 +1,169 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("rate-limiter")
+
+MAX_WAIT_SECONDS = 300
+
+
+class _MemoryBuckets:
+    """Token bucket levels kept in this process"""
+
+    def __init__(self):
+        self._levels: Dict[str, Tuple[float, float]] = {}  # name -> (level, updated)
+        self._lock = threading.Lock()
+
+    def take(self, requests: List[Tuple[str, float, float, float]], force: bool = False) -> float:
+        """Atomically take ``amount`` from every (name, amount, capacity, per_second) bucket.
+
+        Returns 0 when taken, otherwise the seconds until all of them could be
+        (nothing is taken then). ``force`` takes regardless, possibly going
+        negative, to account for usage only known afterwards.
+        """
+        now = time.time()
+        with self._lock:
+            levels = {}
+            wait = 0.0
+            for name, amount, capacity, per_second in requests:
+                level, updated = self._levels.get(name, (capacity, now))
+                level = min(capacity, level + (now - updated) * per_second)
+                levels[name] = level
+                if level < amount:
+                    wait = max(wait, (amount - level) / per_second)
+            if wait and not force:
+                return wait
+            for name, amount, _, _ in requests:
+                self._levels[name] = (levels[name] - amount, now)
+            return 0.0
+
+
+class _SqliteBuckets:
+    """Token bucket levels in a SQLite file shared by every process using it"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, level REAL, updated REAL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def take(self, requests: List[Tuple[str, float, float, float]], force: bool = False) -> float:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")  # Serializes the read-modify-write across processes
+            now = time.time()
+            levels = {}
+            wait = 0.0
+            for name, amount, capacity, per_second in requests:
+                row = conn.execute("SELECT level, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+                level, updated = row if row else (capacity, now)
+                level = min(capacity, level + (now - updated) * per_second)
+                levels[name] = level
+                if level < amount:
+                    wait = max(wait, (amount - level) / per_second)
+            if wait and not force:
+                conn.execute("ROLLBACK")
+                return wait
+            for name, amount, _, _ in requests:
+                conn.execute("INSERT OR REPLACE INTO buckets (name, level, updated) VALUES (?,?,?)",
+                             (name, levels[name] - amount, now))
+            conn.execute("COMMIT")
+            return 0.0
+        finally:
+            conn.close()
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute quota for one hosted API.
+
+    ``acquire`` blocks until both buckets have room, so callers queue under
+    the quota instead of collecting 429s. Either limit may be 0 (unlimited).
+    """
+
+    def __init__(self, name: str, rpm: int = 0, tpm: int = 0, db_path: Optional[str] = None):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.buckets = _SqliteBuckets(db_path) if db_path else _MemoryBuckets()
+        self.waits = 0
+        self.waited_seconds = 0.0
+
+    def _requests(self, requests: int, tokens: int) -> List[Tuple[str, float, float, float]]:
+        wanted = []
+        if self.rpm and requests:
+            wanted.append((f"{self.name}:rpm", min(requests, self.rpm), self.rpm, self.rpm / 60.0))
+        if self.tpm and tokens:
+            wanted.append((f"{self.name}:tpm", min(tokens, self.tpm), self.tpm, self.tpm / 60.0))
+        return wanted
+
+    def acquire(self, tokens: int = 0, max_wait: float = MAX_WAIT_SECONDS) -> float:
+        """Wait for one request and ``tokens`` tokens of quota; returns the seconds waited"""
+        wanted = self._requests(1, tokens)
+        if not wanted:
+            return 0.0
+
+        started = time.time()
+        while True:
+            wait = self.buckets.take(wanted)
+            if not wait:
+                break
+            if time.time() - started + wait > max_wait:
+                logger.warning(f"{self.name} quota still exhausted after {time.time() - started:.0f}s; sending anyway")
+                self.buckets.take(wanted, force=True)
+                break
+            time.sleep(wait)
+
+        waited = time.time() - started
+        if waited > 0.01:
+            self.waits += 1
+            self.waited_seconds += waited
+            logger.info(f"Waited {waited:.1f}s for {self.name} quota")
+        return waited
+
+    def charge(self, tokens: int):
+        """Account for tokens only known after the call (e.g. the response)"""
+        wanted = self._requests(0, tokens)
+        if wanted:
+            self.buckets.take(wanted, force=True)
+
+    def throttle(self):
+        """The API answered 429: empty the request bucket so every caller backs off"""
+        if self.rpm:
+            self.buckets.take([(f"{self.name}:rpm", self.rpm, self.rpm, self.rpm / 60.0)], force=True)
+
+    def stats(self) -> Dict:
+        return {'rpm': self.rpm, 'tpm': self.tpm, 'waits': self.waits, 'waited_seconds': round(self.waited_seconds, 1)}
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str = 'gemini') -> Optional[RateLimiter]:
+    """Process-wide limiter for ``name``, from <NAME>_RPM / <NAME>_TPM; None when neither is set.
+
+    With RATE_LIMIT_DB pointing at a SQLite file the quota is shared by every
+    process using that file (e.g. several gunicorn workers).
+    """
+    prefix = name.upper()
+    rpm = int(os.getenv(f'{prefix}_RPM', '0'))
+    tpm = int(os.getenv(f'{prefix}_TPM', '0'))
+    if not rpm and not tpm:
+        return None
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = RateLimiter(name, rpm=rpm, tpm=tpm, db_path=os.getenv('RATE_LIMIT_DB') or None)
+            _limiters[name] = limiter
+        return limiter
+
+
+def limiter_stats() -> Dict[str, Dict]:
+    with _limiters_lock:
+        return {name: limiter.stats() for name, limiter in _limiters.items()}
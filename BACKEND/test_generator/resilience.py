@@ -0,0 +1,202 @@
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Optional
+
+logger = logging.getLogger("resilience")
+
+LATENCY_SAMPLES = 200
+MIN_SAMPLES = 5
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter: uniform in [0, min(cap, base * 2**attempt)]"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+_call_scope = threading.local()
+
+
+@contextmanager
+def cancel_scope(event: threading.Event):
+    """LLM calls made by this thread inside the block stop retrying once ``event`` is set"""
+    previous = getattr(_call_scope, 'cancel', None)
+    _call_scope.cancel = event
+    try:
+        yield
+    finally:
+        _call_scope.cancel = previous
+
+
+def cancelled() -> bool:
+    event = getattr(_call_scope, 'cancel', None)
+    return event is not None and event.is_set()
+
+
+def pause(seconds: float):
+    """Sleep between retries, waking early if the surrounding call was cancelled"""
+    event = getattr(_call_scope, 'cancel', None)
+    if event is not None:
+        event.wait(seconds)
+    else:
+        time.sleep(seconds)
+
+
+class LatencyTracker:
+    """Recent successful call durations per backend/model, used to size timeouts.
+
+    Until enough samples exist the caller's default timeout is used. After
+    that the timeout is ``multiplier`` x the observed p99, kept between
+    ``min_timeout`` and the default so a fast model never waits the full
+    default on a hung request.
+    """
+
+    def __init__(self, multiplier: float = 2.0, min_timeout: float = 30.0):
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=LATENCY_SAMPLES)).append(seconds)
+
+    def percentile(self, key: str, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def timeout_for(self, key: str, default: float) -> float:
+        with self._lock:
+            count = len(self._samples.get(key, ()))
+        if count < MIN_SAMPLES:
+            return default
+        return max(self.min_timeout, min(default, self.percentile(key, 0.99) * self.multiplier))
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            keys = list(self._samples)
+        return {
+            key: {
+                'samples': len(self._samples[key]),
+                'p50': self.percentile(key, 0.5),
+                'p95': self.percentile(key, 0.95),
+                'p99': self.percentile(key, 0.99),
+            }
+            for key in keys
+        }
+
+
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` consecutive failures.
+
+    While open, calls are refused for ``reset_timeout`` seconds; then a single
+    half-open probe is let through and its outcome closes or re-opens it.
+    Wrap each allowed call in ``guard()`` so an unexpected exception counts as
+    a failure and the probe slot is freed however the call ends.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def is_open(self) -> bool:
+        """Refusing calls right now (open and not yet due for a probe)"""
+        with self._lock:
+            return self.state == self.OPEN and time.time() - self.opened_at < self.reset_timeout
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.time() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    @contextmanager
+    def guard(self):
+        """Scope of one call admitted by ``allow``"""
+        try:
+            yield
+        except Exception:
+            self.record_failure()
+            raise
+        finally:
+            self.release()
+
+    def release(self):
+        """End a call without a verdict (e.g. the server rejected the request itself)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit {self.name} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit {self.name} opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.time()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            retry_in = max(0.0, self.reset_timeout - (time.time() - self.opened_at)) if self.state == self.OPEN else 0.0
+            return {'state': self.state, 'consecutive_failures': self.failures, 'retry_in': round(retry_in, 1)}
+
+
+latency_tracker = LatencyTracker(
+    multiplier=float(os.getenv('LLM_TIMEOUT_MULTIPLIER', '2.0')),
+    min_timeout=float(os.getenv('LLM_MIN_TIMEOUT', '30')),
+)
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Process-wide circuit breaker for a backend, configured from LLM_BREAKER_* variables"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv('LLM_BREAKER_FAILURES', '5')),
+                reset_timeout=float(os.getenv('LLM_BREAKER_RESET_SECONDS', '30')),
+            )
+            _breakers[name] = breaker
+        return breaker
+
+
+def breaker_states() -> Dict[str, Dict]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
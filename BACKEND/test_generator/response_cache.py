@@ -0,0 +1,146 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger("response-cache")
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'llm_cache.db')
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_TRAILING_SPACE = re.compile(r'[ \t]+$', re.MULTILINE)
+_BLANK_RUNS = re.compile(r'\n{3,}')
+
+
+class ResponseCache:
+    """SQLite cache of LLM responses keyed by provider, model, temperature and prompt.
+
+    Entries expire after ``ttl`` seconds. When the stored responses exceed
+    ``max_bytes`` the least recently used ones are deleted until the store is
+    back at 80% of its budget.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_TTL_SECONDS,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                provider TEXT,
+                model TEXT,
+                response TEXT,
+                size INTEGER,
+                created_at REAL,
+                last_used REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+        self.conn.commit()
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        """Ignore differences in line endings, trailing spaces and blank-line runs"""
+        prompt = prompt.replace('\r\n', '\n')
+        prompt = _TRAILING_SPACE.sub('', prompt)
+        return _BLANK_RUNS.sub('\n\n', prompt).strip()
+
+    @classmethod
+    def make_key(cls, provider: str, model: str, temperature: float, prompt: str) -> str:
+        digest = hashlib.sha256()
+        for part in (provider, model, f"{temperature:.3f}", cls.normalize_prompt(prompt)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT response FROM responses WHERE key = ? AND created_at > ?", (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, provider: str, model: str, response: str):
+        now = time.time()
+        with self._lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO responses (key, provider, model, response, size, created_at, last_used)
+                VALUES (?,?,?,?,?,?,?)
+            """, (key, provider, model, response, len(response.encode('utf-8')), now, now))
+            self.conn.execute("DELETE FROM responses WHERE created_at <= ?", (now - self.ttl,))
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                self._evict(total)
+            self.conn.commit()
+
+    def _evict(self, total: int):
+        """Delete least recently used responses until the store is at 80% of its budget"""
+        target = self.max_bytes * 0.8
+        rows = self.conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall()
+        for key, size in rows:
+            if total <= target:
+                break
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+        logger.info(f"LLM response cache evicted down to {total} bytes")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, total = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries, 'bytes': total}
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide response cache, or None unless LLM_CACHE_ENABLED=true"""
+    global _default_cache
+    if os.getenv('LLM_CACHE_ENABLED', 'false').lower() != 'true':
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(
+                db_path=os.getenv('LLM_CACHE_PATH', DEFAULT_CACHE_PATH),
+                ttl=float(os.getenv('LLM_CACHE_TTL', DEFAULT_TTL_SECONDS)),
+                max_bytes=int(os.getenv('LLM_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+            )
+        return _default_cache
+
+
+def cached_generate(provider: str, model: str, temperature: float, prompt: str,
+                    generate: Callable[[], Optional[str]], use_cache: bool = True) -> Optional[str]:
+    """Return a cached response for the prompt, or call ``generate`` and cache a non-empty result"""
+    cache = get_response_cache() if use_cache else None
+    if cache is None:
+        return generate()
+
+    key = ResponseCache.make_key(provider, model, temperature, prompt)
+    response = cache.get(key)
+    if response is not None:
+        logger.info(f"Serving cached {provider} response for {model}")
+        return response
+
+    response = generate()
+    if response:
+        cache.put(key, provider, model, response)
+    return response
@@ -1,7 +1,8 @@
 import os
-import re
 from pathlib import Path
 from typing import List, Dict, Set
+from .project_index import ProjectIndex, extract_header
+from .java_lexer import scan_java, base_type_name
 
 class SmartContextSuggester:
     """Suggests relevant context files based on the target Java class"""
@@ -21,116 +22,92 @@ class SmartContextSuggester:
         
         # Extract potential dependencies from target file
         dependencies = self._extract_dependencies(target_content)
+        target = self._target_features(target_content)
         
-        # Find all Java files in the upload directory
-        java_files = self._find_java_files()
-        
-        # Score and rank files based on relevance
+        # Score and rank indexed files using their precomputed features
         scored_files = []
-        for java_file in java_files:
-            if java_file == target_file_path:
+        for candidate in ProjectIndex.for_root(self.upload_directory).features():
+            if candidate['path'] == target_file_path:
                 continue
                 
-            score = self._calculate_relevance_score(target_content, java_file, dependencies)
+            score = self._calculate_relevance_score(target, candidate, dependencies)
             if score > 0:
                 scored_files.append({
-                    'path': java_file,
+                    'path': candidate['path'],
                     'score': score,
-                    'name': os.path.basename(java_file),
-                    'reason': self._get_suggestion_reason(java_file, dependencies)
+                    'name': candidate['name'] + '.java',
+                    'reason': self._get_suggestion_reason(candidate, dependencies)
                 })
         
         # Sort by score and return top suggestions
         scored_files.sort(key=lambda x: x['score'], reverse=True)
         return scored_files[:max_suggestions]
     
+    def _target_features(self, target_content: str) -> Dict:
+        """Compute the target-side features once per request"""
+        package, imports = extract_header(target_content)
+        return {
+            'package': package,
+            'imports': frozenset(imports),
+            'mentions_service': 'Service' in target_content,
+            'mentions_repository': 'Repository' in target_content,
+            'mentions_controller': 'Controller' in target_content,
+        }
+    
     def _extract_dependencies(self, content: str) -> Set[str]:
         """Extract potential class dependencies from content"""
-        dependencies = set()
-        
-        # Import statements
-        import_pattern = r'import\s+(?:static\s+)?([a-zA-Z_][a-zA-Z0-9_.]*);'
-        imports = re.findall(import_pattern, content)
-        for imp in imports:
-            class_name = imp.split('.')[-1]
-            dependencies.add(class_name)
-        
-        # Class references in code
-        class_ref_patterns = [
-            r'(\w+)\s+\w+\s*=',  # Variable declarations
-            r'new\s+(\w+)\s*\(',  # Constructor calls
-            r'(\w+)\.class',  # Class literals
-            r'@Autowired[^}]*?(\w+)\s+\w+',  # Spring autowired fields
-            r'private\s+(\w+)\s+\w+',  # Private fields
-        ]
-        
-        for pattern in class_ref_patterns:
-            matches = re.findall(pattern, content)
-            for match in matches:
-                if match[0].isupper():  # Likely a class name
-                    dependencies.add(match)
+        facts = scan_java(content)
+        dependencies = {imp.split('.')[-1] for imp in facts['imports'] + facts['static_imports'] if not imp.endswith('*')}
+        
+        # Class references in code: variable declarations, fields, constructor calls, class literals
+        references = facts['variable_types'] + [base_type_name(field['type']) for field in facts['fields']]
+        references += [name.split('.')[-1] for name in facts['new_types']] + facts['class_literals']
+        for name in references:
+            if name and name[0].isupper():  # Likely a class name
+                dependencies.add(name)
         
         return dependencies
     
     def _find_java_files(self) -> List[str]:
         """Find all Java files in the upload directory"""
-        java_files = []
-        for root, dirs, files in os.walk(self.upload_directory):
-            for file in files:
-                if file.endswith('.java'):
-                    java_files.append(os.path.join(root, file))
-        return java_files
+        return ProjectIndex.for_root(self.upload_directory).java_files()
     
-    def _calculate_relevance_score(self, target_content: str, candidate_file: str, dependencies: Set[str]) -> int:
-        """Calculate how relevant a file is to the target"""
+    def _calculate_relevance_score(self, target: Dict, candidate: Dict, dependencies: Set[str]) -> int:
+        """Calculate how relevant a file is to the target from precomputed features"""
         score = 0
-        
-        try:
-            with open(candidate_file, 'r', encoding='utf-8') as f:
-                candidate_content = f.read()
-        except Exception:
-            return 0
-        
-        file_name = os.path.splitext(os.path.basename(candidate_file))[0]
+        roles = candidate['roles']
         
         # High score if the class name is in dependencies
-        if file_name in dependencies:
+        if candidate['name'] in dependencies:
             score += 100
         
         # Score based on file type and naming conventions
-        if 'Service' in file_name and 'Service' in target_content:
+        if 'Service' in roles and target['mentions_service']:
             score += 50
-        if 'Repository' in file_name and ('Repository' in target_content or 'Service' in target_content):
+        if 'Repository' in roles and (target['mentions_repository'] or target['mentions_service']):
             score += 50
-        if 'Controller' in file_name and 'Controller' in target_content:
+        if 'Controller' in roles and target['mentions_controller']:
             score += 50
-        if 'Model' in file_name or 'Entity' in file_name:
+        if 'Entity' in roles:
             score += 30
-        if 'Request' in file_name or 'Response' in file_name:
+        if 'DTO' in roles:
             score += 40
-        if 'Config' in file_name or 'Configuration' in file_name:
+        if 'Config' in roles:
             score += 20
         
         # Score based on package similarity
-        target_package = self._extract_package(target_content)
-        candidate_package = self._extract_package(candidate_content)
-        
-        if target_package and candidate_package:
-            package_similarity = self._calculate_package_similarity(target_package, candidate_package)
+        if target['package'] and candidate['package']:
+            package_similarity = self._calculate_package_similarity(target['package'], candidate['package'])
             score += package_similarity * 20
         
         # Score based on shared imports
-        target_imports = set(re.findall(r'import\s+([^;]+);', target_content))
-        candidate_imports = set(re.findall(r'import\s+([^;]+);', candidate_content))
-        shared_imports = len(target_imports.intersection(candidate_imports))
-        score += shared_imports * 5
+        score += len(target['imports'] & candidate['imports']) * 5
         
         return score
     
     def _extract_package(self, content: str) -> str:
         """Extract package declaration from Java content"""
-        package_match = re.search(r'package\s+([^;]+);', content)
-        return package_match.group(1) if package_match else ""
+        return extract_header(content)[0]
     
     def _calculate_package_similarity(self, pkg1: str, pkg2: str) -> float:
         """Calculate similarity between two package names"""
@@ -146,24 +123,25 @@ class SmartContextSuggester:
         
         return common_parts / max(len(parts1), len(parts2))
     
-    def _get_suggestion_reason(self, file_path: str, dependencies: Set[str]) -> str:
+    def _get_suggestion_reason(self, candidate: Dict, dependencies: Set[str]) -> str:
         """Get a human-readable reason for the suggestion"""
-        file_name = os.path.splitext(os.path.basename(file_path))[0]
+        file_name = candidate['name']
+        roles = candidate['roles']
         
         if file_name in dependencies:
             return f"Referenced as dependency: {file_name}"
         
-        if 'Service' in file_name:
+        if 'Service' in roles:
             return "Service class - likely dependency"
-        elif 'Repository' in file_name:
+        elif 'Repository' in roles:
             return "Repository class - data access layer"
-        elif 'Controller' in file_name:
+        elif 'Controller' in roles:
             return "Controller class - same layer"
-        elif 'Model' in file_name or 'Entity' in file_name:
+        elif 'Entity' in roles:
             return "Domain model/entity class"
-        elif 'Request' in file_name or 'Response' in file_name:
+        elif 'DTO' in roles:
             return "Request/Response DTO"
-        elif 'Config' in file_name:
+        elif 'Config' in roles:
             return "Configuration class"
         else:
             return "Related class in project"
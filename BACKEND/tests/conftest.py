@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The backend is run from its own directory rather than installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep test runs from writing the default on-disk parse cache under data/
+os.environ.setdefault('PARSE_CACHE_DIR', '')
@@ -0,0 +1,74 @@
+import os
+import pytest
+from test_generator import ai_context_analyzer
+from test_generator.ai_context_analyzer import AIContextAnalyzer, MAX_ANALYSIS_CANDIDATES, MAX_BUDGET_MISSES
+from test_generator.prompt_budget import estimate_tokens
+
+
+class _Client:
+    model_name = 'fake-model'
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_tests(self, prompt):
+        self.prompts.append(prompt)
+        return '{"dependencies": []}'
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.setenv('ANALYSIS_CACHE_ENABLED', 'false')
+    monkeypatch.delenv('LLM_CONTEXT_WINDOWS', raising=False)
+    monkeypatch.setenv('LLM_OUTPUT_TOKENS', '0')
+    root = str(tmp_path / 'project')
+    os.makedirs(root)
+    return root
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Candidate files rendered for the prompt (each goes through signature_source)"""
+    calls = []
+    real = ai_context_analyzer.signature_source
+
+    def counting(source):
+        calls.append(source)
+        return real(source)
+
+    monkeypatch.setattr(ai_context_analyzer, 'signature_source', counting)
+    return calls
+
+
+def write_classes(root, count, fields):
+    paths = []
+    for i in range(count):
+        path = os.path.join(root, f"Dep{i}.java")
+        body = ''.join(f"    private String field{n};\n" for n in range(fields))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"public class Dep{i} {{\n{body}}}\n")
+        paths.append(path)
+    target = os.path.join(root, 'Target.java')
+    with open(target, 'w', encoding='utf-8') as f:
+        f.write('public class Target {}\n')
+    return target, paths
+
+
+def test_reads_at_most_the_candidate_cap(project, reads, monkeypatch):
+    monkeypatch.setenv('OLLAMA_CONTEXT_TOKENS', '1000000')
+    target, candidates = write_classes(project, MAX_ANALYSIS_CANDIDATES + 15, fields=1)
+    client = _Client()
+    AIContextAnalyzer(project, client).analyze_dependencies_with_ai(target, candidates)
+    assert len(reads) == 1 + MAX_ANALYSIS_CANDIDATES  # Target plus the capped candidates
+    assert f"Dep{MAX_ANALYSIS_CANDIDATES - 1}.java" in client.prompts[0]
+    assert f"Dep{MAX_ANALYSIS_CANDIDATES}.java" not in client.prompts[0]
+
+
+def test_stops_after_consecutive_budget_misses(project, reads, monkeypatch):
+    target, candidates = write_classes(project, 10, fields=40)
+    analyzer = AIContextAnalyzer(project, _Client())
+    # Room for the template and target plus some slack, but never for a 40-field class
+    fixed = estimate_tokens(analyzer._build_ai_analysis_prompt('', {})) + estimate_tokens('public class Target {}\n')
+    monkeypatch.setenv('OLLAMA_CONTEXT_TOKENS', str(fixed + 200))
+    analyzer.analyze_dependencies_with_ai(target, candidates)
+    assert len(reads) == 1 + MAX_BUDGET_MISSES
@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import pytest
+from test_generator import analysis_cache
+from test_generator.analysis_cache import AnalysisCache, candidates_hash, content_hash
+
+ANALYSIS = {'dependencies': [{'class': 'UserRepository', 'importance_score': 0.9}]}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AnalysisCache(str(tmp_path / 'cache' / 'analysis.db'), ttl=3600)
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'UserService.java'
+    path.write_text('class UserService {}', encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def hash_calls(monkeypatch):
+    calls = []
+    real = analysis_cache.file_hash
+
+    def counting(path):
+        calls.append(path)
+        return real(path)
+
+    monkeypatch.setattr(analysis_cache, 'file_hash', counting)
+    return calls
+
+
+def put(cache, source, candidates='c1', paths=('A.java', 'B.java')):
+    cache.put('target', candidates, 'model', {source: content_hash('class UserService {}')}, ANALYSIS, list(paths))
+
+
+def test_exact_hit(cache, source):
+    put(cache, source)
+    assert cache.get('target', 'c1', 'model') == ANALYSIS
+    assert cache.get('target', 'c2', 'model') is None
+    assert cache.get('target', 'c1', 'other-model') is None
+    assert cache.stats() == {'hits': 1, 'misses': 2, 'invalidated': 0, 'entries': 1}
+
+
+def test_latest_serves_any_covering_candidate_list(cache, source):
+    put(cache, source, candidates='c1')
+    assert cache.latest('target', 'model', ['B.java', 'A.java']) == ANALYSIS
+    assert cache.latest('target', 'model', ['A.java']) == ANALYSIS
+    assert cache.latest('other-target', 'model', ['A.java']) is None
+
+
+def test_latest_skips_entries_that_missed_a_new_candidate(cache, source):
+    put(cache, source, candidates='c1')
+    assert cache.latest('target', 'model', ['A.java', 'B.java', 'New.java']) is None
+    # Still valid for its own candidate list
+    assert cache.get('target', 'c1', 'model') == ANALYSIS
+
+
+def test_latest_skips_entries_without_candidate_paths(cache, source):
+    cache.put('target', 'c1', 'model', {source: content_hash('class UserService {}')}, ANALYSIS)
+    assert cache.latest('target', 'model', []) is None
+    assert cache.get('target', 'c1', 'model') == ANALYSIS
+
+
+def test_store_from_older_version_is_upgraded(tmp_path, source):
+    db_path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE analyses (target_hash TEXT, candidates_hash TEXT, model TEXT, files TEXT, "
+                 "analysis TEXT, created_at REAL, PRIMARY KEY (target_hash, candidates_hash, model))")
+    conn.commit()
+    conn.close()
+    cache = AnalysisCache(db_path, ttl=3600)
+    put(cache, source)
+    assert cache.latest('target', 'model', ['A.java']) == ANALYSIS
+
+
+def test_disabled_by_default(monkeypatch):
+    monkeypatch.delenv('ANALYSIS_CACHE_ENABLED', raising=False)
+    assert analysis_cache.get_analysis_cache() is None
+
+
+def test_edit_invalidates(cache, source):
+    put(cache, source)
+    with open(source, 'w', encoding='utf-8') as f:
+        f.write('class UserService { int edited; }')
+    assert cache.get('target', 'c1', 'model') is None
+    assert cache.stats()['invalidated'] == 1
+    assert cache.stats()['entries'] == 0
+
+
+def test_deleted_file_invalidates(cache, source):
+    put(cache, source)
+    os.remove(source)
+    assert cache.get('target', 'c1', 'model') is None
+
+
+def test_unchanged_file_is_not_rehashed(cache, source, hash_calls):
+    put(cache, source)
+    hash_calls.clear()
+    assert cache.get('target', 'c1', 'model') == ANALYSIS
+    assert hash_calls == []
+
+
+def test_touched_file_is_rehashed_once(cache, source, hash_calls):
+    put(cache, source)
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    hash_calls.clear()
+    assert cache.get('target', 'c1', 'model') == ANALYSIS
+    assert cache.get('target', 'c1', 'model') == ANALYSIS
+    assert hash_calls == [source]  # The new mtime was remembered
+
+
+def test_not_cached_when_changed_during_analysis(cache, source):
+    cache.put('target', 'c1', 'model', {source: content_hash('class Older {}')}, ANALYSIS)
+    assert cache.stats()['entries'] == 0
+
+
+def test_candidates_hash_depends_on_order():
+    assert candidates_hash(['a.java', 'b.java']) != candidates_hash(['b.java', 'a.java'])
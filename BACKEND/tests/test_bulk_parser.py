@@ -0,0 +1,41 @@
+import os
+import pytest
+from test_generator.bulk_parser import ProjectMetadataStore, parse_project
+from test_generator.incremental_indexer import queue_project_parse
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = str(tmp_path / 'project')
+    os.makedirs(root)
+    sources = {
+        'User.java': 'package p;\npublic class User { private String name; public String getName() { return name; } }\n',
+        'Broken.java': 'package p;\npublic class Broken { void oops( }\n',
+    }
+    for name, source in sources.items():
+        with open(os.path.join(root, name), 'w', encoding='utf-8') as f:
+            f.write(source)
+    return root
+
+
+def test_parse_project_records_classes_and_errors(project):
+    summary = parse_project(project, workers=2)
+    assert (summary['parsed'], summary['failed']) == (1, 1)
+
+    store = ProjectMetadataStore(project)
+    try:
+        assert store.get('User.java')['class_name'] == 'User'
+        assert store.get('Broken.java') is None
+        assert [path for path, _ in store.errors()] == ['Broken.java']
+    finally:
+        store.close()
+
+
+def test_queued_parse_runs_in_the_background(project):
+    pending = queue_project_parse(project, files=[os.path.join(project, 'User.java')])
+    pending.result(timeout=60)
+    store = ProjectMetadataStore(project)
+    try:
+        assert store.get('User.java')['class_name'] == 'User'
+    finally:
+        store.close()
@@ -0,0 +1,128 @@
+import time
+import threading
+from test_generator import composite_client
+from test_generator.composite_client import CompositeClient, call_policy, hedge_stats, hedged_call
+from test_generator.resilience import cancelled, pause
+
+
+def slow(result, seconds):
+    def call():
+        pause(seconds)
+        return result
+    return call
+
+
+def failing():
+    raise RuntimeError('boom')
+
+
+def test_primary_answers_within_deadline():
+    assert hedged_call([('a', lambda: 'A'), ('b', lambda: 'B')], deadline=5, call_site='t-primary') == 'A'
+    assert hedge_stats()['t-primary'] == {'won_a': 1}
+
+
+def test_hedges_after_deadline():
+    started = time.time()
+    result = hedged_call([('a', slow('A', 3)), ('b', lambda: 'B')], deadline=0.1, call_site='t-hedge')
+    assert result == 'B'
+    assert time.time() - started < 2
+    assert hedge_stats()['t-hedge'] == {'backup_b': 1, 'won_b': 1}
+
+
+def test_fails_over_at_once_on_error():
+    started = time.time()
+    assert hedged_call([('a', failing), ('b', lambda: 'B')], deadline=30, call_site='t-error') == 'B'
+    assert time.time() - started < 2
+
+
+def test_unacceptable_result_fails_over():
+    assert hedged_call([('a', lambda: ''), ('b', lambda: 'B')], deadline=30, call_site='t-empty') == 'B'
+
+
+def test_loser_is_cancelled():
+    stopped = threading.Event()
+
+    def retrying():
+        while not cancelled():
+            pause(0.05)
+        stopped.set()
+
+    assert hedged_call([('a', retrying), ('b', lambda: 'B')], deadline=0.1, call_site='t-cancel') == 'B'
+    assert stopped.wait(2)
+
+
+def test_all_failed_returns_last_result():
+    assert hedged_call([('a', failing), ('b', lambda: '')], deadline=1, call_site='t-all') == ''
+    assert hedged_call([('a', failing), ('b', failing)], deadline=1, call_site='t-all') is None
+    assert hedge_stats()['t-all']['all_failed'] == 2
+
+
+def test_call_policy_from_environment(monkeypatch):
+    monkeypatch.setenv('LLM_FAILOVER', 'ollama')
+    monkeypatch.setenv('LLM_FAILOVER_CHAT', 'Gemini, ollama')
+    monkeypatch.setenv('LLM_DEADLINE_CHAT', '7')
+    assert call_policy('chat') == {'order': ['gemini', 'ollama'], 'deadline': 7.0}
+    assert call_policy('analysis')['order'] == ['ollama']
+
+
+class _Client:
+    model_name = 'fake'
+
+    def __init__(self, chunks=(), delay=0.0, error=None, available=True):
+        self.chunks = chunks
+        self.delay = delay
+        self.error = error
+        self.available = available
+        self.checks = 0
+
+    def ensure_model_available(self):
+        self.checks += 1
+        return self.available
+
+    def generate_tests(self, prompt, retries=3, use_cache=True):
+        time.sleep(self.delay)
+        return ''.join(self.chunks)
+
+    def stream_tests(self, prompt):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        yield from self.chunks
+
+
+def test_stream_uses_first_provider_to_produce_a_token():
+    client = CompositeClient([('a', _Client(['x'], delay=2)), ('b', _Client(['y', 'z']))], deadline=0.1,
+                             call_site='t-stream')
+    assert list(client.stream_tests('p')) == ['y', 'z']
+
+
+def test_stream_fails_over_before_first_token():
+    client = CompositeClient([('a', _Client([], error=RuntimeError('down'))), ('b', _Client(['y']))], deadline=30,
+                             call_site='t-stream-error')
+    assert list(client.stream_tests('p')) == ['y']
+
+
+def test_available_once_the_first_provider_is():
+    primary, backup = _Client(), _Client(available=False)
+    client = CompositeClient([('a', primary), ('b', backup)], deadline=30, call_site='t-available')
+    assert client.ensure_model_available()
+    assert backup.checks == 0
+    assert not CompositeClient([('b', backup)], deadline=30, call_site='t-available').ensure_model_available()
+
+
+def test_unavailable_provider_fails_over_when_its_attempt_starts():
+    client = CompositeClient([('a', _Client(['x'], available=False)), ('b', _Client(['y']))], deadline=30,
+                             call_site='t-lazy')
+    assert client.generate_tests('p') == 'y'
+    assert list(client.stream_tests('p')) == ['y']
+
+
+def test_stream_hedges_are_capped(monkeypatch):
+    monkeypatch.setattr(composite_client, '_hedge_slots', threading.BoundedSemaphore(1))
+    composite_client._hedge_slots.acquire()  # Every hedge slot is taken
+    backup = _Client(['y'])
+    client = CompositeClient([('a', _Client(['x'], delay=0.3)), ('b', backup)], deadline=0.05,
+                             call_site='t-stream-cap')
+    assert list(client.stream_tests('p')) == ['x']
+    assert backup.checks == 0
+    assert hedge_stats()['t-stream-cap']['hedge_skipped'] >= 1
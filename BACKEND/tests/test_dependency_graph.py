@@ -0,0 +1,68 @@
+import os
+import pytest
+from test_generator.dependency_graph import DependencyGraph
+from test_generator.project_index import ProjectIndex
+
+SOURCES = {
+    'model/Address.java': 'package com.acme.model;\npublic class Address {}\n',
+    'model/User.java': 'package com.acme.model;\npublic class User { private Address address; }\n',
+    'svc/UserService.java': (
+        'package com.acme.svc;\nimport com.acme.model.User;\n'
+        'public class UserService { public User find(String id) { return new User(); } }\n'
+    ),
+    'svc/Ping.java': 'package com.acme.svc;\npublic class Ping { private Pong pong; }\n',
+    'svc/Pong.java': 'package com.acme.svc;\npublic class Pong { private Ping ping; }\n',
+}
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = str(tmp_path / 'project')
+    for rel_path, source in SOURCES.items():
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(source)
+    return root
+
+
+@pytest.fixture
+def graph(project):
+    return DependencyGraph(ProjectIndex.build(project))
+
+
+def names(paths):
+    return [os.path.splitext(os.path.basename(p))[0] for p in paths]
+
+
+def test_dependencies_nearest_first(graph, project):
+    service = os.path.join(project, 'svc/UserService.java')
+    assert names(graph.dependencies(service)) == ['User']
+    assert names(graph.dependencies(service, depth=2)) == ['User', 'Address']
+
+
+def test_dependents(graph, project):
+    address = os.path.join(project, 'model/Address.java')
+    assert names(graph.dependents(address)) == ['User']
+    assert names(graph.dependents(address, depth=3)) == ['User', 'UserService']
+
+
+def test_topological_order_puts_dependencies_first(graph):
+    order = names(graph.topological_order())
+    assert order.index('Address') < order.index('User') < order.index('UserService')
+    # Cycle members come last, in path order
+    assert order[-2:] == ['Ping', 'Pong']
+    assert len(order) == len(SOURCES)
+
+
+def test_index_delta_recomputes_updated_edges(graph, project):
+    service = os.path.join(project, 'svc/UserService.java')
+    assert names(graph.dependencies(service)) == ['User']
+    with open(service, 'w', encoding='utf-8') as f:
+        f.write('package com.acme.svc;\npublic class UserService { private Ping ping; }\n')
+    graph.invalidate(graph.index.update_files([service]))
+    assert names(graph.dependencies(service)) == ['Ping']
+
+
+def test_unknown_file_has_no_edges(graph, project):
+    assert graph.dependencies(os.path.join(project, 'Missing.java')) == []
@@ -0,0 +1,55 @@
+import os
+import pytest
+from test_generator.project_index import ProjectIndex
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = str(tmp_path / 'project')
+    write(os.path.join(root, 'A.java'), 'package p;\npublic class A {}\n')
+    write(os.path.join(root, 'B.java'), 'package p;\npublic class B {}\n')
+    return root
+
+
+def test_update_files_reports_delta(project):
+    index = ProjectIndex.build(project)
+    a, b, c = (os.path.join(project, name) for name in ('A.java', 'B.java', 'C.java'))
+    write(a, 'package p;\nimport q.Other;\npublic class A {}\n')
+    os.remove(b)
+    write(c, 'package p;\npublic class C {}\n')
+
+    delta = index.update_files([a, b, c, os.path.join(project, 'notes.txt')])
+    assert delta == {'added': ['C.java'], 'updated': ['A.java'], 'removed': ['B.java']}
+    assert index.find_class('p.C') == c
+    assert index.find_class('B') is None
+    assert index.entry_for(a)['imports'] == ['q.Other']
+
+
+def test_touch_without_edit_is_not_an_update(project):
+    index = ProjectIndex.build(project)
+    a = os.path.join(project, 'A.java')
+    stat = os.stat(a)
+    os.utime(a, (stat.st_atime + 10, stat.st_mtime + 10))
+    assert index.update_files([a]) == {'added': [], 'updated': [], 'removed': []}
+
+
+def test_paths_outside_the_root_are_ignored(project, tmp_path):
+    outside = str(tmp_path / 'Elsewhere.java')
+    write(outside, 'public class Elsewhere {}\n')
+    index = ProjectIndex.build(project)
+    assert index.update_files([outside]) == {'added': [], 'updated': [], 'removed': []}
+
+
+def test_refresh_picks_up_changes_on_disk(project):
+    index = ProjectIndex.build(project)
+    write(os.path.join(project, 'sub', 'D.java'), 'package p.sub;\npublic class D {}\n')
+    os.remove(os.path.join(project, 'A.java'))
+    delta = index.refresh()
+    assert delta['added'] == [os.path.join('sub', 'D.java')]
+    assert delta['removed'] == ['A.java']
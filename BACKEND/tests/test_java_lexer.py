@@ -0,0 +1,65 @@
+from test_generator.java_lexer import (
+    base_type_name, class_references, primary_constructors, primary_type,
+    project_imports, scan_java, signature_source, tokenize,
+)
+
+SOURCE = '''package com.acme.svc;
+import com.acme.model.User;
+import java.util.*;
+import static org.junit.Assert.assertEquals;
+/** Doc with class Fake { } */
+public class UserService {
+    private final UserRepository repo;
+    private Map<String, List<User>> cache = new HashMap<>();
+    public UserService(UserRepository repo) { this.repo = repo; }
+    public User find(String id) { String s = "class Nope {"; return repo.findById(id); }
+    static class Inner { void run() { if (true) { new Helper(); } } }
+}
+'''
+
+
+def test_tokenize_drops_comments_and_collapses_literals():
+    tokens = tokenize('a >> b /* x */ "s\\"q" // tail\n ::')
+    assert tokens == [('ident', 'a'), ('op', '>'), ('op', '>'), ('ident', 'b'), ('literal', '""'), ('op', '::')]
+
+
+def test_scan_ignores_declarations_in_comments_and_strings():
+    facts = scan_java(SOURCE)
+    assert facts['package'] == 'com.acme.svc'
+    assert facts['imports'] == ['com.acme.model.User', 'java.util.*']
+    assert facts['static_imports'] == ['org.junit.Assert.assertEquals']
+    assert facts['types'] == [
+        {'name': 'UserService', 'kind': 'class', 'outer': None},
+        {'name': 'Inner', 'kind': 'class', 'outer': 'UserService'},
+    ]
+
+
+def test_scan_members():
+    facts = scan_java(SOURCE)
+    assert [(f['type'], f['name'], f['modifiers']) for f in facts['fields']] == [
+        ('UserRepository', 'repo', ['private', 'final']),
+        ('Map<String, List<User>>', 'cache', ['private']),
+    ]
+    assert [(m['owner'], m['name'], m['return_type']) for m in facts['methods']] == [
+        ('UserService', 'find', 'User'),
+        ('Inner', 'run', 'void'),
+    ]
+    assert facts['methods'][0]['parameters'] == [{'type': 'String', 'name': 'id'}]
+    assert facts['constructors'][0]['signature'] == 'UserService(UserRepository repo)'
+    assert facts['new_types'] == ['HashMap', 'Helper']
+
+
+def test_signature_source_strips_bodies():
+    stripped = signature_source(SOURCE)
+    assert 'public User find(String id) {}' in stripped
+    assert 'findById' not in stripped
+    assert 'private final UserRepository repo;' in stripped
+
+
+def test_convenience_views():
+    facts = scan_java(SOURCE)
+    assert primary_type(facts) == 'UserService'
+    assert project_imports(SOURCE) == ['User']
+    assert class_references(SOURCE) == ['UserRepository', 'User', 'HashMap', 'Helper']
+    assert [c['class_name'] for c in primary_constructors(SOURCE)] == ['UserService']
+    assert base_type_name('Map<String, List<User>>') == 'Map'
@@ -0,0 +1,43 @@
+import time
+from test_generator.model_registry import ModelRegistry
+
+KEY = ('ollama', 'm', 'http://a:11434')
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_mark_and_invalidate():
+    registry = ModelRegistry(ttl=60)
+    assert not registry.is_available(*KEY)
+    registry.mark_available(*KEY)
+    assert registry.is_available(*KEY)
+    assert not registry.is_available('ollama', 'm', 'http://b:11434')
+    registry.invalidate(*KEY)
+    assert not registry.is_available(*KEY)
+
+
+def test_entries_expire_without_refresh():
+    registry = ModelRegistry(ttl=0.05)
+    registry.mark_available(*KEY)
+    assert wait_for(lambda: not registry.is_available(*KEY))
+
+
+def test_background_refresh_extends_entries():
+    registry = ModelRegistry(ttl=0.3, refresh_interval=0.1)
+    checks = []
+    registry.mark_available(*KEY, refresh=lambda: checks.append(1) or True)
+    assert wait_for(lambda: len(checks) >= 3)
+    assert registry.is_available(*KEY)
+
+
+def test_failed_refresh_drops_entry():
+    registry = ModelRegistry(ttl=0.1, refresh_interval=0.05)
+    registry.mark_available(*KEY, refresh=lambda: int('not available'))
+    assert wait_for(lambda: '|'.join(KEY) not in registry.snapshot())
@@ -0,0 +1,96 @@
+import json
+import pytest
+import requests
+from test_generator import ollama_client
+from test_generator.model_registry import get_model_registry
+from test_generator.ollama_client import OllamaClient
+from test_generator.ollama_pool import OllamaPool
+
+MODEL = 'm'
+
+
+class _Response:
+    def __init__(self, status_code, data=None, lines=()):
+        self.status_code = status_code
+        self._data = data or {}
+        self._lines = lines
+        self.text = json.dumps(self._data)
+
+    def json(self):
+        return self._data
+
+    def iter_lines(self):
+        return iter(self._lines)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Transport:
+    """Answers /api/generate per host: 'dead', 'nomodel', 'broken' or 'ok'"""
+
+    def __init__(self):
+        self.posts = []
+
+    def post(self, url, json=None, timeout=None, stream=False):
+        host = url.split('//')[1].split('-')[0]
+        self.posts.append(host)
+        if host == 'dead':
+            raise requests.ConnectionError(url)
+        if host == 'nomodel':
+            return _Response(404, {'error': f"model '{MODEL}' not found"})
+        if host == 'broken':
+            return _Response(500, {'error': 'runner crashed'})
+        lines = [b'{"response": "class "}', b'{"response": "ATest {}", "done": true}']
+        return _Response(200, {'response': ' class ATest {} '}, lines)
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    transport = _Transport()
+    monkeypatch.setattr(ollama_client, 'get_transport', lambda: transport)
+    return transport
+
+
+def client_for(*hosts, name):
+    """Client over the given endpoints, all already verified (so only generation is exercised)"""
+    urls = [f"http://{host}-{name}-{i}:11434" for i, host in enumerate(hosts)]
+    client = OllamaClient(MODEL, urls[0])
+    client.pool = OllamaPool(urls)
+    for url in urls:
+        get_model_registry().mark_available('ollama', MODEL, url)
+    return client
+
+
+def test_skipping_endpoints_does_not_use_up_attempts(transport):
+    client = client_for('dead', 'nomodel', 'dead', 'ok', name='gen')
+    assert client._generate('prompt', retries=1) == 'class ATest {}'
+    assert transport.posts == ['dead', 'nomodel', 'dead', 'ok']
+
+
+def test_generation_failures_are_retried(transport, monkeypatch):
+    monkeypatch.setattr(ollama_client, 'pause', lambda seconds: None)
+    client = client_for('broken', name='retry')
+    assert client._generate('prompt', retries=2) is None
+    assert transport.posts == ['broken', 'broken']
+
+
+def test_stream_fails_over_before_the_first_chunk(transport):
+    client = client_for('dead', 'broken', 'nomodel', 'ok', name='stream')
+    assert list(client.stream_tests('prompt')) == ['class ', 'ATest {}']
+    assert transport.posts == ['dead', 'broken', 'nomodel', 'ok']
+
+
+def test_stream_reports_the_last_failure(transport):
+    client = client_for('dead', 'broken', name='stream-fail')
+    with pytest.raises(RuntimeError, match='runner crashed'):
+        list(client.stream_tests('prompt'))
+
+
+def test_model_info_without_an_endpoint(monkeypatch):
+    client = client_for('ok', name='info')
+    monkeypatch.setattr(client.pool, 'pick', lambda model_name, exclude=(): None)
+    assert client.get_model_info() is None
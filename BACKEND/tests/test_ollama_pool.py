@@ -0,0 +1,138 @@
+import pytest
+import requests
+from test_generator import ollama_pool
+from test_generator.ollama_pool import OllamaPool, endpoint_breaker, split_urls
+
+A, B = 'http://a:11434', 'http://b:11434'
+
+
+class _Response:
+    def __init__(self, status_code, models=()):
+        self.status_code = status_code
+        self._models = [{'name': name} for name in models]
+
+    def json(self):
+        return {'models': self._models}
+
+
+class _Transport:
+    def __init__(self, responses):
+        self.responses = responses
+
+    def get(self, url, timeout=None):
+        response = self.responses.get(url)
+        if response is None:
+            raise requests.ConnectionError(url)
+        return response
+
+
+@pytest.fixture
+def pool():
+    return OllamaPool([A, B], eject_seconds=60, failure_threshold=2)
+
+
+def test_split_urls():
+    assert split_urls(' http://a:11434/, http://b:11434 ,') == [A, B]
+    with pytest.raises(ValueError):
+        OllamaPool([])
+
+
+def test_fewest_outstanding_requests_first(pool):
+    with pool.lease('m') as first:
+        assert first == A
+        assert pool.pick('m') == B
+    assert pool.snapshot()[0]['served'] == 1
+
+
+def test_prefers_loaded_then_installed_model(pool):
+    pool.endpoints[0].installed = {'other'}
+    pool.endpoints[1].installed = {'m'}
+    assert pool.pick('m') == B
+    pool.report_success(A, 'm')  # A has now served m, so it is in memory there
+    assert pool.pick('m') == A
+
+
+def test_ejects_after_consecutive_failures(pool):
+    pool.report_failure(A)
+    assert pool.pick('m') == A
+    pool.report_failure(A)
+    assert pool.pick('m') == B
+    pool.report_failure(B)
+    pool.report_failure(B)
+    assert pool.pick('m') in (A, B)  # Everything ejected: still route somewhere
+
+
+def test_success_resets_failure_count(pool):
+    pool.report_failure(A)
+    pool.report_success(A)
+    pool.report_failure(A)
+    assert pool.pick('m') == A
+
+
+def test_request_exception_in_lease_counts_as_failure(pool):
+    for _ in range(2):
+        with pytest.raises(requests.Timeout):
+            with pool.lease('m'):
+                raise requests.Timeout()
+    assert not pool.snapshot()[0]['healthy']
+    assert pool.snapshot()[0]['outstanding'] == 0
+
+
+def test_health_check_refreshes_models_and_ejects_unreachable(pool, monkeypatch):
+    monkeypatch.setattr(ollama_pool, 'get_transport', lambda: _Transport({
+        f"{A}/api/ps": _Response(200, ['m']),
+        f"{A}/api/tags": _Response(200, ['m', 'other']),
+    }))
+    pool.check_health()
+    a, b = pool.snapshot()
+    assert a['healthy'] and a['loaded_models'] == ['m']
+    assert not b['healthy']
+    assert pool.pick('other') == A
+
+
+def test_health_check_readmits(pool, monkeypatch):
+    pool.report_failure(A)
+    pool.report_failure(A)
+    monkeypatch.setattr(ollama_pool, 'get_transport', lambda: _Transport({
+        f"{A}/api/ps": _Response(200), f"{A}/api/tags": _Response(200, ['m']),
+        f"{B}/api/ps": _Response(200), f"{B}/api/tags": _Response(200, ['m']),
+    }))
+    pool.check_health()
+    assert all(endpoint['healthy'] for endpoint in pool.snapshot())
+
+
+def test_pick_skips_excluded_endpoints(pool):
+    assert pool.pick('m', exclude={A}) == B
+    assert pool.pick('m', exclude={A, B}) is None
+    with pool.lease('m', exclude={A, B}) as url:
+        assert url is None
+
+
+def test_skips_endpoint_with_open_breaker():
+    c, d = 'http://c:11434', 'http://d:11434'
+    pool = OllamaPool([c, d])
+    breaker = endpoint_breaker(c)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert pool.pick('m') == d
+    breaker.record_success()
+    assert pool.pick('m') == c
+
+
+def test_mark_down_ejects_at_once(pool):
+    pool.mark_down(A)
+    assert pool.pick('m') == B
+
+
+def test_model_missing_ranks_endpoint_last_until_health_check(pool, monkeypatch):
+    pool.report_success(A, 'm')
+    pool.model_missing(A, 'm')
+    assert pool.pick('m') == B
+    assert pool.pick('other') == A
+
+    monkeypatch.setattr(ollama_pool, 'get_transport', lambda: _Transport({
+        f"{A}/api/ps": _Response(200), f"{A}/api/tags": _Response(200, ['m']),
+        f"{B}/api/ps": _Response(200), f"{B}/api/tags": _Response(200),
+    }))
+    pool.check_health()  # A has m installed again
+    assert pool.pick('m') == A
@@ -0,0 +1,67 @@
+import pytest
+from test_generator import ollama_client, ollama_warmer
+from test_generator.ollama_client import OllamaClient
+from test_generator.ollama_warmer import KeepAlivePolicy, OllamaWarmer, runner_options
+
+URL = 'http://warm:11434'
+
+
+class _Response:
+    def __init__(self, status_code=200, data=None):
+        self.status_code = status_code
+        self._data = data or {}
+        self.text = ''
+
+    def json(self):
+        return self._data
+
+
+class _Transport:
+    def __init__(self, loaded=(), installed=()):
+        self.loaded = loaded
+        self.installed = installed
+        self.posts = []
+
+    def get(self, url, timeout=None):
+        names = self.loaded if url.endswith('/api/ps') else self.installed
+        return _Response(data={'models': [{'name': name} for name in names]})
+
+    def post(self, url, json=None, timeout=None, stream=False):
+        self.posts.append((url, json))
+        return _Response(data={'response': ''})
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    transport = _Transport(loaded=['hot'], installed=['hot', 'cold'])
+    monkeypatch.setattr(ollama_warmer, 'get_transport', lambda: transport)
+    monkeypatch.setattr(ollama_client, 'get_transport', lambda: transport)
+    return transport
+
+
+def test_keep_alive_follows_traffic():
+    policy = KeepAlivePolicy(busy='60m', idle='5m', busy_requests=2)
+    assert policy.keep_alive_for('m') == '5m'
+    policy.touch('m')
+    policy.touch('m')
+    assert policy.keep_alive_for('m') == '60m'
+    assert policy.busy_models() == ['m']
+
+
+def test_warm_once_preloads_only_cold_models(transport):
+    warmer = OllamaWarmer(URL, ['hot', 'cold'], policy=KeepAlivePolicy(busy='60m'))
+    warmer.warm_once()
+    assert [body['model'] for _, body in transport.posts] == ['cold']
+    assert transport.posts[0][1]['keep_alive'] == '60m'
+    assert warmer.preloads == 1
+
+
+def test_preload_and_verification_load_the_model_like_generation(transport, monkeypatch):
+    monkeypatch.setenv('OLLAMA_CONTEXT_TOKENS', '16384')
+    monkeypatch.delenv('LLM_CONTEXT_WINDOWS', raising=False)
+    OllamaWarmer(URL, []).preload(URL, 'cold', '5m')
+    assert OllamaClient('cold', URL)._verify_model(URL)
+
+    assert runner_options('cold') == {'num_ctx': 16384}
+    for _, body in transport.posts:
+        assert body['options']['num_ctx'] == 16384
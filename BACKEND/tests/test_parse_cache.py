@@ -0,0 +1,89 @@
+import os
+from test_generator.parse_cache import ParseCache
+
+INFO = {'class_name': 'UserService', 'padding': 'x' * 100}
+
+
+def keys(count):
+    return [ParseCache.make_key(f"class C{i} {{}}", 'v1') for i in range(count)]
+
+
+def test_key_depends_on_source_and_parser_version():
+    source = 'class A {}'
+    assert ParseCache.make_key(source, 'v1') == ParseCache.make_key(source, 'v1')
+    assert ParseCache.make_key(source, 'v1') != ParseCache.make_key(source, 'v2')
+    assert ParseCache.make_key(source, 'v1') != ParseCache.make_key('class B {}', 'v1')
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ParseCache(cache_dir=None, max_memory_entries=2)
+    first, second, third = keys(3)
+    cache.put(first, {'n': 1})
+    cache.put(second, {'n': 2})
+    assert cache.get(first) == {'n': 1}  # first is now the most recently used
+    cache.put(third, {'n': 3})
+    assert cache.get(second) is None
+    assert cache.get(first) == {'n': 1}
+    assert cache.get(third) == {'n': 3}
+    assert cache.stats()['memory_entries'] == 2
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    key = keys(1)[0]
+    ParseCache(cache_dir=str(tmp_path)).put(key, INFO)
+    fresh = ParseCache(cache_dir=str(tmp_path))
+    assert fresh.get(key) == INFO
+    assert fresh.stats()['memory_entries'] == 1
+
+
+def test_unreadable_disk_entry_is_a_miss(tmp_path):
+    key = keys(1)[0]
+    cache = ParseCache(cache_dir=str(tmp_path))
+    cache.put(key, INFO)
+    with open(cache._disk_path(key), 'w', encoding='utf-8') as f:
+        f.write('{not json')
+    cache.clear()
+    assert cache.get(key) is None
+
+
+def test_disk_tier_evicts_least_recently_used_files(tmp_path):
+    cache = ParseCache(cache_dir=str(tmp_path), max_disk_bytes=600)  # Room for four entries
+    k0, k1, k2, k3, k4 = keys(5)
+    for key in (k0, k1, k2, k3):
+        cache.put(key, INFO)
+    for age, key in enumerate((k0, k1, k2, k3)):
+        os.utime(cache._disk_path(key), (1000 + age, 1000 + age))
+
+    cache.clear()
+    assert cache.get(k0) == INFO  # Reading refreshes the file's mtime
+    cache.put(k4, INFO)  # Over budget: evict down to 80% of it
+
+    on_disk = {key for key in (k0, k1, k2, k3, k4) if os.path.exists(cache._disk_path(key))}
+    assert on_disk == {k0, k3, k4}
+    assert cache.stats()['disk_bytes'] <= 480
+
+
+def test_overwriting_an_entry_counts_its_size_once(tmp_path):
+    cache = ParseCache(cache_dir=str(tmp_path))
+    key = keys(1)[0]
+    for _ in range(5):
+        cache.put(key, INFO)
+    assert cache.stats()['disk_bytes'] == os.path.getsize(cache._disk_path(key))
+
+
+def test_lookups_do_not_wait_for_disk_scans(tmp_path, monkeypatch):
+    cache = ParseCache(cache_dir=str(tmp_path))
+    first, second = keys(2)
+    cache.put(first, INFO)
+    seen = []
+
+    def scan():
+        seen.append(cache._lock.locked())
+        return iter(())
+
+    monkeypatch.setattr(cache, '_scan_disk', scan)
+    cache._disk_bytes = None  # Force a rescan on the next write
+    cache.put(second, INFO)
+    cache._evict_disk()
+    assert seen == [False, False]
@@ -0,0 +1,87 @@
+import json
+import os
+import pytest
+from test_generator import project_index
+from test_generator.project_index import ProjectIndex
+
+
+def write(root, rel_path, content):
+    path = os.path.join(root, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return path
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = str(tmp_path / 'project')
+    write(root, 'src/com/acme/model/User.java', 'package com.acme.model;\npublic class User {}\n')
+    write(root, 'src/com/acme/svc/UserService.java',
+          'package com.acme.svc;\nimport com.acme.model.User;\nimport java.util.*;\n'
+          'public class UserService { User find() { return null; } }\n')
+    write(root, 'src/com/acme/svc/Helpers.java', 'package com.acme.svc;\ninterface Helper {}\n')
+    write(root, 'README.md', 'not java')
+    return root
+
+
+def test_build_indexes_every_java_file(project):
+    index = ProjectIndex.build(project)
+    assert len(index) == 3
+    assert sorted(os.path.basename(p) for p in index.java_files()) == ['Helpers.java', 'User.java', 'UserService.java']
+
+    entry = index.entry_for(os.path.join(project, 'src/com/acme/svc/UserService.java'))
+    assert entry['fqn'] == 'com.acme.svc.UserService'
+    assert entry['imports'] == ['com.acme.model.User', 'java.util.*']
+
+
+def test_find_class_by_simple_and_qualified_name(project):
+    index = ProjectIndex.build(project)
+    user = os.path.join(project, 'src/com/acme/model/User.java')
+    assert index.find_class('User') == user
+    assert index.find_class('com.acme.model.User') == user
+    assert index.find_class('Missing') is None
+
+
+def test_primary_type_falls_back_to_first_declared_type(project):
+    index = ProjectIndex.build(project)
+    assert index.find_class('Helper') == os.path.join(project, 'src/com/acme/svc/Helpers.java')
+
+
+def test_primary_type_ignores_declarations_in_comments_and_strings(project):
+    write(project, 'src/com/acme/svc/Tools.java',
+          'package com.acme.svc;\n// class Fake is gone\n/* interface Ghost */\n'
+          'enum Tool { A; String s = "record Quoted"; }\n')
+    index = ProjectIndex.build(project)
+    assert index.find_class('Tool') == os.path.join(project, 'src/com/acme/svc/Tools.java')
+    assert index.find_class('Fake') is None
+    assert index.find_class('Ghost') is None
+
+
+def test_save_and_load_round_trip(project):
+    index = ProjectIndex.build(project)
+    index_path = index.save()
+    assert index_path == ProjectIndex.index_path_for(project)
+
+    loaded = ProjectIndex.load(project)
+    assert loaded.entries == index.entries
+    assert loaded.find_class('UserService') == index.find_class('UserService')
+
+
+def test_load_ignores_other_index_versions(project):
+    index_path = ProjectIndex.build(project).save()
+    with open(index_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    data['version'] = project_index.INDEX_VERSION + 1
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    assert ProjectIndex.load(project) is None
+
+
+def test_build_merges_persisted_sub_indexes(project, tmp_path):
+    nested_root = os.path.join(project, 'upload2')
+    write(nested_root, 'Order.java', 'package com.acme.order;\npublic class Order {}\n')
+    ProjectIndex.build(nested_root).save()
+
+    index = ProjectIndex.build(project)
+    assert index.find_class('com.acme.order.Order') == os.path.join(project, 'upload2', 'Order.java')
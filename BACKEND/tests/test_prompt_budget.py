@@ -0,0 +1,49 @@
+from test_generator.prompt_budget import PromptBudget, context_window, estimate_tokens, prompt_budget
+
+
+def test_estimate_tokens_rounds_up():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens(None) == 0
+    assert estimate_tokens('abcd') == 1
+    assert estimate_tokens('abcde') == 2
+
+
+def test_take_charges_sections_that_fit():
+    budget = PromptBudget(10)
+    budget.reserve('x' * 8)  # 2 tokens of template
+    assert budget.take('y' * 20) == 'y' * 20
+    assert (budget.used, budget.remaining) == (7, 3)
+
+
+def test_take_falls_back_then_drops():
+    budget = PromptBudget(10)
+    assert budget.take('x' * 100, fallback='sig') == 'sig'
+    assert budget.used == 1
+    assert budget.take('x' * 100, fallback='y' * 100) is None
+    assert budget.dropped == 1
+    assert budget.summary() == '1/10 tokens used, 1 sections dropped'
+
+
+def test_required_section_may_overrun():
+    budget = PromptBudget(2)
+    assert budget.take('x' * 40, fallback='y' * 20, required=True) == 'y' * 20
+    assert budget.used == 5
+    assert budget.remaining == 0
+    assert budget.take('z', required=True) == 'z'
+
+
+def test_context_window_overrides(monkeypatch):
+    monkeypatch.setenv('LLM_CONTEXT_WINDOWS', 'llama3=16384, codellama:13b=4096, bad')
+    monkeypatch.delenv('OLLAMA_CONTEXT_TOKENS', raising=False)
+    assert context_window('llama3:8b') == 16384
+    assert context_window('codellama:13b') == 4096
+    assert context_window('codellama:7b') == 8192
+    assert context_window('gemini-1.5-pro') == 32768
+
+
+def test_prompt_budget_leaves_room_for_the_response(monkeypatch):
+    monkeypatch.delenv('LLM_CONTEXT_WINDOWS', raising=False)
+    monkeypatch.delenv('LLM_OUTPUT_TOKENS', raising=False)
+    monkeypatch.setenv('OLLAMA_CONTEXT_TOKENS', '4096')
+    assert prompt_budget('starchat2:15b') == 4096 - 2048
+    assert PromptBudget.for_model('starchat2:15b').total == 2048
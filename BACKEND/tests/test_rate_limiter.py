@@ -0,0 +1,64 @@
+import time
+import pytest
+from test_generator.rate_limiter import RateLimiter, _MemoryBuckets, get_rate_limiter
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_limiter(request, tmp_path):
+    def make(**limits):
+        db_path = str(tmp_path / 'limits.db') if request.param == 'sqlite' else None
+        return RateLimiter('test', db_path=db_path, **limits)
+    return make
+
+
+def test_bucket_reports_wait_without_taking():
+    buckets = _MemoryBuckets()
+    bucket = [('b', 60, 60, 1.0)]
+    assert buckets.take(bucket) == 0
+    wait = buckets.take([('b', 2, 60, 1.0)])
+    assert 1.5 < wait <= 2
+    assert buckets.take([('b', 1, 60, 1.0)], force=True) == 0  # Goes negative
+    assert buckets.take([('b', 1, 60, 1.0)]) > 1.5
+
+
+def test_requests_pass_until_the_quota_is_used(make_limiter):
+    limiter = make_limiter(rpm=3)
+    for _ in range(3):
+        assert limiter.acquire(max_wait=0) < 0.01
+    assert limiter.buckets.take(limiter._requests(1, 0)) > 0
+
+
+def test_acquire_waits_for_refill(make_limiter):
+    limiter = make_limiter(rpm=1200)  # 20 requests per second
+    limiter.throttle()
+    waited = limiter.acquire()
+    assert 0.02 < waited < 1
+    assert limiter.stats()['waits'] == 1
+
+
+def test_acquire_sends_anyway_after_max_wait(make_limiter):
+    limiter = make_limiter(rpm=1)
+    limiter.acquire()
+    started = time.time()
+    limiter.acquire(max_wait=0.1)
+    assert time.time() - started < 0.5
+
+
+def test_tokens_are_limited_and_charged(make_limiter):
+    limiter = make_limiter(tpm=600)  # 10 tokens per second
+    limiter.acquire(tokens=590)
+    limiter.charge(20)  # Response tokens only known afterwards
+    assert limiter.buckets.take(limiter._requests(0, 1)) > 1
+
+
+def test_throttle_empties_the_request_bucket(make_limiter):
+    limiter = make_limiter(rpm=60)
+    limiter.throttle()
+    assert limiter.buckets.take(limiter._requests(1, 0)) > 0.5
+
+
+def test_unlimited_without_configuration(monkeypatch):
+    monkeypatch.delenv('NOQUOTA_RPM', raising=False)
+    monkeypatch.delenv('NOQUOTA_TPM', raising=False)
+    assert get_rate_limiter('noquota') is None
+    assert RateLimiter('test').acquire(tokens=10 ** 6) == 0
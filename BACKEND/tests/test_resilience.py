@@ -0,0 +1,103 @@
+import threading
+import pytest
+from test_generator.resilience import (
+    CircuitBreaker, LatencyTracker, backoff_delay, cancel_scope, cancelled, pause,
+)
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+    assert breaker.snapshot()['state'] == CircuitBreaker.OPEN
+
+
+def test_is_open_only_until_a_probe_is_due():
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.is_open()
+    breaker.reset_timeout = 0
+    assert not breaker.is_open()  # Pools may route a probe to it again
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()  # The probe is still in flight
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=0)
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_guard_counts_unexpected_exception_and_frees_probe():
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    with pytest.raises(ValueError):
+        with breaker.guard():
+            raise ValueError('bad JSON')
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow()  # reset_timeout=0: the next probe is admitted, not stuck
+
+
+def test_guard_without_verdict_releases_probe():
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    with breaker.guard():
+        pass  # e.g. a 400: neither success nor failure
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_backoff_delay_is_bounded():
+    for attempt in range(10):
+        delay = backoff_delay(attempt, base=1.0, cap=5.0)
+        assert 0 <= delay <= min(5.0, 2 ** attempt)
+
+
+def test_latency_timeout_uses_default_until_enough_samples():
+    tracker = LatencyTracker(multiplier=2.0, min_timeout=1.0)
+    for _ in range(4):
+        tracker.record('m', 3.0)
+    assert tracker.timeout_for('m', 100) == 100
+    tracker.record('m', 3.0)
+    assert tracker.timeout_for('m', 100) == 6.0
+    assert tracker.timeout_for('m', 5) == 5  # Never above the default
+
+
+def test_latency_timeout_floor():
+    tracker = LatencyTracker(multiplier=2.0, min_timeout=30.0)
+    for _ in range(10):
+        tracker.record('m', 0.5)
+    assert tracker.timeout_for('m', 300) == 30.0
+
+
+def test_cancel_scope_is_per_thread_and_wakes_pause():
+    event = threading.Event()
+    seen = []
+
+    def other_thread():
+        seen.append(cancelled())
+
+    with cancel_scope(event):
+        event.set()
+        assert cancelled()
+        pause(10)  # Returns at once: the call was cancelled
+        thread = threading.Thread(target=other_thread)
+        thread.start()
+        thread.join()
+    assert seen == [False]
+    assert not cancelled()
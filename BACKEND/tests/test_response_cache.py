@@ -0,0 +1,64 @@
+import time
+import pytest
+from test_generator import response_cache
+from test_generator.response_cache import ResponseCache, cached_generate
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / 'llm_cache.db'), max_bytes=1000)
+
+
+def test_key_ignores_whitespace_noise_only():
+    key = ResponseCache.make_key('ollama', 'm', 0.2, 'Write tests\r\nfor A  \n\n\n\nplease')
+    assert key == ResponseCache.make_key('ollama', 'm', 0.2, 'Write tests\nfor A\n\nplease')
+    assert key != ResponseCache.make_key('gemini', 'm', 0.2, 'Write tests\nfor A\n\nplease')
+    assert key != ResponseCache.make_key('ollama', 'm', 0.7, 'Write tests\nfor A\n\nplease')
+    assert key != ResponseCache.make_key('ollama', 'm', 0.2, 'Write tests for B')
+
+
+def test_put_and_get(cache):
+    key = ResponseCache.make_key('ollama', 'm', 0.2, 'prompt')
+    assert cache.get(key) is None
+    cache.put(key, 'ollama', 'm', 'class ATest {}')
+    assert cache.get(key) == 'class ATest {}'
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'entries': 1, 'bytes': len('class ATest {}')}
+
+
+def test_evicts_least_recently_used(cache):
+    first, second, third = (ResponseCache.make_key('ollama', 'm', 0.2, p) for p in 'abc')
+    cache.put(first, 'ollama', 'm', 'x' * 400)
+    time.sleep(0.01)
+    cache.put(second, 'ollama', 'm', 'y' * 400)
+    time.sleep(0.01)
+    assert cache.get(first)  # first is now the most recently used
+    time.sleep(0.01)
+    cache.put(third, 'ollama', 'm', 'z' * 400)  # 1200 bytes: evict down to 800
+    assert cache.get(second) is None
+    assert cache.get(first) and cache.get(third)
+
+
+def test_cached_generate_is_opt_in(monkeypatch):
+    monkeypatch.delenv('LLM_CACHE_ENABLED', raising=False)
+    calls = []
+    for _ in range(2):
+        cached_generate('ollama', 'm', 0.2, 'prompt', lambda: calls.append(1) or 'out')
+    assert len(calls) == 2
+
+
+def test_cached_generate_serves_repeats_and_skips_empty(monkeypatch, cache):
+    monkeypatch.setenv('LLM_CACHE_ENABLED', 'true')
+    monkeypatch.setattr(response_cache, '_default_cache', cache)
+    calls = []
+
+    def generate():
+        calls.append(1)
+        return 'out'
+
+    assert cached_generate('ollama', 'm', 0.2, 'prompt', generate) == 'out'
+    assert cached_generate('ollama', 'm', 0.2, 'prompt', generate) == 'out'
+    assert cached_generate('ollama', 'm', 0.2, 'prompt', generate, use_cache=False) == 'out'
+    assert len(calls) == 2
+
+    assert cached_generate('ollama', 'm', 0.2, 'other', lambda: '') == ''
+    assert cache.stats()['entries'] == 1
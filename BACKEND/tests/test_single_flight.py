@@ -0,0 +1,74 @@
+import time
+import threading
+import pytest
+from test_generator.single_flight import SingleFlight, flight_key
+
+
+def run_concurrently(flight, key, fn, callers):
+    results = [None] * callers
+    errors = [None] * callers
+
+    def call(i):
+        try:
+            results[i] = flight.do(key, fn)
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight('test')
+    release = threading.Event()
+    executions = []
+
+    def slow():
+        executions.append(1)
+        release.wait(5)
+        return 'result'
+
+    threads, results, _ = run_concurrently(flight, 'k', slow, 4)
+    while flight.stats()['executions'] + flight.stats()['coalesced'] < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert executions == [1]
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert {result for result, _ in results} == {'result'}
+    assert flight.stats() == {'in_flight': 0, 'executions': 1, 'coalesced': 3}
+
+
+def test_waiters_receive_the_leaders_exception():
+    flight = SingleFlight('test')
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError('boom')
+
+    threads, _, errors = run_concurrently(flight, 'k', failing, 3)
+    while flight.stats()['executions'] + flight.stats()['coalesced'] < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert [type(e) for e in errors] == [RuntimeError] * 3
+
+
+def test_nothing_is_cached_after_completion():
+    flight = SingleFlight('test')
+    assert flight.do('k', lambda: 1) == (1, False)
+    assert flight.do('k', lambda: 2) == (2, False)
+    with pytest.raises(ValueError):
+        flight.do('k', lambda: int('x'))
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_flight_key_separates_parts():
+    assert flight_key('ab', 'c') != flight_key('a', 'bc')
+    assert flight_key('a', None) == flight_key('a', '')